@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares classifying the status of every issue of a synthetic repository one issue at a time, as Issue.status did
+before statuses were classified in bulk, with classifying them all at once.
+
+Run from the source tree with: python -m benchmarks.benchmark_issue_status [number of issues]
+"""
+
+import datetime
+import random
+import sys
+import timeit
+
+from sciit import Issue, IssueSnapshot
+from sciit.issue_status import classify_issue_statuses
+
+
+# Templates and the command line read the status of each issue several times.
+STATUS_READS_PER_ISSUE = 3
+
+
+class SyntheticCommit:
+
+    def __init__(self, number):
+        self.hexsha = '%040x' % number
+        self.authored_datetime = datetime.datetime(2018, 1, 1) + datetime.timedelta(hours=number)
+
+
+def make_synthetic_history(number_of_issues, number_of_commits=2000, number_of_branches=50, seed=0):
+    rng = random.Random(seed)
+
+    commits = [SyntheticCommit(number) for number in range(number_of_commits)]
+    branch_names = ['master'] + ['issue-%d' % number for number in range(number_of_branches - 1)]
+    head_commits = {branch_name: rng.choice(commits).hexsha for branch_name in branch_names}
+
+    history = dict()
+    for number in range(number_of_issues):
+        issue_id = 'issue-%d' % number
+        issue = Issue(issue_id, None, head_commits)
+
+        first_commit = rng.randrange(number_of_commits - 20)
+        snapshot_commits = commits[first_commit:first_commit + rng.randint(1, 20)]
+        in_branches = rng.sample(branch_names, rng.randint(1, 3))
+        issue.add_snapshots([IssueSnapshot(commit, {'issue_id': issue_id}, in_branches) for commit in snapshot_commits])
+
+        history[issue_id] = issue
+
+    return history, head_commits
+
+
+def classify_one_at_a_time(history):
+    for _ in range(STATUS_READS_PER_ISSUE):
+        for issue in history.values():
+            issue.classify_status()
+
+
+def classify_in_bulk(history, head_commits):
+    for issue_id, status in classify_issue_statuses(history.values(), head_commits).items():
+        history[issue_id].classified_status = status
+    for _ in range(STATUS_READS_PER_ISSUE):
+        for issue in history.values():
+            _ = issue.status
+
+
+def main(number_of_issues=10000):
+    history, head_commits = make_synthetic_history(number_of_issues)
+
+    expected_statuses = {issue_id: issue.classify_status() for issue_id, issue in history.items()}
+    if classify_issue_statuses(history.values(), head_commits) != expected_statuses:
+        raise AssertionError('Bulk classification differs from classifying each issue')
+
+    one_at_a_time_seconds = min(timeit.repeat(lambda: classify_one_at_a_time(history), number=1, repeat=3))
+    in_bulk_seconds = min(timeit.repeat(lambda: classify_in_bulk(history, head_commits), number=1, repeat=3))
+
+    print(f'{number_of_issues} issues, status read {STATUS_READS_PER_ISSUE} times each')
+    print(f'one at a time: {one_at_a_time_seconds * 1000:.1f} ms')
+    print(f'in bulk:       {in_bulk_seconds * 1000:.1f} ms')
+    print(f'speed-up:      {one_at_a_time_seconds / in_bulk_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares building the issue repository of a synthetic git history in one process with building it with several worker
+processes parsing the blobs. The history is written to a temporary directory with git fast-import.
+
+Only reading and parsing blobs is spread over the workers. Writing the snapshots of each commit, which depends on those
+of its parent, and refreshing the issue states stay in the main process, so the time the write stage of a run in one
+process takes, which is printed, bounds how far more workers can bring the total down.
+
+Run from the source tree with: python -m benchmarks.benchmark_parallel_ingest [number of commits]
+"""
+
+import glob
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from git import Repo
+
+from sciit import IssueRepo
+
+
+JOBS = (1, 2, 4, 8)
+
+NUMBER_OF_FILES = 200
+
+FILES_CHANGED_PER_COMMIT = 8
+
+FUNCTIONS_PER_FILE = 1000
+
+
+def make_source_file(rng, number):
+    functions = list()
+    for function_number in range(FUNCTIONS_PER_FILE):
+        if rng.random() < 0.002:
+            functions.append(
+                f'/*\n * @issue file-{number}-{function_number}-{rng.randrange(1000)}\n'
+                f' * @title Tidy up function {function_number}\n * @description\n *   It does too much.\n */\n')
+        functions.append(
+            f'int function_{function_number}(int x) {{\n    return x * {rng.randrange(1000)}; /* scaled */\n}}\n')
+    return ''.join(functions).encode()
+
+
+def make_fast_import_stream(number_of_commits, seed=0):
+    rng = random.Random(seed)
+    stream = list()
+
+    for commit_number in range(1, number_of_commits + 1):
+        changed_files = range(NUMBER_OF_FILES) if commit_number == 1 else \
+            rng.sample(range(NUMBER_OF_FILES), FILES_CHANGED_PER_COMMIT)
+
+        message = b'Commit %d' % commit_number
+        stream.append(b'commit refs/heads/master\n')
+        stream.append(b'committer Bench <bench@example.com> %d +0000\n' % (1500000000 + commit_number * 60))
+        stream.append(b'data %d\n%s\n' % (len(message), message))
+        for number in changed_files:
+            contents = make_source_file(rng, number)
+            stream.append(b'M 644 inline src/file_%d.c\ndata %d\n%s\n' % (number, len(contents), contents))
+
+    return b''.join(stream)
+
+
+def build_issue_repository(path, jobs):
+    for parsed_blobs_file in glob.glob(os.path.join(path, '.git', 'issues-parsed-blobs.db*')):
+        os.remove(parsed_blobs_file)
+
+    issue_repository = IssueRepo(Repo(path), jobs=jobs)
+    if issue_repository.is_init():
+        issue_repository.reset()
+    issue_repository.setup_file_system_resources(install_hooks=False)
+
+    start = time.perf_counter()
+    issue_repository.cache_issue_snapshots_from_all_commits()
+    seconds = time.perf_counter() - start
+
+    snapshots = sorted(
+        (snapshot.commit.hexsha, snapshot.issue_id, snapshot.file_path)
+        for snapshot in issue_repository.find_issue_snapshots())
+    stages = issue_repository.last_ingestion_summary['stages']
+    issue_repository.close()
+
+    return seconds, snapshots, stages
+
+
+def main(number_of_commits=300):
+    with tempfile.TemporaryDirectory() as path:
+        subprocess.run(['git', 'init', '-q', path], check=True)
+        subprocess.run(['git', 'fast-import', '--quiet'], cwd=path, input=make_fast_import_stream(number_of_commits),
+                       check=True)
+
+        print(f'{number_of_commits} commits changing {FILES_CHANGED_PER_COMMIT} of {NUMBER_OF_FILES} files each, '
+              f'{os.cpu_count()} cores')
+
+        serial_seconds, expected_snapshots, stages = build_issue_repository(path, jobs=1)
+        print(f'jobs 1: {serial_seconds:.2f} s, ' +
+              ', '.join(f'{name} {stats["busy_seconds"]:.2f} s busy' for name, stats in stages.items()))
+
+        for jobs in JOBS[1:]:
+            seconds, snapshots, _ = build_issue_repository(path, jobs)
+            if snapshots != expected_snapshots:
+                raise AssertionError(f'Ingesting with {jobs} jobs gives different snapshots')
+            print(f'jobs {jobs}: {seconds:.2f} s, speed-up {serial_seconds / seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:2]])
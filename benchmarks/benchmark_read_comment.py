@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares reading issue properties from large comments with one regular expression per property, as
+extract_issue_data_from_comment_string did before, with reading them in a single scan over the @ markers.
+
+Run from the source tree with: python -m benchmarks.benchmark_read_comment [number of description lines]
+"""
+
+import sys
+import timeit
+
+from sciit.read_comment import read_issue_data_from_comment, read_issue_data_from_comment_with_regexes
+
+
+COMMENTS_PER_RUN = 20
+
+
+def make_comment(number_of_description_lines):
+    description_lines = '\n'.join(
+        '    Line %d of a long description, with an email@example.com address now and then.' % number
+        if number % 10 == 0 else
+        '    Line %d of a long description that runs on for a good many words.' % number
+        for number in range(number_of_description_lines))
+
+    return (
+        '\n    @issue a-long-issue'
+        '\n    @title An issue with a long description'
+        '\n    @description'
+        '\n' + description_lines +
+        '\n    @assignees nystrome, kevin'
+        '\n    @labels performance'
+        '\n    @due_date 12 oct 2018'
+        '\n    @priority high'
+        '\n    @weight 3'
+        '\n    @blockers another-issue'
+        '\n')
+
+
+def read_comments(read_issue_data, comment):
+    for _ in range(COMMENTS_PER_RUN):
+        read_issue_data(comment)
+
+
+def main(number_of_description_lines=2000):
+    comment = make_comment(number_of_description_lines)
+
+    if read_issue_data_from_comment(comment) != read_issue_data_from_comment_with_regexes(comment):
+        raise AssertionError('Reading in a single scan differs from reading with a regular expression per property')
+
+    with_regexes_seconds = min(timeit.repeat(
+        lambda: read_comments(read_issue_data_from_comment_with_regexes, comment), number=1, repeat=3))
+    single_scan_seconds = min(timeit.repeat(
+        lambda: read_comments(read_issue_data_from_comment, comment), number=1, repeat=3))
+
+    print(f'{COMMENTS_PER_RUN} comments of {len(comment)} characters')
+    print(f'regex per property: {with_regexes_seconds * 1000:.1f} ms')
+    print(f'single scan:        {single_scan_seconds * 1000:.1f} ms')
+    print(f'speed-up:           {with_regexes_seconds / single_scan_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares finding the comments in large sources with the comment patterns of sciit.regex, as find_issues_in_blob did
+before, with the linear time scanners of sciit.scan_comments, over sources of doubling size. The scanners take about
+twice as long for each doubling. On sources where the patterns backtrack, they take about four times as long, and are
+no longer timed once they get too slow.
+
+Run from the source tree with: python -m benchmarks.benchmark_scan_comments [largest size in megabytes]
+"""
+
+import re
+import sys
+import timeit
+
+from sciit.regex import C_STYLE, PYTHON, MARKDOWN
+from sciit.scan_comments import scan_comments
+
+
+# Sources in which the patterns only ever find short comments, and in which the lazy repetitions of the patterns run
+# on without finding a closing delimiter.
+def make_commented_source(size):
+    block = '/*\n * @issue an-issue\n * @title A title\n */\nfunction f(a, b) { return a / b * 2; }\n'
+    return block * (size // len(block))
+
+
+def make_minified_source(size):
+    block = 'var a=b/*c*/+d;var e="/*";'
+    return (block * (size // len(block))).replace('*/', '  ')
+
+
+def make_python_source(size):
+    block = 'def f():\n    """A docstring."""\n    return 1\n\n'
+    return block * (size // len(block))
+
+
+def make_markdown_source(size):
+    block = 'Some text --- with dashes\n'
+    return '---\n@issue an-issue\n---\n' + block * (size // len(block))
+
+
+SOURCES = (
+    ('commented c-style', C_STYLE, make_commented_source),
+    ('minified c-style', C_STYLE, make_minified_source),
+    ('python', PYTHON, make_python_source),
+    ('markdown', MARKDOWN, make_markdown_source),
+)
+
+
+# Patterns are no longer timed once they take longer than this on a source, as they would go on to take far longer on
+# the larger ones.
+MAX_PATTERN_SECONDS = 2
+
+
+def time_finding(find_spans, content):
+    return min(timeit.repeat(lambda: list(find_spans(content)), number=1, repeat=3))
+
+
+def main(largest_size_in_megabytes=4):
+    largest_size = largest_size_in_megabytes * 1024 * 1024
+    sizes = [largest_size >> shift for shift in range(6, -1, -1)]
+
+    for name, pattern, make_source in SOURCES:
+        print(name)
+        pattern_seconds = 0
+
+        for size in sizes:
+            content = make_source(size)
+            scanner_seconds = time_finding(lambda text: scan_comments(pattern, text), content)
+
+            if pattern_seconds < MAX_PATTERN_SECONDS:
+                spans = [match.span() for match in re.finditer(pattern, content)]
+                if spans != list(scan_comments(pattern, content)):
+                    raise AssertionError('The scanner finds other comments than the pattern')
+
+                pattern_seconds = time_finding(lambda text: re.finditer(pattern, text), content)
+                pattern_str = f'{pattern_seconds * 1000:8.1f} ms'
+            else:
+                pattern_str = '       -   '
+
+            print(f'  {len(content) / 1024 / 1024:5.2f} MB  pattern: {pattern_str}  '
+                  f'scanner: {scanner_seconds * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
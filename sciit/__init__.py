@@ -1,2 +1,2 @@
-from .issue import Issue, IssueSnapshot
+from .issue import Issue, IssueSnapshot, IssueState
 from .repo import IssueRepo
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing blobs for issues in worker processes, so that ingestion can use more than one core.
+"""
+
+import collections
+import math
+import multiprocessing
+import multiprocessing.util
+
+from concurrent.futures import ProcessPoolExecutor
+
+from git import Repo
+
+from sciit.read_blob import BlobReader
+from sciit.read_commit import parse_blobs, find_issues_in_blob_chunks, ISSUE_MARKER_BYTES
+
+
+__all__ = ('BlobParserPool', )
+
+
+# The blob reader of a worker process, which keeps its `git cat-file --batch` process open between tasks.
+_worker_blob_reader = None
+
+
+def _start_worker(git_working_dir, max_blob_size):
+    global _worker_blob_reader
+    _worker_blob_reader = BlobReader(
+        Repo(git_working_dir), max_blob_size, ISSUE_MARKER_BYTES, find_issues_in_blob_chunks)
+    multiprocessing.util.Finalize(_worker_blob_reader, _worker_blob_reader.close, exitpriority=10)
+
+
+def _parse_blobs_in_worker(blob_keys):
+    scan_counts = collections.Counter()
+    objects_served, bytes_served = _worker_blob_reader.objects_served, _worker_blob_reader.bytes_served
+
+    issue_data = parse_blobs(_worker_blob_reader, blob_keys, scan_counts)
+
+    return \
+        issue_data, scan_counts, \
+        _worker_blob_reader.objects_served - objects_served, _worker_blob_reader.bytes_served - bytes_served
+
+
+class BlobParserPool:
+    """
+    Reads and parses blobs in worker processes, each with its own blob reader. The blobs submitted together are split
+    into tasks, so that every worker has several to take in turn.
+
+    Workers are spawned rather than forked, so that they do not hold the pipes of the git processes of the parent
+    open. As with any spawned process, scripts that use the pool must guard their entry point with
+    `if __name__ == '__main__'`.
+    """
+
+    TASKS_PER_WORKER = 4
+
+    MAX_BLOBS_PER_TASK = 500
+
+    def __init__(self, git_working_dir, jobs, max_blob_size=None):
+        """
+        :param jobs: the number of worker processes.
+        :param max_blob_size: the size in bytes of the largest blob read, or None to read blobs of any size.
+        """
+        self.jobs = jobs
+        self._executor = ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_start_worker, initargs=(git_working_dir, max_blob_size))
+
+        self._futures = list()
+
+        self.objects_served = 0
+        self.bytes_served = 0
+        self.scan_counts = collections.Counter()
+
+    def submit(self, blob_keys):
+        """
+        :param blob_keys: the (hexsha, comment pattern) of each blob.
+        :return: futures for the tasks the blobs were split into, to be passed to collect.
+        """
+        blob_keys = list(blob_keys)
+        if not blob_keys:
+            return list()
+
+        blobs_per_task = min(self.MAX_BLOBS_PER_TASK, math.ceil(len(blob_keys) / (self.jobs * self.TASKS_PER_WORKER)))
+
+        return [self._submit_task(blob_keys[start:start + blobs_per_task])
+                for start in range(0, len(blob_keys), blobs_per_task)]
+
+    def collect(self, futures):
+        """
+        Waits for tasks to finish, and counts the blobs they read and skipped. Each task should be collected once.
+
+        :return: the issues found in each blob as JSON, the SkippedBlob of blobs too large to read, or None for
+        blobs that are missing, keyed by (hexsha, comment pattern).
+        """
+        result = dict()
+        for future in futures:
+            issue_data, scan_counts, objects_served, bytes_served = future.result()
+            result.update(issue_data)
+            self.scan_counts.update(scan_counts)
+            self.objects_served += objects_served
+            self.bytes_served += bytes_served
+        return result
+
+    def _submit_task(self, blob_keys):
+        # Only the tasks still to finish are kept, for close to cancel.
+        self._futures = [future for future in self._futures if not future.done()]
+
+        future = self._executor.submit(_parse_blobs_in_worker, blob_keys)
+        self._futures.append(future)
+        return future
+
+    def close(self):
+        # Tasks not yet started are cancelled here, as shutdown only takes cancel_futures from Python 3.9.
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
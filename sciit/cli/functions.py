@@ -63,7 +63,10 @@ def make_status_summary_string(all_issues):
 def build_status_summary(issue_repository, revision=None):
 
     try:
-        all_issues = issue_repository.get_all_issues(revision)
+        if revision is None:
+            all_issues = issue_repository.get_issue_states()
+        else:
+            all_issues = issue_repository.get_all_issues(revision)
         return make_status_summary_string(all_issues)
 
     except RepoObjectDoesNotExistError as error:
@@ -137,7 +140,8 @@ def build_issue_history(issue_item, view=None):
 
     output += f'\nClosed:            {issue_item.closer} | {issue_item.closed_date}' if issue_item.closer else ''
     output += f'\nLast Change:       {issue_item.last_author} | {issue_item.last_authored_date_string}'
-    output += f'\nBegun:             {issue_item.initiator} | {issue_item.work_begun_date}' if issue_item.initiator else ''
+    output += f'\nBegun:             {issue_item.initiator} | {issue_item.work_begun_date}' \
+        if issue_item.initiator else ''
     output += f'\nCreated:           {issue_item.creator} | {issue_item.created_date_string}'
     output += f'\n'
     output += f'\nAssigned To:       {issue_item.assignees}' if issue_item.assignees else ''
@@ -12,6 +12,12 @@ def init(args):
             print(Styling.error_warning(error))
             return
 
+    if args.max_blob_size is not None:
+        args.repo.max_blob_size = args.max_blob_size * 1024 * 1024
+
+    if args.jobs is not None:
+        args.repo.jobs = args.jobs
+
     if not args.repo.is_init():
         args.repo.setup_file_system_resources()
         try:
@@ -29,6 +29,13 @@ from sciit.cli.tracker import tracker
 from sciit.cli.web import launch as launch_web_service
 
 
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'expected a number greater than 0, not {value}')
+    return number
+
+
 def add_revision_option(parser):
     parser.add_argument(
         'revision', action='store', type=str, nargs='?',
@@ -127,6 +134,12 @@ def create_command_parser(issue_repository):
         '-r', '--reset', action='store_true', help='resets the issue repo and rebuild from past commits')
     init_parser.add_argument(
         '-s', '--synchronize', action='store_true', help='synchronizes repository with remotes before initialisation')
+    init_parser.add_argument(
+        '-m', '--max-blob-size', action='store', type=positive_int, metavar='MEGABYTES',
+        help='skips files larger than this when reading issues from past commits, default: 10')
+    init_parser.add_argument(
+        '-j', '--jobs', action='store', type=positive_int, metavar='N',
+        help='reads issues from past commits in this many worker processes, default: 1')
 
     status_parser = subparsers.add_parser(
         name='status',
@@ -229,6 +242,9 @@ def main():
     except GitCommandError as gce:
         do_git_command_warning(gce.command)
 
+    if issue_repository is not None:
+        issue_repository.close()
+
     # Forces proper clean up of git repository resources on Windows.
     # See https://github.com/gitpython-developers/GitPython/issues/508
     if git_repository is not None:
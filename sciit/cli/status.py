@@ -6,16 +6,15 @@ from sciit.cli.functions import build_status_table, build_status_summary, page
 def status(args):
     revision = args.revision if args.revision else None
     issue_repository = args.repo
-    if args.normal:
-        issues = issue_repository.get_all_issues(revision)
-    elif args.all:
-        issues = issue_repository.get_all_issues(revision)
-    elif args.closed:
-        issues = issue_repository.get_closed_issues(revision)
-    else:
-        issues = issue_repository.get_open_issues(revision)
 
     if args.full:
+        # The current state of issues is recorded at each ingestion, so histories are only built for past revisions.
+        issues = issue_repository.get_issue_states() if revision is None else issue_repository.get_all_issues(revision)
+
+        if not (args.normal or args.all):
+            shown_status = 'Closed' if args.closed else 'Open'
+            issues = {issue_id: issue for issue_id, issue in issues.items() if issue.status[0] == shown_status}
+
         page(build_status_table(issue_repository, issues))
     else:
         page(build_status_summary(issue_repository, revision))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Indexes over the commit graph of a git repository, built from a single walk of the graph and extended as refs move.
+"""
+
+import json
+
+from git.cmd import Git
+from git.exc import GitCommandError
+
+
+__all__ = ('BranchMembershipIndex', 'CommitChildIndex')
+
+
+# The refs the recorded child index was last brought up to date with.
+CHILD_INDEX_REFS_SETTING = 'child_index_refs'
+
+
+def _set_bits(bitmap, positions):
+    for position in positions:
+        index = position >> 3
+        if index >= len(bitmap):
+            bitmap.extend(bytes(index + 1 - len(bitmap)))
+        bitmap[index] |= 1 << (position & 7)
+
+
+def _clear_bits(bitmap, positions):
+    for position in positions:
+        index = position >> 3
+        if index < len(bitmap):
+            bitmap[index] &= ~(1 << (position & 7)) & 0xFF
+
+
+def _bitmap_from_positions(positions):
+    bitmap = bytearray()
+    _set_bits(bitmap, positions)
+    return bitmap
+
+
+class BranchMembershipIndex:
+    """
+    Records which local branches contain each commit. Every commit seen is given a bit position, and each branch is
+    stored as a bitmap over those positions, long enough to hold them all, so that each bit is read without touching
+    the rest. The index is built from one topological walk over all branches and, when branch tips move, extended with
+    just the commits that entered or left each moved branch.
+    """
+
+    def __init__(self, working_dir):
+        self._git = Git(working_dir)
+
+        self._commit_positions = dict()
+        self._branch_tips = dict()
+        self._branch_bitmaps = dict()
+        self._branch_names = list()
+
+        self._refs_checked = False
+
+    def _position(self, hexsha):
+        position = self._commit_positions.get(hexsha, None)
+        if position is None:
+            position = len(self._commit_positions)
+            self._commit_positions[hexsha] = position
+        return position
+
+    def _read_branch_tips(self):
+        refs_str = self._git.execute(['git', 'for-each-ref', '--format=%(objectname) %(refname)', 'refs/heads/'])
+
+        branch_tips = dict()
+        for line in refs_str.splitlines():
+            tip, ref_name = line.split(' ', 1)
+            branch_tips[ref_name[len('refs/heads/'):]] = tip
+        return branch_tips
+
+    def _build(self, branch_tips):
+        branch_names = sorted(branch_tips)
+
+        branch_masks = dict()
+        for bit, branch_name in enumerate(branch_names):
+            tip = branch_tips[branch_name]
+            branch_masks[tip] = branch_masks.get(tip, 0) | 1 << bit
+
+        walk_str = \
+            self._git.execute(['git', 'rev-list', '--topo-order', '--parents'] + sorted(set(branch_tips.values())))
+
+        branch_positions = [list() for _ in branch_names]
+
+        # Topological order lists children before their parents, so a commit's mask is complete when it is reached.
+        for line in walk_str.splitlines():
+            hexshas = line.split()
+            mask = branch_masks.pop(hexshas[0], 0)
+            position = self._position(hexshas[0])
+
+            for parent_hexsha in hexshas[1:]:
+                branch_masks[parent_hexsha] = branch_masks.get(parent_hexsha, 0) | mask
+
+            bit = 0
+            while mask:
+                if mask & 1:
+                    branch_positions[bit].append(position)
+                mask >>= 1
+                bit += 1
+
+        self._branch_bitmaps = \
+            {branch_name: _bitmap_from_positions(branch_positions[bit]) for bit, branch_name in enumerate(branch_names)}
+
+    def _extend(self, branch_tips):
+        for branch_name in set(self._branch_bitmaps) - set(branch_tips):
+            del self._branch_bitmaps[branch_name]
+
+        for branch_name, tip in branch_tips.items():
+            old_tip = self._branch_tips.get(branch_name, None)
+
+            if old_tip == tip:
+                continue
+
+            bitmap = self._branch_bitmaps.get(branch_name, bytearray())
+            entered, left = None, list()
+
+            if old_tip is not None:
+                try:
+                    left_right_str = self._git.execute(['git', 'rev-list', '--left-right', old_tip + '...' + tip])
+                    entered = [line[1:] for line in left_right_str.splitlines() if line.startswith('>')]
+                    left = [line[1:] for line in left_right_str.splitlines() if line.startswith('<')]
+                except GitCommandError:
+                    pass
+
+            if entered is None:
+                # New branches, and branches whose old tip no longer exists, are walked in full.
+                entered = self._git.execute(['git', 'rev-list', tip]).split()
+                bitmap = bytearray()
+
+            _set_bits(bitmap, (self._position(hexsha) for hexsha in entered))
+            _clear_bits(bitmap, (self._position(hexsha) for hexsha in left))
+
+            self._branch_bitmaps[branch_name] = bitmap
+
+    def update(self):
+        """
+        Brings the index up to date with the current branch tips.
+        """
+        branch_tips = self._read_branch_tips()
+
+        if not self._branch_tips:
+            if branch_tips:
+                self._build(branch_tips)
+        elif branch_tips != self._branch_tips:
+            self._extend(branch_tips)
+
+        bitmap_size = (len(self._commit_positions) >> 3) + 1
+        for bitmap in self._branch_bitmaps.values():
+            if len(bitmap) < bitmap_size:
+                bitmap.extend(bytes(bitmap_size - len(bitmap)))
+
+        self._branch_tips = branch_tips
+        self._branch_names = sorted(branch_tips)
+        self._refs_checked = True
+
+    def invalidate(self):
+        """
+        Makes the next lookup check whether the branch tips have moved.
+        """
+        self._refs_checked = False
+
+    def branches_for_commit(self, hexsha):
+        if not self._refs_checked:
+            self.update()
+
+        position = self._commit_positions.get(hexsha, None)
+        if position is None:
+            return list()
+
+        index, mask = position >> 3, 1 << (position & 7)
+        return [branch_name for branch_name in self._branch_names if self._branch_bitmaps[branch_name][index] & mask]
+
+
+class CommitChildIndex:
+    """
+    Records the children of each commit reachable from any ref, as `git rev-list --all --children` lists them, in the
+    issue repository store. The index is built from one walk over all refs and, when refs move forward, extended with
+    just the commits they moved over. Refs that are deleted or rewritten make it rebuild.
+
+    `git rev-list --children` lists the children of a commit in the reverse of the order in which the walk reached
+    them, so each child is recorded with its position in the walk. Commits added by an extension are placed before
+    all commits already recorded, where a walk over all refs would usually reach them.
+    """
+
+    def __init__(self, working_dir, store):
+        self._git = Git(working_dir)
+        self._store = store
+
+        self._children = dict()
+        self._refs_checked = False
+
+    def _read_refs(self):
+        refs_str = self._git.execute(['git', 'for-each-ref', '--format=%(objectname) %(refname)'])
+
+        refs = dict()
+        for line in refs_str.splitlines():
+            tip, ref_name = line.split(' ', 1)
+            refs[ref_name] = tip
+
+        try:
+            refs['HEAD'] = self._git.execute(['git', 'rev-parse', '--verify', '-q', 'HEAD'])
+        except GitCommandError:
+            pass
+
+        return refs
+
+    def _is_ancestor(self, ancestor_hexsha, hexsha):
+        try:
+            self._git.execute(['git', 'merge-base', '--is-ancestor', ancestor_hexsha, hexsha])
+            return True
+        except GitCommandError:
+            return False
+
+    def _walk(self, rev_list_args):
+        walk_str = self._git.execute(['git', 'rev-list', '--parents'] + rev_list_args)
+        return [line.split() for line in walk_str.splitlines()]
+
+    @staticmethod
+    def _edges(walk, first_walk_position):
+        return [(parent_hexsha, hexshas[0], walk_position)
+                for walk_position, hexshas in enumerate(walk, first_walk_position)
+                for parent_hexsha in hexshas[1:]]
+
+    def _needs_rebuild(self, recorded_refs, refs):
+        if recorded_refs is None or set(recorded_refs) - set(refs):
+            return True
+
+        return any(not self._is_ancestor(recorded_refs[ref_name], tip) for ref_name, tip in refs.items()
+                   if ref_name in recorded_refs and recorded_refs[ref_name] != tip)
+
+    def update(self):
+        """
+        Brings the index up to date with the current refs.
+        """
+        refs = self._read_refs()
+        recorded_refs_str = self._store.read_setting(CHILD_INDEX_REFS_SETTING)
+        recorded_refs = json.loads(recorded_refs_str) if recorded_refs_str is not None else None
+
+        if refs != recorded_refs:
+            if self._needs_rebuild(recorded_refs, refs):
+                self._store.write_commit_child_rows(self._edges(self._walk(['--all']), 0), replace_all=True)
+            else:
+                new_tips = sorted({tip for ref_name, tip in refs.items() if recorded_refs.get(ref_name, None) != tip})
+                walk = self._walk(new_tips + ['--not'] + sorted(set(recorded_refs.values())))
+                first_walk_position = self._store.read_first_commit_child_walk_position() - len(walk)
+                self._store.write_commit_child_rows(self._edges(walk, first_walk_position))
+
+            self._store.write_setting(CHILD_INDEX_REFS_SETTING, json.dumps(refs, sort_keys=True))
+            self._store.flush()
+            self._children = dict()
+
+        self._refs_checked = True
+
+    def children(self, hexsha):
+        """
+        :return: the hexshas of the children of the commit, in the order `git rev-list --all --children` lists them.
+        """
+        if not self._refs_checked:
+            self.update()
+
+        if hexsha not in self._children:
+            self._children[hexsha] = self._store.read_child_commit_shas(hexsha)
+        return self._children[hexsha]
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Commit metadata recorded in the issue repository, and commits that are read from it rather than from git.
+"""
+
+from git import Actor, Commit
+from git.objects.util import from_timestamp, utctz_to_altz
+from gitdb.util import hex_to_bin
+
+
+__all__ = ('CommitMetadata', 'CommitMetadataCache')
+
+
+# Commits are read from git in groups of this size, to keep the command line short.
+MAX_COMMITS_PER_READ = 500
+
+_GIT_LOG_FORMAT = '%H%n%P%n%an%n%ae%n%ad%n%B'
+
+
+def make_commit_metadata_row(commit):
+    """
+    :return: the metadata of the commit as (commit_sha, parent_shas, author_name, author_email, authored_date,
+    author_tz_offset, summary).
+    """
+    return (
+        commit.hexsha,
+        ' '.join(parent.hexsha for parent in commit.parents),
+        commit.author.name,
+        commit.author.email,
+        commit.authored_date,
+        commit.author_tz_offset,
+        commit.summary)
+
+
+def read_commit_metadata_rows_from_git(git_repository, commit_hexshas):
+    rows = list()
+
+    for start in range(0, len(commit_hexshas), MAX_COMMITS_PER_READ):
+        log_str = git_repository.git.execute(
+            ['git', 'log', '--no-walk=unsorted', '-z', '--date=raw', '--format=' + _GIT_LOG_FORMAT] +
+            list(commit_hexshas[start:start + MAX_COMMITS_PER_READ]))
+
+        for record in log_str.split('\0'):
+            if not record:
+                continue
+            hexsha, parent_shas, author_name, author_email, raw_date, message = record.split('\n', 5)
+            authored_date, utc_offset = raw_date.split(' ')
+            rows.append((
+                hexsha, parent_shas, author_name, author_email, int(authored_date), utctz_to_altz(utc_offset),
+                message.split('\n', 1)[0]))
+
+    return rows
+
+
+class CommitMetadata:
+    """
+    Stands in for a GitPython commit, answering for its author, authored date, summary and parents from the metadata
+    recorded in the issue repository. Any other attribute is read from the commit itself, which is only loaded from
+    git on first such use.
+    """
+
+    def __init__(self, cache, commit_sha, parent_shas, author_name, author_email, authored_date, author_tz_offset,
+                 summary):
+        self.cache = cache
+        self._commit = None
+
+        self.repo = cache.git_repository
+        self.hexsha = commit_sha
+        self.parent_hexshas = parent_shas.split()
+        self.author = Actor(author_name, author_email)
+        self.authored_date = authored_date
+        self.author_tz_offset = author_tz_offset
+        self.summary = summary
+        self._authored_datetime = None
+
+    @property
+    def authored_datetime(self):
+        # Each snapshot of the commit asks for it when issue histories are built.
+        if self._authored_datetime is None:
+            self._authored_datetime = from_timestamp(self.authored_date, self.author_tz_offset)
+        return self._authored_datetime
+
+    @property
+    def parents(self):
+        return self.cache.commits(self.parent_hexshas)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._commit is None:
+            self._commit = Commit(self.repo, hex_to_bin(self.hexsha))
+        return getattr(self._commit, name)
+
+    def __eq__(self, other):
+        return self.hexsha == getattr(other, 'hexsha', None)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.hexsha)
+
+    def __str__(self):
+        return self.hexsha
+
+    def __repr__(self):
+        return f'<CommitMetadata "{self.hexsha}">'
+
+
+class CommitMetadataCache:
+    """
+    Serves commits for an issue repository from the metadata recorded in its store. Metadata missing from the store
+    is read from git in bulk and recorded. Children of commits are looked up in the child index, when one is given.
+    """
+
+    def __init__(self, git_repository, store, child_index=None):
+        self.git_repository = git_repository
+        self.store = store
+        self.child_index = child_index
+        self._commits = dict()
+
+    def commits(self, commit_hexshas):
+        missing_hexshas = [hexsha for hexsha in dict.fromkeys(commit_hexshas) if hexsha not in self._commits]
+
+        if missing_hexshas:
+            rows = self.store.read_commit_metadata_rows(missing_hexshas)
+
+            unrecorded_hexshas = [hexsha for hexsha in missing_hexshas if hexsha not in rows]
+            if unrecorded_hexshas:
+                git_rows = read_commit_metadata_rows_from_git(self.git_repository, unrecorded_hexshas)
+                self.store.write_commit_metadata_rows(git_rows)
+                self.store.flush()
+                rows.update((row[0], row) for row in git_rows)
+
+            for hexsha, row in rows.items():
+                self._commits[hexsha] = CommitMetadata(self, *row)
+
+        return [self._commits[hexsha] for hexsha in commit_hexshas if hexsha in self._commits]
+
+    def child_commits(self, commit_hexsha):
+        """
+        :return: the children of the commit, in the order `git rev-list --all --children` lists them, or None if there
+        is no child index to look them up in.
+        """
+        if self.child_index is None:
+            return None
+        return self.commits(self.child_index.children(commit_hexsha))
+
+    def commit(self, commit_hexsha):
+        commits = self.commits([commit_hexsha])
+        return commits[0] if commits else None
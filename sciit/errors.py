@@ -19,3 +19,15 @@ class RepoObjectExistsError(FileExistsError):
 class RepoObjectDoesNotExistError(FileNotFoundError):
     def __init__(self, filename):
         super().__init__('The repository object [%s] does not exist.' % filename)
+
+
+class SnapshotStorageError(ValueError):
+    def __init__(self, stored_storage, requested_storage):
+        super().__init__(
+            'The issue repository stores snapshots as [%s], not [%s]. Reset the repository to change this.'
+            % (stored_storage, requested_storage))
+
+
+class CommentSyntaxConfigError(ValueError):
+    def __init__(self, file_path, line_number, message):
+        super().__init__('%s, line %d: %s' % (file_path, line_number, message))
@@ -4,7 +4,12 @@ Functions for interfacing with repository objects on the file system.
 """
 
 import os
-import pathspec
+
+from git import Blob
+
+from sciit.errors import CommentSyntaxConfigError
+from sciit.path_filter import PathFilter
+from sciit.regex import CommentSyntaxRegistry, COMMENT_PATTERNS_BY_SYNTAX_NAME
 
 
 def write_last_issue_commit_sha(issue_dir, sha):
@@ -19,11 +24,54 @@ def get_last_issue_commit_sha(issue_dir):
         return last_issue_commit_file.read()
 
 
-def get_sciit_ignore_path_spec(repo):
-    sciit_ignore_file_path = repo.working_dir + '/.sciitignore'
-    if os.path.exists(sciit_ignore_file_path):
-        with open(sciit_ignore_file_path, 'r') as file_handle:
-            file_data = file_handle.read().splitlines()
-            return pathspec.PathSpec.from_lines('gitignore', file_data)
+def _read_lines_if_exists(file_path):
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as file_handle:
+            return file_handle.read().splitlines()
     else:
         return None
+
+
+def get_sciit_path_filter(repo):
+    """
+    The paths issues are read from: those matched by the .sciitinclude file of the repository, if there is one, and
+    not matched by its .sciitignore file.
+    """
+    return PathFilter(
+        _read_lines_if_exists(repo.working_dir + '/.sciitignore'),
+        _read_lines_if_exists(repo.working_dir + '/.sciitinclude'))
+
+
+def get_comment_syntax_registry(repo):
+    """
+    Registers the comment syntax of file extensions and names listed in the .sciitsyntax file of the repository, one
+    per line, as in `.ts = c-style` or `Jenkinsfile = slash-lines`. Entries starting with a dot are extensions.
+    """
+    # Files whose mime type cannot be guessed are read as plain text, as GitPython gives their blobs.
+    comment_syntax = CommentSyntaxRegistry(default_mime_type=Blob.DEFAULT_MIME_TYPE)
+
+    comment_syntax_file_path = repo.working_dir + '/.sciitsyntax'
+    if not os.path.exists(comment_syntax_file_path):
+        return comment_syntax
+
+    with open(comment_syntax_file_path, 'r') as file_handle:
+        for line_number, line in enumerate(file_handle.read().splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            name, separator, syntax_name = (part.strip() for part in line.partition('='))
+            if not separator or not name:
+                raise CommentSyntaxConfigError(
+                    comment_syntax_file_path, line_number, 'expected a file extension or name, = and a syntax')
+            if syntax_name not in COMMENT_PATTERNS_BY_SYNTAX_NAME:
+                raise CommentSyntaxConfigError(
+                    comment_syntax_file_path, line_number,
+                    f'unknown syntax [{syntax_name}], expected one of {", ".join(COMMENT_PATTERNS_BY_SYNTAX_NAME)}')
+
+            if name.startswith('.'):
+                comment_syntax.register_extension(name, COMMENT_PATTERNS_BY_SYNTAX_NAME[syntax_name])
+            else:
+                comment_syntax.register_file_name(name, COMMENT_PATTERNS_BY_SYNTAX_NAME[syntax_name])
+
+    return comment_syntax
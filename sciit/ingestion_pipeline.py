@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Ingesting commits in stages that each run in a thread of their own: listing the commits, finding the blobs each
+changes, fetching those blobs from git, parsing them for issues and recording the snapshots of each commit.
+"""
+
+import threading
+
+from sciit.pipeline import Pipeline
+from sciit.read_blob import SkippedBlob
+from sciit.read_commit import find_blobs_for_scanning_in_commit, find_issue_snapshots_in_blobs, read_blob_contents
+
+
+__all__ = ('IngestionPipeline', )
+
+
+class _CommitIngestion:
+    """
+    What the stages of the pipeline have found out about a commit so far.
+    """
+
+    __slots__ = ('commit', 'blobs_for_scanning', 'files_changed_in_commit', 'in_branches', 'parsed_issue_data',
+                 'blob_keys_fetched', 'blob_keys_parsed_in_run', 'contents_by_hexsha', 'issue_snapshots')
+
+    def __init__(self, commit):
+        self.commit = commit
+        self.blobs_for_scanning = None
+        self.files_changed_in_commit = None
+        self.in_branches = None
+        self.parsed_issue_data = None
+        self.blob_keys_fetched = None
+        self.blob_keys_parsed_in_run = None
+        self.contents_by_hexsha = None
+        self.issue_snapshots = None
+
+
+class IngestionPipeline:
+    """
+    Reads the issue snapshots in the paths changed by a sequence of commits, and gives them to a function that records
+    them, commit by commit in order, on the thread that runs the pipeline.
+
+    The blob reader is only used by the fetch stage and the parsed blob store only by the parse stage, which records
+    the issues found in each blob parsed. The fetch stage looks up the blobs parsed before through a store of its own,
+    which only sees what the parse stage has committed, so it keeps the blobs it has sent on to be parsed until then.
+    Blobs are counted as they would be if each commit were ingested in turn.
+    """
+
+    QUEUE_SIZE = 32
+
+    # How many commits the parse stage takes between commits of the issues it has found in blobs.
+    COMMITS_PER_PARSED_BLOB_FLUSH = 100
+
+    def __init__(self, commits, write_issue_snapshots, changed_paths_stream, blob_reader, parsed_blob_store,
+                 lookup_blob_store, scan_counts, git_working_dir=None, branch_index=None, comment_syntax=None,
+                 path_filter=None, queue_size=None):
+        """
+        :param write_issue_snapshots: a function given each commit, the issue snapshots in the paths it changed, those
+        paths and the branches the commit is in.
+        :param lookup_blob_store: a ParsedBlobStore over the same database as parsed_blob_store, with a connection of
+        its own.
+        """
+        self._write_issue_snapshots = write_issue_snapshots
+        self._changed_paths_stream = changed_paths_stream
+        self._blob_reader = blob_reader
+        self._parsed_blob_store = parsed_blob_store
+        self._lookup_blob_store = lookup_blob_store
+        self._scan_counts = scan_counts
+        self._git_working_dir = git_working_dir
+        self._branch_index = branch_index
+        self._comment_syntax = comment_syntax
+        self._path_filter = path_filter
+
+        self._pending_blob_keys = set()
+        self._pending_blob_keys_lock = threading.Lock()
+        self._blob_keys_written = list()
+        self._blob_keys_too_large = set()
+        self._commits_parsed_since_flush = 0
+
+        self._pipeline = Pipeline(
+            ('commits', (_CommitIngestion(commit) for commit in commits)),
+            [('paths', self._find_changed_blobs), ('fetch', self._fetch_blobs), ('parse', self._parse_blobs)],
+            ('write', self._write),
+            queue_size or self.QUEUE_SIZE)
+
+    @property
+    def stats(self):
+        """
+        The StageStats of each stage, in order.
+        """
+        return self._pipeline.stats
+
+    def run(self):
+        self._pipeline.run()
+
+    def _find_changed_blobs(self, ingestion):
+        ingestion.blobs_for_scanning, ingestion.files_changed_in_commit, ingestion.in_branches = \
+            find_blobs_for_scanning_in_commit(
+                ingestion.commit,
+                git_working_dir=self._git_working_dir,
+                changed_paths_stream=self._changed_paths_stream,
+                branch_index=self._branch_index,
+                comment_syntax=self._comment_syntax,
+                path_filter=self._path_filter)
+        return ingestion
+
+    def _fetch_blobs(self, ingestion):
+        blob_keys = list(dict.fromkeys(
+            (blob.hexsha, comment_pattern) for _, blob, comment_pattern in ingestion.blobs_for_scanning))
+
+        # Blobs that stop being pending have been committed to the store before, so are found there instead.
+        with self._pending_blob_keys_lock:
+            ingestion.blob_keys_parsed_in_run = \
+                {blob_key for blob_key in blob_keys if blob_key in self._pending_blob_keys}
+
+        lookup_blob_keys = [blob_key for blob_key in blob_keys if blob_key not in ingestion.blob_keys_parsed_in_run]
+        ingestion.parsed_issue_data = \
+            self._lookup_blob_store.read_issue_data(lookup_blob_keys) if lookup_blob_keys else dict()
+
+        ingestion.blob_keys_fetched = \
+            [blob_key for blob_key in lookup_blob_keys if blob_key not in ingestion.parsed_issue_data]
+        with self._pending_blob_keys_lock:
+            self._pending_blob_keys.update(ingestion.blob_keys_fetched)
+
+        ingestion.contents_by_hexsha = read_blob_contents(self._blob_reader, ingestion.blob_keys_fetched) \
+            if ingestion.blob_keys_fetched else dict()
+        return ingestion
+
+    def _parse_blobs(self, ingestion):
+        if ingestion.blob_keys_parsed_in_run:
+            parsed_in_run = self._parsed_blob_store.read_issue_data(ingestion.blob_keys_parsed_in_run)
+            ingestion.parsed_issue_data.update(parsed_in_run)
+
+            # The issues in blobs too large to read are not recorded, so each time they are found they are counted.
+            # Missing blobs are not.
+            self._scan_counts['blobs_too_large'] += sum(
+                1 for _, blob, comment_pattern in ingestion.blobs_for_scanning
+                if (blob.hexsha, comment_pattern) in ingestion.blob_keys_parsed_in_run and
+                (blob.hexsha, comment_pattern) not in parsed_in_run and
+                (blob.hexsha, comment_pattern) in self._blob_keys_too_large)
+
+        ingestion.issue_snapshots = find_issue_snapshots_in_blobs(
+            ingestion.commit,
+            ingestion.blobs_for_scanning,
+            ingestion.in_branches,
+            contents_by_hexsha=ingestion.contents_by_hexsha,
+            parsed_issue_data=ingestion.parsed_issue_data,
+            scan_counts=self._scan_counts,
+            parsed_blob_store=self._parsed_blob_store)
+
+        blob_keys_not_written = \
+            [blob_key for blob_key in ingestion.blob_keys_fetched if blob_key not in ingestion.parsed_issue_data]
+        if blob_keys_not_written:
+            # They are read again when next found.
+            with self._pending_blob_keys_lock:
+                self._pending_blob_keys.difference_update(blob_keys_not_written)
+
+            self._blob_keys_too_large.update(
+                (hexsha, comment_pattern) for hexsha, comment_pattern in blob_keys_not_written
+                if isinstance(ingestion.contents_by_hexsha.get(hexsha, None), SkippedBlob) and
+                ingestion.contents_by_hexsha[hexsha].reason == SkippedBlob.TOO_LARGE)
+
+        self._blob_keys_written.extend(
+            blob_key for blob_key in ingestion.blob_keys_fetched if blob_key in ingestion.parsed_issue_data)
+
+        self._commits_parsed_since_flush += 1
+        if self._commits_parsed_since_flush >= self.COMMITS_PER_PARSED_BLOB_FLUSH:
+            self._parsed_blob_store.flush()
+            with self._pending_blob_keys_lock:
+                self._pending_blob_keys.difference_update(self._blob_keys_written)
+            self._blob_keys_written = list()
+            self._commits_parsed_since_flush = 0
+
+        ingestion.contents_by_hexsha = None
+        ingestion.parsed_issue_data = None
+        return ingestion
+
+    def _write(self, ingestion):
+        self._write_issue_snapshots(
+            ingestion.commit, ingestion.issue_snapshots, ingestion.files_changed_in_commit, ingestion.in_branches)
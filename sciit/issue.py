@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import bisect
+import collections
 import hashlib
 import os
 import re
@@ -9,8 +11,10 @@ import markdown2
 from git import Commit
 from gitdb.util import hex_to_bin
 
+from sciit.commit_metadata import CommitMetadata
 
-__all__ = ('IssueSnapshot', 'Issue')
+
+__all__ = ('IssueSnapshot', 'Issue', 'IssueState')
 
 
 TIME_FORMAT = '%a %b %d %H:%M:%S %Y %z'
@@ -33,6 +37,24 @@ def _make_revision_dictionary(commit, changes=None):
     return result
 
 
+def _memoised_property(compute):
+    """
+    Makes a property of an Issue whose value is computed once and kept until the issue history changes.
+    """
+    name = compute.__name__
+
+    def get(self):
+        try:
+            return self._derived_values[name]
+        except KeyError:
+            self.derivation_counts[name] += 1
+            value = self._derived_values[name] = compute(self)
+            return value
+
+    get.__doc__ = compute.__doc__
+    return property(get)
+
+
 class IssueSnapshot:
     """
     Represents the state of an issue within a commit.
@@ -40,15 +62,14 @@ class IssueSnapshot:
 
     __slots__ = ('commit', 'data', 'in_branches',
                  'title', 'description', 'assignees', 'due_date', 'labels', 'weight', 'priority', 'title', 'file_path',
-                 'start_position', 'end_position', 'issue_id', 'blockers')
-
-    _children = dict()
+                 'start_position', 'end_position', 'issue_id', 'blockers', '_child_commits')
 
     def __init__(self, commit, data, in_branches):
 
         self.commit = commit
         self.data = data
         self.in_branches = in_branches
+        self._child_commits = None
 
         if 'issue_id' in self.data:
             self.issue_id = self.data['issue_id']
@@ -110,19 +131,25 @@ class IssueSnapshot:
 
     @property
     def child_commits(self):
-        if self.commit.hexsha not in IssueSnapshot._children:
-
-            children = list()
+        if isinstance(self.commit, CommitMetadata):
+            children = self.commit.cache.child_commits(self.commit.hexsha)
+            if children is not None:
+                return children
 
-            child_shas = self._find_child_shas()
+        # Without a child index, the children are found by walking all refs, which is only done once per snapshot.
+        if self._child_commits is None:
+            self._child_commits = self._find_child_commits()
+        return self._child_commits
 
-            if len(child_shas) > 0 and child_shas[0] != '':
-                for child in child_shas:
-                    children.append(Commit(self.commit.repo, hex_to_bin(child)))
+    def _find_child_commits(self):
+        child_shas = self._find_child_shas()
 
-            IssueSnapshot._children[self.commit.hexsha] = children
+        if len(child_shas) > 0 and child_shas[0] != '':
+            if isinstance(self.commit, CommitMetadata):
+                return self.commit.cache.commits(child_shas)
+            return [Commit(self.commit.repo, hex_to_bin(child)) for child in child_shas]
 
-        return IssueSnapshot._children[self.commit.hexsha]
+        return list()
 
     @property
     def author_name(self):
@@ -149,6 +176,22 @@ class Issue:
         self.head_commits = head_commits
 
         self.issue_snapshots = list()
+        self._issue_snapshot_dates = list()
+
+        # Set for all issues at once by classify_issue_statuses, and cleared when the history changes.
+        self.classified_status = None
+
+        # Values derived from the history, and how many times each has been computed.
+        self._derived_values = dict()
+        self.derivation_counts = collections.Counter()
+
+    def clear_derived_values(self):
+        """
+        Discards the values derived from the history, so that they are computed again when next read. Adding snapshots
+        does this; anything else that changes the history or the head commits of the issue must too.
+        """
+        self._derived_values.clear()
+        self.classified_status = None
 
     @property
     def newest_issue_snapshot(self):
@@ -232,7 +275,7 @@ class Issue:
     def end_position(self):
         return self.newest_value_of_issue_property('end_position')
 
-    @property
+    @_memoised_property
     def file_paths(self):
         result = dict()
         for issue_snapshot in self.issue_snapshots:
@@ -258,6 +301,15 @@ class Issue:
 
     @property
     def status(self):
+        if self.classified_status is not None:
+            return self.classified_status
+        return self._status
+
+    @_memoised_property
+    def _status(self):
+        return self.classify_status()
+
+    def classify_status(self):
         """
         Issue status life cycle based on a github workflow.
 
@@ -305,7 +357,7 @@ class Issue:
         else:
             return self.closing_commit.authored_datetime - self.in_progress_commit.authored_datetime
 
-    @property
+    @_memoised_property
     def in_progress_commit(self):
         return self.issue_snapshots[0].child_commits[0] if len(self.issue_snapshots[0].child_commits) > 0 else None
 
@@ -317,7 +369,7 @@ class Issue:
     def initiator(self):
         return self.in_progress_commit.author.name if self.in_progress_commit else None
 
-    @property
+    @_memoised_property
     def closing_commit(self):
 
         def _child_of_last_commit_in_branch(branch_name):
@@ -446,7 +498,7 @@ class Issue:
         else:
             return None
 
-    @property
+    @_memoised_property
     def activity(self):
         result = list()
 
@@ -458,7 +510,7 @@ class Issue:
 
         return result
 
-    @property
+    @_memoised_property
     def revisions(self):
 
         result = list()
@@ -488,38 +540,53 @@ class Issue:
 
     @property
     def in_branches(self):
+        return set(self._in_branches)
+
+    @_memoised_property
+    def _in_branches(self):
         result = set()
         for issue_snapshot in self.issue_snapshots:
             result.update(issue_snapshot.in_branches)
-        return result
+        return frozenset(result)
 
-    @property
+    @_memoised_property
     def issue_snapshot_commit_hexshas(self):
         return [issue_snapshot.commit.hexsha for issue_snapshot in self.issue_snapshots]
 
     @property
     def open_in_branches(self):
-        return {name for name, commit_hexsha in self.head_commits.items()
-                if commit_hexsha in self.issue_snapshot_commit_hexshas}
+        return set(self._open_in_branches)
+
+    @_memoised_property
+    def _open_in_branches(self):
+        issue_snapshot_commit_hexshas = set(self.issue_snapshot_commit_hexshas)
+        return frozenset(name for name, commit_hexsha in self.head_commits.items()
+                         if commit_hexsha in issue_snapshot_commit_hexshas)
 
     @property
     def closed_in_branches(self):
         return self.in_branches - self.open_in_branches
 
     @property
-    def blockers(self):
-
-        result = dict()
-
+    def blocker_ids(self):
         latest_blockers_str = self.newest_value_of_issue_property('blockers')
+        if latest_blockers_str is None:
+            return []
+        else:
+            return [s.strip() for s in latest_blockers_str.split(',')]
 
-        if latest_blockers_str is not None:
-            blocker_issue_ids = [s.strip() for s in latest_blockers_str.split(',')]
-
-            for blocker_issue_id in blocker_issue_ids:
-                result[blocker_issue_id] = self.issue_repo.get_issue(blocker_issue_id)
+    @property
+    def blockers(self):
+        """
+        :return: the current state of each blocker of the issue, or None for blockers that do not exist, keyed by
+        issue id. The states are all read together in the dependency graph of the issue repository.
+        """
+        blocker_issue_ids = self.blocker_ids
+        if not blocker_issue_ids:
+            return dict()
 
-        return result
+        issue_states = self.issue_repo.dependency_graph.issue_states
+        return {blocker_issue_id: issue_states.get(blocker_issue_id, None) for blocker_issue_id in blocker_issue_ids}
 
     def __str__(self):
         return self.issue_id + " " + self.status[0]
@@ -529,7 +596,72 @@ class Issue:
 
     def add_snapshot(self, issue_snapshot):
         """
-        Update the content of the issue history, based on newly discovered, *older* information.
+        Update the content of the issue history, based on newly discovered, *older* information. The snapshot is
+        placed after any snapshots with the same date, so the history stays ordered by date without being re-sorted.
+        """
+        date = issue_snapshot.date
+        position = bisect.bisect_right(self._issue_snapshot_dates, date)
+        self._issue_snapshot_dates.insert(position, date)
+        self.issue_snapshots.insert(position, issue_snapshot)
+        self.clear_derived_values()
+
+    def add_snapshots(self, issue_snapshots):
+        """
+        Update the content of the issue history with many snapshots at once, ordering them as adding each in turn
+        would. Snapshots given in date order are added in linear time.
+        """
+        issue_snapshots = list(issue_snapshots)
+        dates = self._issue_snapshot_dates + [issue_snapshot.date for issue_snapshot in issue_snapshots]
+        issue_snapshots = self.issue_snapshots + issue_snapshots
+
+        order = sorted(range(len(issue_snapshots)), key=dates.__getitem__)
+
+        self.issue_snapshots = [issue_snapshots[index] for index in order]
+        self._issue_snapshot_dates = [dates[index] for index in order]
+        self.clear_derived_values()
+
+
+class IssueState:
+    """
+    Represents the current state of an issue, as recorded in the issue repository at the end of each ingestion.
+    """
+
+    def __init__(self, issue_id, title, status, sub_status, labels, last_author, last_authored_date_string, file_path,
+                 open_in_branches, closed_in_branches, blockers):
+
+        self.issue_id = issue_id
+        self.title = title
+        self.status = (status, sub_status)
+        self.labels = labels.split(',') if labels else list()
+        self.last_author = last_author
+        self.last_authored_date_string = last_authored_date_string
+        self.file_path = file_path
+        self.open_in_branches = set(open_in_branches.split(',')) if open_in_branches else set()
+        self.closed_in_branches = set(closed_in_branches.split(',')) if closed_in_branches else set()
+        self.blockers = blockers.split(',') if blockers else list()
+
+    @staticmethod
+    def make_row(issue):
+        """
+        :return: the current state of the issue as (issue_id, title, status, sub_status, labels, last_author,
+        last_authored_date_string, file_path, open_in_branches, closed_in_branches, blockers).
         """
-        self.issue_snapshots.append(issue_snapshot)
-        self.issue_snapshots.sort(key=lambda issue_snapshot_in_list: issue_snapshot_in_list.date)
+        status, sub_status = issue.status
+        return (
+            issue.issue_id,
+            issue.title,
+            status,
+            sub_status,
+            ','.join(issue.labels),
+            issue.last_author,
+            issue.last_authored_date_string,
+            issue.file_path,
+            ','.join(sorted(issue.open_in_branches)),
+            ','.join(sorted(issue.closed_in_branches)),
+            ','.join(issue.blocker_ids))
+
+    def __str__(self):
+        return self.issue_id + " " + self.status[0]
+
+    def __repr__(self):
+        return "IssueState " + self.issue_id + " (" + self.status[0] + ")"
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+The graph of blocking relationships between issues, built from the current state of every issue.
+"""
+
+import collections
+
+
+__all__ = ('IssueDependencyGraph', )
+
+
+class IssueDependencyGraph:
+    """
+    Records which issues block which, as declared by the @blockers property of the current state of each issue.
+    References to issues that do not exist are kept as edges, but have no state.
+    """
+
+    def __init__(self, issue_states):
+        """
+        :param issue_states: the current state of each issue, keyed by issue id.
+        """
+        self.issue_states = issue_states
+
+        self._blockers = {issue_id: list(issue_state.blockers) for issue_id, issue_state in issue_states.items()}
+
+        self._blocks = dict()
+        for issue_id, blocker_issue_ids in self._blockers.items():
+            for blocker_issue_id in blocker_issue_ids:
+                self._blocks.setdefault(blocker_issue_id, list()).append(issue_id)
+
+    def blockers(self, issue_id):
+        """
+        :return: the ids of the issues that the issue declares as its blockers, in the order declared.
+        """
+        return list(self._blockers.get(issue_id, list()))
+
+    def blocks(self, issue_id):
+        """
+        :return: the ids of the issues that declare the issue as one of their blockers.
+        """
+        return list(self._blocks.get(issue_id, list()))
+
+    def transitive_blockers(self, issue_id):
+        """
+        :return: the ids of the issues that block the issue, directly or through other blockers, nearest first.
+        """
+        result = list()
+        seen = {issue_id}
+        pending = collections.deque(self._blockers.get(issue_id, list()))
+
+        while pending:
+            blocker_issue_id = pending.popleft()
+            if blocker_issue_id not in seen:
+                seen.add(blocker_issue_id)
+                result.append(blocker_issue_id)
+                pending.extend(self._blockers.get(blocker_issue_id, list()))
+
+        return result
+
+    def cycles(self):
+        """
+        :return: each group of issues that block one another, directly or indirectly, as a sorted list of issue ids.
+        """
+        # Tarjan's strongly connected components, iteratively, so that long chains of blockers cannot exhaust the stack.
+        index_of, low_link = dict(), dict()
+        stack, on_stack = list(), set()
+        result = list()
+
+        for root_issue_id in sorted(self._blockers):
+            if root_issue_id in index_of:
+                continue
+
+            work = [(root_issue_id, iter(self._blockers.get(root_issue_id, list())))]
+            index_of[root_issue_id] = low_link[root_issue_id] = len(index_of)
+            stack.append(root_issue_id)
+            on_stack.add(root_issue_id)
+
+            while work:
+                issue_id, blocker_issue_ids = work[-1]
+
+                for blocker_issue_id in blocker_issue_ids:
+                    if blocker_issue_id not in index_of:
+                        index_of[blocker_issue_id] = low_link[blocker_issue_id] = len(index_of)
+                        stack.append(blocker_issue_id)
+                        on_stack.add(blocker_issue_id)
+                        work.append((blocker_issue_id, iter(self._blockers.get(blocker_issue_id, list()))))
+                        break
+                    elif blocker_issue_id in on_stack:
+                        low_link[issue_id] = min(low_link[issue_id], index_of[blocker_issue_id])
+                else:
+                    work.pop()
+                    if work:
+                        parent_issue_id = work[-1][0]
+                        low_link[parent_issue_id] = min(low_link[parent_issue_id], low_link[issue_id])
+
+                    if low_link[issue_id] == index_of[issue_id]:
+                        component = list()
+                        while True:
+                            member_issue_id = stack.pop()
+                            on_stack.remove(member_issue_id)
+                            component.append(member_issue_id)
+                            if member_issue_id == issue_id:
+                                break
+
+                        if len(component) > 1 or issue_id in self._blockers.get(issue_id, list()):
+                            result.append(sorted(component))
+
+        return sorted(result)
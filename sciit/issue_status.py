@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Classification of the status of many issues at once.
+"""
+
+
+__all__ = ('classify_issue_statuses', )
+
+
+def classify_issue_statuses(issues, head_commits):
+    """
+    Classifies the status of each of the issues as Issue.classify_status would. Every branch is given a bit position,
+    so that the branches an issue is in, open in and closed in are bitsets, built in a single pass over the snapshots
+    of all issues, and each classification is a handful of bitwise tests.
+
+    :param issues: the issues to classify.
+    :param head_commits: the head commit hexsha of each branch, keyed by branch name.
+    :return: the (status, sub-status) of each issue, keyed by issue id.
+    """
+    branch_bits = dict()
+
+    def branch_bit(branch_name):
+        bit = branch_bits.get(branch_name, None)
+        if bit is None:
+            bit = 1 << len(branch_bits)
+            branch_bits[branch_name] = bit
+        return bit
+
+    master_bit = branch_bit('master')
+
+    head_masks = dict()
+    for head_name, commit_hexsha in head_commits.items():
+        head_masks[commit_hexsha] = head_masks.get(commit_hexsha, 0) | branch_bit(head_name)
+
+    # Snapshots of unchanged issues share their list of branches, so each distinct list is converted once.
+    snapshot_masks = dict()
+
+    result = dict()
+
+    for issue in issues:
+        feature_branch = issue.issue_id
+
+        in_mask = 0
+        open_mask = 0
+        accepted_date = None
+        latest_date_in_feature_branch = None
+
+        for issue_snapshot in issue.issue_snapshots:
+            in_branches = tuple(issue_snapshot.in_branches)
+
+            snapshot_mask = snapshot_masks.get(in_branches, None)
+            if snapshot_mask is None:
+                snapshot_mask = 0
+                for branch_name in in_branches:
+                    snapshot_mask |= branch_bit(branch_name)
+                snapshot_masks[in_branches] = snapshot_mask
+
+            in_mask |= snapshot_mask
+            open_mask |= head_masks.get(issue_snapshot.commit.hexsha, 0)
+
+            if accepted_date is None and snapshot_mask & master_bit:
+                accepted_date = issue_snapshot.date
+            if feature_branch in in_branches:
+                latest_date_in_feature_branch = issue_snapshot.date
+
+        closed_mask = in_mask & ~open_mask
+        feature_bit = branch_bits.get(feature_branch, 0)
+
+        if open_mask & feature_bit and not in_mask & master_bit:
+            status = 'Open', 'Proposed'
+
+        elif open_mask & master_bit:
+            if open_mask & feature_bit and \
+                    None not in {accepted_date, latest_date_in_feature_branch} and \
+                    accepted_date < latest_date_in_feature_branch:
+                status = 'Open', 'In Progress'
+            elif closed_mask & feature_bit:
+                status = 'Open', 'In Review'
+            else:
+                status = 'Open', 'Accepted'
+
+        elif closed_mask & feature_bit and not in_mask & master_bit:
+            status = 'Closed', 'Rejected'
+        elif closed_mask & master_bit:
+            status = 'Closed', 'Resolved'
+        elif not open_mask:
+            status = 'Closed', 'Unknown'
+        else:
+            status = 'Open', 'Non-Feature'
+
+        result[issue.issue_id] = status
+
+    return result
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Deciding which paths issues are read from, as configured by the .sciitignore and .sciitinclude files of a repository.
+"""
+
+import posixpath
+import re
+
+import pathspec
+
+
+__all__ = ('PathFilter', )
+
+
+# Ignore patterns that name a file or directory outright, which git can be asked to leave out of the paths it lists.
+_PLAIN_PATTERN_RE = re.compile(r'/?[\w.-]+(?:/[\w.-]+)*/?')
+
+
+class PathFilter:
+    """
+    Reads issues only from paths that match one of the include patterns, if there are any, and that are not ignored.
+    Both are lists of gitignore patterns.
+
+    When none of the ignore patterns is negated, an ignored directory ignores everything beneath it, as it does for git.
+    Directories are then matched once each, and the paths in ignored directories are not matched at all.
+    """
+
+    def __init__(self, ignore_lines=None, include_lines=None):
+        self._ignore_lines = list(ignore_lines or list())
+        self._ignore_spec = \
+            pathspec.PathSpec.from_lines('gitignore', self._ignore_lines) if self._ignore_lines else None
+
+        include_lines = list(include_lines or list())
+        self._include_spec = pathspec.PathSpec.from_lines('gitignore', include_lines) if include_lines else None
+
+        self._directories_can_be_ignored = \
+            self._ignore_spec is not None and not any(line.startswith('!') for line in self._ignore_lines)
+
+        self._ignored_directories = dict()
+        self._included_paths = dict()
+
+    def is_directory_ignored(self, directory):
+        """
+        :param directory: the path of a directory, without a trailing slash, or '' for the root of the repository.
+        :return: whether the directory, and so everything beneath it, is ignored.
+        """
+        if not directory or not self._directories_can_be_ignored:
+            return False
+
+        ignored = self._ignored_directories.get(directory)
+        if ignored is None:
+            ignored = \
+                self.is_directory_ignored(posixpath.dirname(directory)) or \
+                self._ignore_spec.match_file(directory + '/')
+            self._ignored_directories[directory] = ignored
+        return ignored
+
+    def includes(self, path):
+        """
+        :return: whether issues are read from the file at the path. The answer for each path is kept, as the same
+        paths change in many commits.
+        """
+        included = self._included_paths.get(path)
+        if included is None:
+            included = \
+                not self.is_directory_ignored(posixpath.dirname(path)) and \
+                (self._ignore_spec is None or not self._ignore_spec.match_file(path)) and \
+                (self._include_spec is None or self._include_spec.match_file(path))
+            self._included_paths[path] = included
+        return included
+
+    def filter_paths(self, paths):
+        return {path for path in paths if self.includes(path)}
+
+    def git_exclude_pathspecs(self):
+        """
+        :return: git pathspecs that leave out the files and directories named outright by the ignore patterns, so
+        that git does not list the changes in them at all. Only patterns that git reads the same way are given.
+        """
+        if not self._directories_can_be_ignored:
+            return list()
+
+        result = list()
+        for line in self._ignore_lines:
+            line = line.rstrip()
+            if _PLAIN_PATTERN_RE.fullmatch(line) is None:
+                continue
+
+            name = line.strip('/')
+            if any(part in ('.', '..') for part in name.split('/')):
+                continue
+
+            # A pattern with a slash before its end is relative to the root, otherwise it matches at any depth.
+            prefix = '' if '/' in line.rstrip('/') else '**/'
+
+            result.append(f':(exclude,glob){prefix}{name}/**')
+            if not line.endswith('/'):
+                result.append(f':(exclude,glob){prefix}{name}')
+
+        return result
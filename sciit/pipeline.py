@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Running a sequence of stages in threads connected by bounded queues, so that waiting on git in one stage overlaps
+with work in Python in the others, and at most a few items are held between any two stages.
+"""
+
+import queue
+import threading
+import time
+
+
+__all__ = ('Pipeline', 'StageStats')
+
+
+class StageStats:
+    """
+    How long a stage spent working on its items, waiting for its next item and waiting for room to pass an item on.
+    A stage that is mostly busy holds the stages after it back; one that mostly waits for items is held back.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    @property
+    def items_per_second(self):
+        return self.items / self.busy_seconds if self.busy_seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'items': self.items,
+            'busy_seconds': self.busy_seconds,
+            'starved_seconds': self.starved_seconds,
+            'blocked_seconds': self.blocked_seconds,
+            'items_per_second': self.items_per_second
+        }
+
+    def __repr__(self):
+        return f'StageStats({self.name!r}, {self.items} items, {self.items_per_second:.1f} per second)'
+
+
+class _Stopped(Exception):
+    pass
+
+
+_END = object()
+
+
+class Pipeline:
+    """
+    Takes the items of a source through each of the stages, in order, and gives the results to a sink. The source
+    and each stage run in a thread of their own, and the sink in the thread that runs the pipeline, so that it is the
+    one place that state shared with the rest of the program is changed. Items reach the sink in the order of the
+    source.
+
+    If the source, a stage or the sink raises an exception, the other threads are stopped and the exception is raised
+    from run.
+    """
+
+    # How often a thread waiting on a queue checks whether the pipeline has been stopped.
+    POLL_SECONDS = 0.1
+
+    def __init__(self, source, stages, sink, queue_size=16):
+        """
+        :param source: a (name, iterable) pair.
+        :param stages: a (name, function) pair for each stage, whose function is given each item and returns the
+        item for the next stage.
+        :param sink: a (name, function) pair, whose function is given each result.
+        :param queue_size: the largest number of items held between two stages.
+        """
+        self._source_name, self._source = source
+        self._stages = list(stages)
+        self._sink_name, self._sink = sink
+        self.queue_size = queue_size
+
+        self.stats = [StageStats(name) for name in [self._source_name] + [name for name, _ in self._stages] +
+                      [self._sink_name]]
+
+        self._stopping = threading.Event()
+        self._error = None
+
+    def _put(self, to_queue, item, stats):
+        start = time.perf_counter()
+        while True:
+            try:
+                to_queue.put(item, timeout=self.POLL_SECONDS)
+                break
+            except queue.Full:
+                if self._stopping.is_set():
+                    raise _Stopped
+        stats.blocked_seconds += time.perf_counter() - start
+
+    def _get(self, from_queue, stats):
+        start = time.perf_counter()
+        while True:
+            try:
+                item = from_queue.get(timeout=self.POLL_SECONDS)
+                break
+            except queue.Empty:
+                if self._stopping.is_set():
+                    raise _Stopped
+        stats.starved_seconds += time.perf_counter() - start
+        return item
+
+    def _run_source(self, to_queue, stats):
+        items = iter(self._source)
+        while True:
+            start = time.perf_counter()
+            item = next(items, _END)
+            stats.busy_seconds += time.perf_counter() - start
+
+            self._put(to_queue, item, stats)
+            if item is _END:
+                return
+            stats.items += 1
+
+    def _run_stage(self, function, from_queue, to_queue, stats):
+        while True:
+            item = self._get(from_queue, stats)
+            if item is _END:
+                self._put(to_queue, _END, stats)
+                return
+
+            start = time.perf_counter()
+            result = function(item)
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+
+            self._put(to_queue, result, stats)
+
+    def _run_thread(self, target, *args):
+        try:
+            target(*args)
+        except _Stopped:
+            pass
+        except BaseException as error:
+            if self._error is None:
+                self._error = error
+            self._stopping.set()
+
+    def run(self):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self._stages) + 1)]
+
+        threads = [threading.Thread(
+            target=self._run_thread, args=(self._run_source, queues[0], self.stats[0]),
+            name=self._source_name, daemon=True)]
+        for number, (name, function) in enumerate(self._stages):
+            threads.append(threading.Thread(
+                target=self._run_thread,
+                args=(self._run_stage, function, queues[number], queues[number + 1], self.stats[number + 1]),
+                name=name, daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        sink_stats = self.stats[-1]
+        try:
+            while True:
+                item = self._get(queues[-1], sink_stats)
+                if item is _END:
+                    break
+
+                start = time.perf_counter()
+                self._sink(item)
+                sink_stats.busy_seconds += time.perf_counter() - start
+                sink_stats.items += 1
+
+        except _Stopped:
+            pass
+
+        finally:
+            self._stopping.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
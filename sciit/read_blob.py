@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk access to blob contents through a persistent `git cat-file --batch` process.
+"""
+
+import collections
+import subprocess
+
+
+__all__ = ('BlobReader', 'SkippedBlob', 'ScannedBlob', 'looks_binary')
+
+
+# Git decides that a file is binary when there is a NUL byte in its first 8000 bytes.
+BINARY_SNIFF_SIZE = 8000
+
+
+def looks_binary(contents):
+    """
+    :return: whether the contents, as bytes, look binary to git.
+    """
+    return contents.find(b'\0', 0, BINARY_SNIFF_SIZE) != -1
+
+
+class SkippedBlob:
+    """
+    Stands in for the contents of a blob that a BlobReader did not serve.
+    """
+
+    TOO_LARGE = 'too_large'
+    BINARY = 'binary'
+    WITHOUT_MARKERS = 'without_markers'
+
+    def __init__(self, reason, size):
+        self.reason = reason
+        self.size = size
+
+    def __repr__(self):
+        return f'SkippedBlob({self.reason!r}, {self.size})'
+
+
+class ScannedBlob:
+    """
+    Stands in for the contents of a text blob that a BlobReader scanned for issues a chunk at a time as it read it,
+    rather than hold it in memory.
+    """
+
+    def __init__(self, issues_by_comment_pattern, size):
+        self.issues_by_comment_pattern = issues_by_comment_pattern
+        self.size = size
+
+    def __repr__(self):
+        return f'ScannedBlob({self.size})'
+
+
+class _MarkerSearch:
+    """
+    Looks for any of the markers in contents given a chunk at a time, keeping enough of the end of each chunk to find
+    markers that are cut in two.
+    """
+
+    def __init__(self, markers):
+        self.markers = markers
+        self.found = False
+        self._overlap = max(len(marker) for marker in markers) - 1
+        self._tail = b''
+
+    def search(self, chunk):
+        """
+        :return: the chunk.
+        """
+        if not self.found:
+            window = self._tail + chunk
+            self.found = any(marker in window for marker in self.markers)
+            self._tail = window[max(0, len(window) - self._overlap):]
+        return chunk
+
+
+_READ_PAST_WITH_MARKERS = object()
+
+
+class BlobReader:
+    """
+    Serves blob contents for an ingestion run from a single `git cat-file --batch` process, which is started on first
+    use and kept open until the reader is closed, so that no process is spawned per object.
+
+    Blobs larger than the maximum size, and blobs that look binary from their first bytes, are read past in chunks
+    without being held in memory. Text blobs larger than a chunk are checked for the required markers a chunk at a time.
+    Those read with comment patterns are scanned for issues as they are, and the others only read in full if they
+    contain a marker.
+    """
+
+    # Requests are written in groups small enough to fit in a pipe buffer, so that writing never blocks while git
+    # waits for its output to be read.
+    MAX_REQUESTS_PER_WRITE = 1000
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, git_repository, max_blob_size=None, required_markers=None, scan_blob=None):
+        """
+        :param max_blob_size: the size in bytes of the largest blob served, or None to serve blobs of any size.
+        :param required_markers: byte strings, one of which text blobs larger than a chunk must contain to be served.
+        :param scan_blob: a function given comment patterns and the contents of a blob as an iterable of chunks, that
+        returns the issues found with each comment pattern, keyed by it.
+        """
+        self._git_repository = git_repository
+        self._process = None
+
+        self.max_blob_size = max_blob_size
+        self.required_markers = required_markers
+        self.scan_blob = scan_blob
+
+        self.objects_served = 0
+        self.bytes_served = 0
+        self.objects_skipped = collections.Counter()
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=self._git_repository.working_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def _discard(self, size):
+        while size > 0:
+            chunk = self._process.stdout.read(min(size, self.CHUNK_SIZE))
+            if not chunk:
+                break
+            size -= len(chunk)
+
+    def _read_chunks(self, head, size):
+        """
+        Reads a blob that starts with `head` a chunk at a time.
+        """
+        yield head
+
+        remaining = size - len(head)
+        while remaining > 0:
+            chunk = self._process.stdout.read(min(remaining, self.CHUNK_SIZE))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def _read_past_for_markers(self, head, size):
+        """
+        Reads past the rest of a blob that starts with `head`, a chunk at a time.
+
+        :return: whether the blob contains one of the required markers.
+        """
+        marker_search = _MarkerSearch(self.required_markers)
+        for chunk in self._read_chunks(head, size):
+            marker_search.search(chunk)
+        return marker_search.found
+
+    def _scan(self, head, size, comment_patterns):
+        """
+        Scans a blob that starts with `head` for issues, a chunk at a time.
+
+        :return: a ScannedBlob, or a SkippedBlob if it does not contain one of the required markers.
+        """
+        chunks = self._read_chunks(head, size)
+        marker_search = None
+        if self.required_markers:
+            marker_search = _MarkerSearch(self.required_markers)
+            chunks = map(marker_search.search, chunks)
+
+        issues_by_comment_pattern = self.scan_blob(comment_patterns, chunks)
+        # The scan may stop early, as it does for blobs that are not UTF-8.
+        for _ in chunks:
+            pass
+
+        if marker_search is not None and not marker_search.found:
+            self.objects_skipped[SkippedBlob.WITHOUT_MARKERS] += 1
+            return SkippedBlob(SkippedBlob.WITHOUT_MARKERS, size)
+
+        self.objects_served += 1
+        self.bytes_served += size
+        return ScannedBlob(issues_by_comment_pattern, size)
+
+    def _read_response(self, check_markers, comment_patterns=None):
+        """
+        :param comment_patterns: the comment patterns to scan the blob with if it is a text blob larger than a chunk.
+        :return: the contents of the next blob, a SkippedBlob, a ScannedBlob, None if the object is missing, or
+        _READ_PAST_WITH_MARKERS if it is a text blob that contains a required marker, but was read past to check for
+        one.
+        """
+        header = self._process.stdout.readline().split()
+
+        if len(header) != 3:
+            # <object> missing
+            return None
+
+        size = int(header[2])
+
+        if self.max_blob_size is not None and size > self.max_blob_size:
+            self._discard(size + 1)
+            self.objects_skipped[SkippedBlob.TOO_LARGE] += 1
+            return SkippedBlob(SkippedBlob.TOO_LARGE, size)
+
+        head = self._process.stdout.read(min(size, BINARY_SNIFF_SIZE))
+
+        if looks_binary(head):
+            self._discard(size - len(head) + 1)
+            self.objects_skipped[SkippedBlob.BINARY] += 1
+            return SkippedBlob(SkippedBlob.BINARY, size)
+
+        if comment_patterns and self.scan_blob is not None and size > self.CHUNK_SIZE:
+            scanned_blob = self._scan(head, size, comment_patterns)
+            self._process.stdout.read(1)
+            return scanned_blob
+
+        if check_markers and self.required_markers and size > self.CHUNK_SIZE:
+            found = self._read_past_for_markers(head, size)
+            self._process.stdout.read(1)
+            if found:
+                return _READ_PAST_WITH_MARKERS
+
+            self.objects_skipped[SkippedBlob.WITHOUT_MARKERS] += 1
+            return SkippedBlob(SkippedBlob.WITHOUT_MARKERS, size)
+
+        contents = head + self._process.stdout.read(size - len(head)) if size > len(head) else head
+        self._process.stdout.read(1)
+
+        self.objects_served += 1
+        self.bytes_served += size
+
+        return contents
+
+    def _read_blobs(self, hexshas, check_markers, comment_patterns_by_hexsha):
+        if self._process is None:
+            self._start()
+
+        result = dict()
+        hexshas_with_markers = list()
+
+        for start in range(0, len(hexshas), self.MAX_REQUESTS_PER_WRITE):
+            requested_hexshas = hexshas[start:start + self.MAX_REQUESTS_PER_WRITE]
+
+            self._process.stdin.write(''.join(hexsha + '\n' for hexsha in requested_hexshas).encode('ascii'))
+            self._process.stdin.flush()
+
+            for hexsha in requested_hexshas:
+                contents = self._read_response(check_markers, comment_patterns_by_hexsha.get(hexsha, None))
+                if contents is _READ_PAST_WITH_MARKERS:
+                    hexshas_with_markers.append(hexsha)
+                elif contents is not None:
+                    result[hexsha] = contents
+
+        if hexshas_with_markers:
+            result.update(self._read_blobs(hexshas_with_markers, False, dict()))
+
+        return result
+
+    def read_blobs(self, hexshas, comment_patterns_by_hexsha=None):
+        """
+        :param comment_patterns_by_hexsha: the comment patterns of blobs, which text blobs larger than a chunk are
+        scanned for issues with as they are read, if the reader has a scan_blob function.
+        :return: the contents of each of the blobs as bytes, a ScannedBlob for those scanned as they were read, or a
+        SkippedBlob for those not served, keyed by hexsha. Missing objects are omitted.
+        """
+        return self._read_blobs(list(dict.fromkeys(hexshas)), True, comment_patterns_by_hexsha or dict())
+
+    def read_blob(self, hexsha):
+        return self.read_blobs([hexsha]).get(hexsha, None)
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Reading issue properties from the text of a comment.
+"""
+
+import re
+
+from slugify import slugify
+
+from sciit.regex import IssuePropertyRegularExpressions
+
+
+__all__ = ('read_issue_data_from_comment', 'read_issue_data_from_comment_with_regexes')
+
+
+# The properties read from a comment, by key, in the order they are recorded in the issue data.
+_PROPERTY_PATTERNS = (
+    ('issue_id', IssuePropertyRegularExpressions.ID),
+    ('title', IssuePropertyRegularExpressions.TITLE),
+    ('description', IssuePropertyRegularExpressions.DESCRIPTION),
+    ('assignees', IssuePropertyRegularExpressions.ASSIGNEES),
+    ('labels', IssuePropertyRegularExpressions.LABEL),
+    ('due_date', IssuePropertyRegularExpressions.DUE_DATE),
+    ('priority', IssuePropertyRegularExpressions.PRIORITY),
+    ('weight', IssuePropertyRegularExpressions.WEIGHT),
+    ('blockers', IssuePropertyRegularExpressions.BLOCKERS),
+)
+
+_ISSUE_ID_RE = re.compile(IssuePropertyRegularExpressions.ID)
+
+# Every property but the issue id may be prefixed with "issue", as in @issue_title. The prefix can only be followed by
+# the first letter of a property name, so that letter is enough to pick the properties a marker might be.
+_PROPERTY_PREFIX_RE = re.compile(r'@(?:[Ii]ssue[ _-]*)*')
+
+_PROPERTY_RES_BY_INITIAL = {
+    't': (('title', re.compile(IssuePropertyRegularExpressions.TITLE)),
+          ('labels', re.compile(IssuePropertyRegularExpressions.LABEL))),
+    'd': (('description', re.compile(r'@(?:[Ii]ssue[ _-]*)*[Dd]escription* *[-=:;> ]*(.*)')),
+          ('due_date', re.compile(IssuePropertyRegularExpressions.DUE_DATE))),
+    'a': (('assignees', re.compile(IssuePropertyRegularExpressions.ASSIGNEES)), ),
+    'l': (('labels', re.compile(IssuePropertyRegularExpressions.LABEL)), ),
+    'w': (('weight', re.compile(IssuePropertyRegularExpressions.WEIGHT)), ),
+    'b': (('blockers', re.compile(IssuePropertyRegularExpressions.BLOCKERS)), ),
+    'p': (('priority', re.compile(IssuePropertyRegularExpressions.PRIORITY)), ),
+}
+
+# A description runs from its marker up to the next line that starts with a marker.
+_DESCRIPTION_END_RE = re.compile(r'\n\s*@')
+
+
+def _make_issue_data(values):
+    issue_data = dict()
+
+    if 'issue_id' in values:
+        issue_data['issue_id'] = values['issue_id']
+    if 'title' in values:
+        issue_data['title'] = values['title']
+        if 'issue_id' not in issue_data:
+            issue_data['issue_id'] = slugify(values['title'])
+
+    if 'issue_id' in issue_data:
+        for key, _ in _PROPERTY_PATTERNS[2:]:
+            if key in values:
+                issue_data[key] = values[key]
+
+    return issue_data
+
+
+def _description_end(comment, first_line_end):
+    """
+    :return: where the description pattern of IssuePropertyRegularExpressions ends its value, without the backtracking
+    its lazy repetition costs on long descriptions.
+    """
+    end = len(comment)
+    if comment.endswith('\n') and end - 1 >= first_line_end:
+        end -= 1
+
+    next_marker = _DESCRIPTION_END_RE.search(comment, first_line_end)
+    return min(next_marker.start(), end) if next_marker is not None else end
+
+
+def read_issue_data_from_comment(comment):
+    """
+    Reads the properties of an issue from a comment in a single scan over its @ markers, giving the same result as
+    matching each of the IssuePropertyRegularExpressions against the whole comment. The first marker of each property
+    gives its value.
+
+    :return: the issue data, or an empty dict if the comment gives neither an issue id nor a title.
+    """
+    values = dict()
+    number_of_properties = len(_PROPERTY_PATTERNS)
+
+    position = comment.find('@')
+    while position != -1 and len(values) < number_of_properties:
+
+        if 'issue_id' not in values:
+            match = _ISSUE_ID_RE.match(comment, position)
+            if match is not None:
+                values['issue_id'] = match.group(1).rstrip()
+
+        name_position = _PROPERTY_PREFIX_RE.match(comment, position).end()
+        initial = comment[name_position:name_position + 1].lower()
+
+        for key, property_re in _PROPERTY_RES_BY_INITIAL.get(initial, ()):
+            if key in values:
+                continue
+
+            match = property_re.match(comment, position)
+            if match is None:
+                continue
+
+            if key == 'description':
+                values[key] = comment[match.start(1):_description_end(comment, match.end(1))].rstrip()
+            else:
+                values[key] = match.group(1).rstrip()
+
+        position = comment.find('@', position + 1)
+
+    return _make_issue_data(values)
+
+
+def read_issue_data_from_comment_with_regexes(comment):
+    """
+    Reads the properties of an issue from a comment by matching each of the IssuePropertyRegularExpressions against
+    the whole comment in turn. This is the definition read_issue_data_from_comment is checked against.
+    """
+    values = dict()
+
+    for key, pattern in _PROPERTY_PATTERNS:
+        value = re.findall(pattern, comment)
+        if len(value) > 0:
+            values[key] = value[0].rstrip()
+
+    return _make_issue_data(values)
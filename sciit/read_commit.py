@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import codecs
+import copy
+import json
 import os
-import platform
 import re
 import subprocess
-from slugify import slugify
 
-from sciit.regex import IssuePropertyRegularExpressions, get_file_object_pattern, strip_comment_chars
+from git import Blob
+from gitdb.util import hex_to_bin
+
+from sciit.commit_index import BranchMembershipIndex
+from sciit.read_blob import SkippedBlob, ScannedBlob, looks_binary
+from sciit.read_comment import read_issue_data_from_comment
+from sciit.regex import IssuePropertyRegularExpressions, CommentSyntaxRegistry, strip_comment_chars
+from sciit.scan_comments import scan_comments, CommentStream
 from sciit import IssueSnapshot
 
 
@@ -42,66 +50,258 @@ def _get_files_changed_in_commit(commit):
     return result
 
 
-def get_blobs_from_commit_tree(tree):
-    blobs = {blob.path: blob for blob in tree.blobs}
-    for sub_tree in tree.trees:
-        blobs.update(get_blobs_from_commit_tree(sub_tree))
-    return blobs
+def _read_nul_separated_tokens(stream, chunk_size=65536):
+    remainder = b''
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        tokens = (remainder + chunk).split(b'\0')
+        remainder = tokens.pop()
+        yield from tokens
+    if remainder:
+        yield remainder
 
 
-def extract_issue_data_from_comment_string(comment: str):
+# Paths whose new side is a gitlink to a submodule commit, rather than a blob.
+_GITLINK_MODE = b'160000'
+
+
+def _iter_changed_blobs_from_raw_log(tokens):
+    """
+    Parses the output of `git log -m --raw -z --format=%H` into (commit hexsha, changed blobs) pairs, where the changed
+    blobs are the (mode, hexsha) of the blob each changed path holds after the commit, or None for paths that no longer
+    hold a blob. Merge commits are listed once for each parent in turn, the first parent first, so only the first
+    listing of each commit is kept, in line with commit.stats which compares against the first parent.
+    """
+    hexsha, changed_blobs = None, None
+    new_paths = list()
+
+    for token in tokens:
+        if new_paths:
+            new_blob = new_paths.pop(0)
+            if changed_blobs is not None:
+                changed_blobs[token.decode('utf-8', errors='surrogateescape')] = new_blob
+            continue
+
+        token = token.lstrip(b'\n')
+
+        if token.startswith(b':'):
+            _, new_mode, _, new_hexsha, status = token.split(b' ')
+            new_blob = None if new_mode.strip(b'0') == b'' or new_mode == _GITLINK_MODE else \
+                (int(new_mode, 8), new_hexsha.decode('ascii'))
+            # The source of a rename or copy is listed before its destination.
+            new_paths = [None, new_blob] if status[:1] in (b'R', b'C') else [new_blob]
+
+        elif token:
+            if changed_blobs is not None:
+                yield hexsha, changed_blobs
+
+            next_hexsha = token.decode('ascii')
+            changed_blobs = None if next_hexsha == hexsha else dict()
+            hexsha = next_hexsha
+
+    if changed_blobs is not None:
+        yield hexsha, changed_blobs
 
-    issue_data = dict()
 
-    def update_issue_data_dict_with_value_from_comment(field_pattern, key):
-        value = re.findall(field_pattern, comment)
-        if len(value) > 0:
-            issue_data[key] = value[0].rstrip()
+class ChangedPathsStream:
+    """
+    Supplies the paths changed by each of a sequence of commits from a single long running `git log --raw -z`
+    process, rather than forking a `git diff` process for every commit via commit.stats. The blobs the paths hold are
+    taken from the same output, so that commit trees need not be read to find them.
+    """
 
-    update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.ID, 'issue_id')
-    update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.TITLE, 'title')
+    def __init__(self, git_repository, commit_hexshas, exclude_pathspecs=None):
+        """
+        :param exclude_pathspecs: git pathspecs of paths whose changes are left out, so that git does not descend into
+        ignored directories at all.
+        """
+        self._git_repository = git_repository
+        self._commit_hexshas = commit_hexshas
+        self._exclude_pathspecs = exclude_pathspecs
+
+        self._process = None
+        self._changed_blobs = None
+        self._buffered_changed_blobs = dict()
+
+        # The commits still to be read from git, so that those that never will be are not waited for.
+        self._hexshas_to_read = set(commit_hexshas)
+
+    def _log_command(self):
+        command = ['git', 'log', '--no-walk=unsorted', '--stdin', '-m', '--root', '--raw', '-z', '--no-renames',
+                   '--no-abbrev', '--format=%H']
+        if self._exclude_pathspecs:
+            # Every commit is still listed, with only its changes outside the excluded paths. A merge whose changes
+            # against its first parent are all excluded is listed with its changes against the next parent, which
+            # only adds paths to re-read.
+            command += ['--full-history', '--sparse', '--'] + list(self._exclude_pathspecs)
+        return command
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            self._log_command(), cwd=self._git_repository.working_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        self._process.stdin.write(''.join(hexsha + '\n' for hexsha in self._commit_hexshas).encode('ascii'))
+        self._process.stdin.close()
+
+        self._changed_blobs = _iter_changed_blobs_from_raw_log(_read_nul_separated_tokens(self._process.stdout))
+
+    def _next_changed_blobs(self, commit):
+        """
+        :return: the (mode, hexsha) of the blob at each path changed in the commit, or None if the commit is missing
+        from the stream.
+        """
+        if self._process is None:
+            self._start()
 
-    if 'issue_id' not in issue_data and 'title' in issue_data:
-        issue_data['issue_id'] = slugify(issue_data['title'])
+        hexsha = commit.hexsha
 
-    if 'issue_id' in issue_data:
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.DESCRIPTION, 'description')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.ASSIGNEES, 'assignees')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.LABEL, 'labels')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.DUE_DATE, 'due_date')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.PRIORITY, 'priority')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.WEIGHT, 'weight')
-        update_issue_data_dict_with_value_from_comment(IssuePropertyRegularExpressions.BLOCKERS, 'blockers')
+        # Commits are buffered only until they are asked for, so when they are asked for in the order they were given
+        # in, none are.
+        while hexsha not in self._buffered_changed_blobs:
+            if hexsha not in self._hexshas_to_read:
+                return None
 
-    return issue_data
+            next_changed_blobs = next(self._changed_blobs, None)
+            if next_changed_blobs is None:
+                return None
+            next_hexsha, changed_blobs = next_changed_blobs
+            self._hexshas_to_read.discard(next_hexsha)
+            self._buffered_changed_blobs[next_hexsha] = changed_blobs
+
+        return self._buffered_changed_blobs.pop(hexsha)
+
+    def blobs_changed_in_commit(self, commit):
+        """
+        :return: the blob at each path changed in the commit, or None for paths that no longer hold a blob.
+        """
+        changed_blobs = self._next_changed_blobs(commit)
+        if changed_blobs is None:
+            # Commits missing from the stream are listed by a git process of their own, rather than read from the
+            # object database of the repository, so that blobs can be found in a thread of their own.
+            output = subprocess.run(
+                self._log_command(), cwd=self._git_repository.working_dir, input=(commit.hexsha + '\n').encode('ascii'),
+                stdout=subprocess.PIPE).stdout
+            changed_blobs = dict(_iter_changed_blobs_from_raw_log(output.split(b'\0'))).get(commit.hexsha, dict())
+
+        return {path: Blob(self._git_repository, hex_to_bin(changed_blob[1]), changed_blob[0], path)
+                if changed_blob is not None else None
+                for path, changed_blob in changed_blobs.items()}
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdout.close()
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+def get_blobs_for_paths_in_commit_tree(tree, paths):
+    """
+    Resolves only the given paths against a commit tree, so that the cost of a lookup scales with the number of
+    paths rather than the size of the tree. Paths that are not blobs in the tree, such as deleted files, are omitted.
+    """
+    blobs = dict()
+    for path in paths:
+        try:
+            item = tree.join(path)
+        except KeyError:
+            continue
+        if item.type == 'blob':
+            blobs[path] = item
+    return blobs
+
+
+def extract_issue_data_from_comment_string(comment: str):
+    return read_issue_data_from_comment(comment)
+
+
+_ISSUE_ID_RE = re.compile(IssuePropertyRegularExpressions.ID)
 
 
 def find_issues_in_blob(comment_pattern, blob_content):
     comments_with_issues = [
-        match for match in re.finditer(comment_pattern, blob_content)
-        if re.search(IssuePropertyRegularExpressions.ID, match.group()) is not None
+        (start, end) for start, end in scan_comments(comment_pattern, blob_content)
+        if _ISSUE_ID_RE.search(blob_content, start, end) is not None
         ]
 
+    return _read_issues_in_comments(
+        comment_pattern, ((start, end, blob_content[start:end]) for start, end in comments_with_issues))
+
+
+def find_issues_in_blob_chunks(comment_patterns, chunks):
+    """
+    Reads the issues in a blob given as an iterable of chunks of bytes, as find_issues_in_blob does with each of the
+    comment patterns, holding no more of it in memory than a chunk and the comments that may still be open.
+
+    :return: the issues found with each comment pattern, keyed by it.
+    """
+    comment_streams = {comment_pattern: CommentStream(comment_pattern) for comment_pattern in comment_patterns}
+    issues_by_comment_pattern = {comment_pattern: list() for comment_pattern in comment_patterns}
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    try:
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            for comment_pattern, comment_stream in comment_streams.items():
+                issues_by_comment_pattern[comment_pattern].extend(
+                    _read_issues_in_comments(comment_pattern, comment_stream.feed(text), check_id=True))
+        text = decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        # As with blobs read whole, issues are not read from blobs that are not UTF-8.
+        return {comment_pattern: list() for comment_pattern in comment_patterns}
+
+    for comment_pattern, comment_stream in comment_streams.items():
+        issues_by_comment_pattern[comment_pattern].extend(_read_issues_in_comments(
+            comment_pattern, comment_stream.feed(text) + comment_stream.close(), check_id=True))
+
+    return issues_by_comment_pattern
+
+
+def _read_issues_in_comments(comment_pattern, comments, check_id=False):
+    """
+    :param comments: the (start, end, text) of each comment.
+    :param check_id: whether to skip comments without an issue id, rather than assume they have one.
+    """
     issues = list()
 
-    for comment_with_issue in comments_with_issues:
-        comment_string = comment_with_issue.group()
+    for start, end, comment_string in comments:
+        if check_id and _ISSUE_ID_RE.search(comment_string) is None:
+            continue
 
         comment_string, indent = strip_comment_chars(comment_pattern, comment_string)
 
         issue_data = extract_issue_data_from_comment_string(comment_string)
 
         if issue_data:
-            issue_data['start_position'] = comment_with_issue.start(0)
-            issue_data['end_position'] = comment_with_issue.end(0)
+            issue_data['start_position'] = start
+            issue_data['end_position'] = end
             issues.append(issue_data)
 
     return issues
 
 
-def read_in_blob_contents(blob):
-    blob_contents = blob.data_stream.read()
-    if isinstance(blob_contents, bytes):
+# The version of the way issues are read from blobs, which the issues recorded for parsed blobs were found with. It
+# must change whenever a change to the comment patterns or to reading issues from comments would find other issues.
+ISSUE_PARSER_VERSION = 1
+
+# Only comments that match IssuePropertyRegularExpressions.ID are read as issues, and every match starts with one of
+# these markers.
+_ISSUE_MARKERS = ('@issue', '@Issue')
+ISSUE_MARKER_BYTES = tuple(marker.encode('utf-8') for marker in _ISSUE_MARKERS)
+
+
+def may_contain_issue(contents):
+    """
+    :return: whether the contents, as bytes or text, contain an issue marker, and so may contain an issue. Contents
+    without one are skipped before they are decoded or searched for comments.
+    """
+    markers = ISSUE_MARKER_BYTES if isinstance(contents, bytes) else _ISSUE_MARKERS
+    return any(marker in contents for marker in markers)
+
+
+def decode_blob_contents(blob_contents):
+    if blob_contents is None:
+        return None
+    elif isinstance(blob_contents, bytes):
         try:
             return blob_contents.decode("utf-8")
         except UnicodeDecodeError:
@@ -110,143 +310,215 @@ def read_in_blob_contents(blob):
         return blob_contents
 
 
-def find_issue_snapshots_in_commit_paths_that_changed(commit, git_working_dir=None, ignore_files=None):
-    issue_snapshots = list()
+# The scan counts of blobs that a BlobReader skipped, by the reason they were skipped.
+_SKIPPED_BLOB_SCAN_COUNTS = {
+    SkippedBlob.TOO_LARGE: 'blobs_too_large',
+    SkippedBlob.BINARY: 'binary_blobs',
+    SkippedBlob.WITHOUT_MARKERS: 'blobs_without_issue_markers'
+}
 
-    _git_working_dir = os.getcwd() if git_working_dir is None else git_working_dir
 
-    files_changed_in_commit = _get_files_changed_in_commit(commit)
+def _find_issues_in_blob_contents(comment_pattern, raw_blob_contents, scan_counts):
+    """
+    :return: the issues in the blob contents, or None if the blob is missing or was too large to be read.
+    """
+    if raw_blob_contents is None:
+        return None
 
-    blobs = get_blobs_from_commit_tree(commit.tree)
+    if isinstance(raw_blob_contents, ScannedBlob):
+        # Each use of the issues is given a copy, as the snapshots made from them are given the path of the blob.
+        return copy.deepcopy(raw_blob_contents.issues_by_comment_pattern[comment_pattern])
 
-    if ignore_files:
-        files_changed_in_commit -= set(ignore_files.match_files(files_changed_in_commit))
+    if isinstance(raw_blob_contents, SkippedBlob):
+        if scan_counts is not None:
+            scan_counts[_SKIPPED_BLOB_SCAN_COUNTS[raw_blob_contents.reason]] += 1
+        # Whether a blob is too large depends on the limit it is read with, so its issues are not recorded as none.
+        return None if raw_blob_contents.reason == SkippedBlob.TOO_LARGE else list()
 
-    in_branches = _find_branches_for_commit(commit, _git_working_dir)
+    if not may_contain_issue(raw_blob_contents):
+        if scan_counts is not None:
+            scan_counts['blobs_without_issue_markers'] += 1
+        return list()
 
-    for file_changed in files_changed_in_commit:
-        # Handles deleted files they won't exist.
-        if file_changed not in blobs:
-            continue
+    if isinstance(raw_blob_contents, bytes) and looks_binary(raw_blob_contents):
+        if scan_counts is not None:
+            scan_counts['binary_blobs'] += 1
+        return list()
 
-        blob = blobs[file_changed]
+    blob_contents = decode_blob_contents(raw_blob_contents)
+    if blob_contents is None:
+        return list()
 
-        _comment_pattern = get_file_object_pattern(blob.path, blob.mime_type)
-        if not _comment_pattern:
-            continue
+    return find_issues_in_blob(comment_pattern, blob_contents)
+
+
+def find_issue_snapshots_in_commit_paths_that_changed(
+        commit, git_working_dir=None, changed_paths_stream=None, blob_reader=None, branch_index=None,
+        scan_counts=None, parsed_blob_store=None, comment_syntax=None, path_filter=None):
+    """
+    :param scan_counts: a Counter that, if given, counts the blobs skipped for having no issue marker, for looking
+    binary or for being too large, and the blobs whose issues were recorded when they were parsed before.
+    :param parsed_blob_store: a ParsedBlobStore that, if given, is consulted before any blob is read or parsed, and
+    records the issues found in those that are.
+    :param comment_syntax: the CommentSyntaxRegistry that gives the comment pattern of each blob, which defaults to one
+    with no configuration.
+    :param path_filter: a PathFilter that, if given, leaves out the changed paths that issues are not read from.
+    """
+    blobs_for_scanning, files_changed_in_commit, in_branches = find_blobs_for_scanning_in_commit(
+        commit, git_working_dir, changed_paths_stream, branch_index, comment_syntax, path_filter)
+
+    if parsed_blob_store is not None:
+        parsed_issue_data = parsed_blob_store.read_issue_data(
+            (blob.hexsha, _comment_pattern) for _, blob, _comment_pattern in blobs_for_scanning)
+    else:
+        parsed_issue_data = dict()
 
-        blob_contents = read_in_blob_contents(blob)
+    if blob_reader is not None:
+        contents_by_hexsha = read_blob_contents(
+            blob_reader,
+            [(blob.hexsha, _comment_pattern) for _, blob, _comment_pattern in blobs_for_scanning
+             if (blob.hexsha, _comment_pattern) not in parsed_issue_data])
+    else:
+        contents_by_hexsha = None
 
-        if blob_contents is None:
-            continue
+    issue_snapshots = find_issue_snapshots_in_blobs(
+        commit, blobs_for_scanning, in_branches, contents_by_hexsha, parsed_issue_data, scan_counts, parsed_blob_store)
 
-        blob_issues = find_issues_in_blob(_comment_pattern, blob_contents)
+    return issue_snapshots, files_changed_in_commit, in_branches
 
-        for issue_data in blob_issues:
-            issue_data['file_path'] = file_changed
-            issue_snapshot = IssueSnapshot(commit, issue_data, in_branches)
-            issue_snapshots.append(issue_snapshot)
 
-    return issue_snapshots, files_changed_in_commit, in_branches
+def find_issue_snapshots_in_blobs(
+        commit, blobs_for_scanning, in_branches, contents_by_hexsha=None, parsed_issue_data=None, scan_counts=None,
+        parsed_blob_store=None):
+    """
+    Reads the issues in the blobs changed in a commit.
 
+    :param contents_by_hexsha: the contents of the blobs as a BlobReader serves them, or None to read each blob from
+    the object database.
+    :param parsed_issue_data: the JSON issue data recorded for the blobs that were parsed before, keyed by (hexsha,
+    comment pattern). It is added to as blobs are parsed.
+    """
+    issue_snapshots = list()
+    parsed_issue_data = dict() if parsed_issue_data is None else parsed_issue_data
 
-_COMMIT_BRANCHES_CACHE = None
-
-
-def _get_commit_branches_from_bash():
-    bash_script = \
-        b"""
-        declare -A COMMIT_BRANCHES
-
-        BRANCHES=(`git branch | tr '*' ' ' ` )
-        
-        for BRANCH in ${BRANCHES[@]}
-        do
-            COMMITS=( `git log --format="%H" $BRANCH` )
-            for COMMIT in ${COMMITS[@]}
-            do
-            if [ -v "COMMIT_BRANCHES[$COMMIT]" ]
-            then
-                COMMIT_BRANCHES[$COMMIT]="${COMMIT_BRANCHES[$COMMIT]},$BRANCH"
-            else
-                COMMIT_BRANCHES[$COMMIT]="$BRANCH"
-            fi
-            done;
-        done
-
-        for COMMIT in ${!COMMIT_BRANCHES[@]}
-        do
-            echo $COMMIT:${COMMIT_BRANCHES[$COMMIT]}
-        done
-        """
+    for file_changed, blob, _comment_pattern in blobs_for_scanning:
 
-    sub_process = subprocess.Popen(["bash"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-    process_out, _ = sub_process.communicate(bash_script)
+        blob_key = (blob.hexsha, _comment_pattern)
 
-    return process_out
+        if blob_key in parsed_issue_data:
+            blob_issues = json.loads(parsed_issue_data[blob_key])
+            if scan_counts is not None:
+                scan_counts['blobs_parsed_before'] += 1
+        else:
+            blob_issues = _find_issues_in_blob_contents(
+                _comment_pattern,
+                contents_by_hexsha.get(blob.hexsha, None) if contents_by_hexsha is not None else
+                blob.data_stream.read(),
+                scan_counts)
 
+            if blob_issues is None:
+                continue
 
-def _get_commit_branches_from_powershell():
-    power_shell_script = \
-        """
-        $branches = git branch
-        $branches = $branches.Trim("*", " ")
-
-        $commit_branches = @{}
-
-        foreach ($branch in $branches) {
-          $commits = git log --format="%H" $branch
-          foreach ($commit in $commits){
-            if ($commit_branches.ContainsKey($commit)){
-              $commit_branches[$commit] = "$($commit_branches[$commit]),$branch"
-            } else {
-              $commit_branches[$commit] = $branch
-            }
-          }
-        }
-
-        foreach($commit in $commit_branches.keys){
-          echo "${commit}:$($commit_branches[$commit])"
-        }
-        """
-    process = subprocess.Popen(
-        ["powershell.exe", '-ExecutionPolicy', 'Unrestricted', ". { " + power_shell_script + " } ;"],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            if parsed_blob_store is not None:
+                parsed_issue_data[blob_key] = json.dumps(blob_issues)
+                parsed_blob_store.write_issue_data(blob.hexsha, _comment_pattern, parsed_issue_data[blob_key])
 
-    output, _ = process.communicate()
-    return output
+        issue_snapshots.extend(make_issue_snapshots(commit, file_changed, blob_issues, in_branches))
 
+    return issue_snapshots
 
-def _init_commit_branch_cache(git_working_dir):
-    global _COMMIT_BRANCHES_CACHE
-    _COMMIT_BRANCHES_CACHE = dict()
 
-    current_wd = os.getcwd()
+def find_blobs_for_scanning_in_commit(
+        commit, git_working_dir=None, changed_paths_stream=None, branch_index=None, comment_syntax=None,
+        path_filter=None):
+    """
+    Finds the files changed in a commit that issues are read from, without reading them.
 
-    os.chdir(git_working_dir)
+    :param branch_index: the BranchMembershipIndex that gives the branches the commit is in, which defaults to one
+    built for this commit alone.
+    :return: the (file path, blob, comment pattern) of each of those files, all of the paths changed in the commit that
+    issues are read from, and the branches the commit is in.
+    """
+    _git_working_dir = os.getcwd() if git_working_dir is None else git_working_dir
+    _comment_syntax = CommentSyntaxRegistry() if comment_syntax is None else comment_syntax
+
+    if changed_paths_stream is not None:
+        changed_blobs = changed_paths_stream.blobs_changed_in_commit(commit)
+        files_changed_in_commit = set(changed_blobs)
+    else:
+        changed_blobs = None
+        files_changed_in_commit = _get_files_changed_in_commit(commit)
 
-    _system = platform.system()
+    if path_filter is not None:
+        files_changed_in_commit = path_filter.filter_paths(files_changed_in_commit)
 
-    if _system == 'Windows':
-        sub_process_out = _get_commit_branches_from_powershell()
+    if changed_blobs is not None:
+        blobs = {path: changed_blobs[path] for path in files_changed_in_commit if changed_blobs[path] is not None}
     else:
-        sub_process_out = _get_commit_branches_from_bash()
+        blobs = get_blobs_for_paths_in_commit_tree(commit.tree, files_changed_in_commit)
+
+    _branch_index = BranchMembershipIndex(_git_working_dir) if branch_index is None else branch_index
+    in_branches = _branch_index.branches_for_commit(commit.hexsha)
+
+    blobs_for_scanning = list()
+
+    for file_changed in files_changed_in_commit:
+        # Handles deleted files they won't exist.
+        if file_changed not in blobs:
+            continue
 
-    os.chdir(current_wd)
+        blob = blobs[file_changed]
 
-    for line in sub_process_out.decode("utf-8").strip().split('\n'):
-        commit_str, branches_str = line.strip().split(':')
-        branches = branches_str.split(',')
-        _COMMIT_BRANCHES_CACHE[commit_str] = branches
+        _comment_pattern = _comment_syntax.comment_pattern_for_blob(blob)
+        if not _comment_pattern:
+            continue
 
+        blobs_for_scanning.append((file_changed, blob, _comment_pattern))
 
-def _find_branches_for_commit(commit, git_working_dir):
+    return blobs_for_scanning, files_changed_in_commit, in_branches
 
-    global _COMMIT_BRANCHES_CACHE
-    if not _COMMIT_BRANCHES_CACHE or commit.hexsha not in _COMMIT_BRANCHES_CACHE:
-        _init_commit_branch_cache(git_working_dir)
 
-    if commit.hexsha in _COMMIT_BRANCHES_CACHE:
-        return _COMMIT_BRANCHES_CACHE[commit.hexsha]
-    else:
-        return list()
+def make_issue_snapshots(commit, file_path, blob_issues, in_branches):
+    issue_snapshots = list()
+    for issue_data in blob_issues:
+        issue_data['file_path'] = file_path
+        issue_snapshots.append(IssueSnapshot(commit, issue_data, in_branches))
+    return issue_snapshots
+
+
+def read_blob_contents(blob_reader, blob_keys):
+    """
+    Reads blobs with a BlobReader, giving it the comment patterns that each is read with, so that it can scan text
+    blobs too large to hold in memory as it reads them.
+
+    :param blob_keys: the (hexsha, comment pattern) of each blob.
+    :return: the contents of each blob as the BlobReader serves them, keyed by hexsha.
+    """
+    comment_patterns_by_hexsha = dict()
+    for hexsha, comment_pattern in blob_keys:
+        comment_patterns_by_hexsha.setdefault(hexsha, set()).add(comment_pattern)
+
+    return blob_reader.read_blobs(list(comment_patterns_by_hexsha), comment_patterns_by_hexsha)
+
+
+def parse_blobs(blob_reader, blob_keys, scan_counts=None):
+    """
+    Reads the issues in blobs, as parallel ingestion does in worker processes.
+
+    :param blob_keys: the (hexsha, comment pattern) of each blob.
+    :return: the issues found in each blob as JSON, as a ParsedBlobStore records them, the SkippedBlob that stood in
+    for blobs too large to read, or None for blobs that are missing, keyed by (hexsha, comment pattern).
+    """
+    blob_keys = list(blob_keys)
+    contents_by_hexsha = read_blob_contents(blob_reader, blob_keys)
+
+    result = dict()
+    for hexsha, comment_pattern in blob_keys:
+        raw_blob_contents = contents_by_hexsha.get(hexsha, None)
+        blob_issues = _find_issues_in_blob_contents(comment_pattern, raw_blob_contents, scan_counts)
+        if blob_issues is not None:
+            result[(hexsha, comment_pattern)] = json.dumps(blob_issues)
+        else:
+            result[(hexsha, comment_pattern)] = raw_blob_contents
+
+    return result
@@ -15,6 +15,9 @@ PLAIN = r'#(?:[*]){3,}((?:(?:.|[\r\n])*?))#(?:[*]){3,}'
 
 MARKDOWN = r'(?:---)([\w\W]+?)(?:---)'
 
+HASH_LINES = r'(?m)(?:^[ \t]*#.*\n?)+'
+SLASH_LINES = r'(?m)(?:^[ \t]*//.*\n?)+'
+
 C_STYLE_FILE_EXTENSIONS = \
     ['.java', '.c', '.cpp', '.cxx', '.h', '.hpp', '.hxx', '.cs', '.php', '.css', '.js', '.sql', '.scala', '.swift',
      '.go', '.kt', '.kts']
@@ -27,6 +30,27 @@ OTHER_FILE_EXTENSIONS =\
 
 MARKDOWN_FILE_EXTENSIONS = ['.md']
 
+HASH_LINES_FILE_EXTENSIONS =\
+    ['.sh', '.bash', '.zsh', '.ps1', '.toml', '.tf', '.cmake', '.mk', '.r', '.pl']
+
+HASH_LINES_FILE_NAMES = ['Makefile', 'Dockerfile']
+
+SLASH_LINES_FILE_EXTENSIONS = ['.ts', '.tsx', '.rs', '.dart']
+
+# The comment syntaxes that can be given to file extensions and names in a comment syntax configuration file.
+COMMENT_PATTERNS_BY_SYNTAX_NAME = {
+    'c-style': C_STYLE,
+    'python': PYTHON,
+    'html': HTML,
+    'matlab': MATLAB,
+    'haskell': HASKELL,
+    'plain': PLAIN,
+    'markdown': MARKDOWN,
+    'hash-lines': HASH_LINES,
+    'slash-lines': SLASH_LINES,
+    'none': False
+}
+
 
 # noinspection SpellCheckingInspection
 class IssuePropertyRegularExpressions:
@@ -74,6 +98,13 @@ def strip_comment_chars(comment_pattern, comment_string):
 
         return re.sub(r'^\s*#\s*', '', comment_string, flags=re.M), indent
 
+    if comment_pattern in (HASH_LINES, SLASH_LINES):
+        leading_chars = '#+' if comment_pattern == HASH_LINES else '//+'
+        indent_match = re.search(f'^([\\t ]*){leading_chars}[\\t ]*@(?:[Ii]ssue)', comment_string, flags=re.M)
+        indent = indent_match.group(1) if indent_match else ''
+
+        return re.sub(f'^\\s*{leading_chars}\\s*', '', comment_string, flags=re.M), indent
+
     if comment_pattern == C_STYLE:
 
         indent_re = '([\t| ]+)\*([\t| ]+)@(?:[Ii]ssue)'
@@ -119,37 +150,96 @@ def get_comment_leading_char(pattern):
         return ''
     elif pattern == C_STYLE:
         return '*'
-    elif pattern == PLAIN:
+    elif pattern in (PLAIN, HASH_LINES):
         return '#'
+    elif pattern == SLASH_LINES:
+        return '//'
     else:
         return ''
 
 
-def get_file_object_pattern(path, mime_type=None):
-    ext = os.path.splitext(path)[1]
-
-    _mime_type = mimetypes.guess_type(path) if mime_type is None else mime_type
-
-    if ext != '':
-        if ext in C_STYLE_FILE_EXTENSIONS:
-            pattern = C_STYLE
-        elif ext in HTML_FILE_EXTENSIONS:
-            pattern = HTML
-        elif ext in MARKDOWN_FILE_EXTENSIONS:
-            pattern = MARKDOWN
-        elif ext == '.m':
-            pattern = MATLAB
-        elif ext == '.hs':
-            pattern = HASKELL
-        elif ext == '.py':
-            pattern = PYTHON
-        elif ext in OTHER_FILE_EXTENSIONS or _mime_type == 'text/plain':
-            pattern = PLAIN
-        else:
-            pattern = False
-    elif _mime_type == 'text/plain':
-        pattern = PLAIN
-    else:
-        pattern = False
+class CommentSyntaxRegistry:
+    """
+    The comment pattern that issues are read from in each file, registered by file name and by extension, so that a
+    file is resolved with a dict lookup, memoised per path. Files that are neither are read as plain text when their
+    mime type, which is only guessed for them, is text/plain.
+    """
+
+    def __init__(self, default_mime_type=None):
+        """
+        :param default_mime_type: the mime type of files whose mime type cannot be guessed from their path.
+        """
+        self.default_mime_type = default_mime_type
+
+        self._comment_patterns_by_file_name = {file_name: HASH_LINES for file_name in HASH_LINES_FILE_NAMES}
+
+        self._comment_patterns_by_extension = dict()
+        for extensions, comment_pattern in (
+                (C_STYLE_FILE_EXTENSIONS, C_STYLE),
+                (HTML_FILE_EXTENSIONS, HTML),
+                (MARKDOWN_FILE_EXTENSIONS, MARKDOWN),
+                (['.m'], MATLAB),
+                (['.hs'], HASKELL),
+                (['.py'], PYTHON),
+                (OTHER_FILE_EXTENSIONS, PLAIN),
+                (HASH_LINES_FILE_EXTENSIONS, HASH_LINES),
+                (SLASH_LINES_FILE_EXTENSIONS, SLASH_LINES)):
+            for extension in extensions:
+                self._comment_patterns_by_extension[extension] = comment_pattern
+
+        self._comment_patterns_by_path = dict()
+
+    def register_extension(self, extension, comment_pattern):
+        self._comment_patterns_by_extension[extension] = comment_pattern
+        self._comment_patterns_by_path.clear()
+
+    def register_file_name(self, file_name, comment_pattern):
+        self._comment_patterns_by_file_name[file_name] = comment_pattern
+        self._comment_patterns_by_path.clear()
+
+    def comment_pattern(self, path, mime_type=None):
+        """
+        :param mime_type: the mime type of the file, used instead of one guessed from its path.
+        :return: the comment pattern of the file, or False if issues are not read from it.
+        """
+        if mime_type is not None:
+            return self._resolve_comment_pattern(path, lambda: mime_type)
+
+        comment_pattern = self._comment_patterns_by_path.get(path)
+        if comment_pattern is None:
+            comment_pattern = self._resolve_comment_pattern(path, lambda: self._guess_mime_type(path))
+            self._comment_patterns_by_path[path] = comment_pattern
+        return comment_pattern
+
+    def comment_pattern_for_blob(self, blob):
+        """
+        :return: the comment pattern of the blob, as comment_pattern gives for its path and mime type, though the mime
+        type is only read for paths with neither a registered name nor a registered extension.
+        """
+        comment_pattern = self._comment_patterns_by_path.get(blob.path)
+        if comment_pattern is None:
+            comment_pattern = self._resolve_comment_pattern(blob.path, lambda: blob.mime_type)
+            self._comment_patterns_by_path[blob.path] = comment_pattern
+        return comment_pattern
+
+    def _resolve_comment_pattern(self, path, get_mime_type):
+        file_name = os.path.basename(path)
+
+        comment_pattern = self._comment_patterns_by_file_name.get(file_name)
+        if comment_pattern is None:
+            comment_pattern = self._comment_patterns_by_extension.get(os.path.splitext(file_name)[1])
+        if comment_pattern is None:
+            comment_pattern = PLAIN if get_mime_type() == 'text/plain' else False
+
+        return comment_pattern
+
+    def _guess_mime_type(self, path):
+        mime_type = mimetypes.guess_type(path)[0]
+        return mime_type if mime_type is not None else self.default_mime_type
+
+
+_default_comment_syntax = CommentSyntaxRegistry()
+
 
-    return pattern
+def get_file_object_pattern(path, mime_type=None):
+    return _default_comment_syntax.comment_pattern(path, mime_type)
@@ -10,16 +10,27 @@ from pathlib import Path
 from shutil import copyfile
 
 import json
-import sqlite3
+
+from collections import Counter, OrderedDict
 
 from git import Commit, GitCommandError
 from gitdb.util import hex_to_bin
 
 from sciit.cli import ProgressTracker, Styling
-from sciit.read_commit import find_issue_snapshots_in_commit_paths_that_changed
+from sciit.commit_index import BranchMembershipIndex, CommitChildIndex
+from sciit.commit_metadata import CommitMetadataCache, make_commit_metadata_row
+from sciit.blob_parser_pool import BlobParserPool
+from sciit.read_blob import BlobReader, SkippedBlob
+from sciit.ingestion_pipeline import IngestionPipeline
+from sciit.read_commit import ChangedPathsStream, ISSUE_PARSER_VERSION, ISSUE_MARKER_BYTES, \
+    find_blobs_for_scanning_in_commit, find_issues_in_blob_chunks, make_issue_snapshots
+from sciit.store import IssueSnapshotStore, ParsedBlobStore
 from sciit.errors import EmptyRepositoryError, NoCommitsError
-from sciit.functions import write_last_issue_commit_sha, get_last_issue_commit_sha, get_sciit_ignore_path_spec
-from sciit.issue import Issue, IssueSnapshot
+from sciit.functions import write_last_issue_commit_sha, get_last_issue_commit_sha, get_sciit_path_filter, \
+    get_comment_syntax_registry
+from sciit.issue import Issue, IssueSnapshot, IssueState
+from sciit.issue_dependencies import IssueDependencyGraph
+from sciit.issue_status import classify_issue_statuses
 
 from contextlib import closing
 
@@ -27,27 +38,124 @@ from contextlib import closing
 __all__ = ('IssueRepo', )
 
 
-def dict_factory(cursor, row):
-    d = {}
-    for idx, col in enumerate(cursor.description):
-        d[col[0]] = row[idx]
-    return d
+# The issues found in parsed blobs are kept in the git directory, beside the issue directory.
+PARSED_BLOBS_FILE_NAME = 'issues-parsed-blobs.db'
+
+# Blobs larger than this are not read for issues, unless the issue repository is given another limit.
+DEFAULT_MAX_BLOB_SIZE = 10 * 1024 * 1024
+
+# When ingesting with more than one job, the commits are planned and stitched in windows of this many, so that the
+# blobs of one window are parsed while the snapshots of the one before are written.
+PARALLEL_INGESTION_WINDOW_SIZE = 250
+
+# The most commits whose snapshots are kept during an ingestion for their children to carry over. A commit is let go of
+# once its first child has carried its snapshots over, and any other child reads them back from the store.
+SERIALIZED_ISSUE_SNAPSHOT_CACHE_SIZE = 64
+
+# The branch heads the recorded issue states were last brought up to date with.
+ISSUE_STATE_HEADS_SETTING = 'issue_state_heads'
 
 
 class IssueRepo(object):
 
-    def __init__(self, git_repository):
+    def __init__(self, git_repository, write_batch_size=None, write_batch_interval_ms=None, snapshot_storage=None,
+                 max_blob_size=DEFAULT_MAX_BLOB_SIZE, jobs=1):
         self.git_repository = git_repository
         self.issue_dir = self.git_repository.git_dir + '/issues'
 
+        self.write_batch_size = write_batch_size
+        self.write_batch_interval_ms = write_batch_interval_ms
+        self.snapshot_storage = snapshot_storage
+        self.max_blob_size = max_blob_size
+        self.jobs = jobs
+        self._store = None
+        self._commit_metadata = None
+        self._child_index = None
+        self._dependency_graph = None
+        self._parsed_blob_store = None
+        self._comment_syntax = None
+        self._path_filter = None
+
         self.issue_snapshot_cache = dict()
-        self.commit_branches_cache = dict()
+        self.branch_index = BranchMembershipIndex(self.git_repository.working_dir)
+
+        # The snapshots written for recent commits during an ingestion, with their data as JSON, for the children of
+        # each commit to carry over without serialising them again.
+        self._serialized_issue_snapshot_cache = OrderedDict()
+
+        self.last_ingestion_summary = None
 
         self.cli = False
 
     def is_init(self):
         return os.path.exists(self.issue_dir)
 
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = IssueSnapshotStore(
+                self.issue_dir + '/issues.db',
+                batch_size=self.write_batch_size,
+                batch_interval_ms=self.write_batch_interval_ms,
+                storage=self.snapshot_storage)
+        return self._store
+
+    @property
+    def parsed_blob_store(self):
+        """
+        The issues found in each blob parsed so far. They are kept beside the issue directory, so that rebuilding the
+        issue repository does not parse the same blobs again.
+        """
+        if self._parsed_blob_store is None:
+            # The parse stage of ingestion records the issues it finds from a thread of its own.
+            self._parsed_blob_store = ParsedBlobStore(
+                self.git_repository.git_dir + '/' + PARSED_BLOBS_FILE_NAME, ISSUE_PARSER_VERSION,
+                check_same_thread=False)
+        return self._parsed_blob_store
+
+    @property
+    def comment_syntax(self):
+        """
+        The comment pattern issues are read from in each file, as configured by the .sciitsyntax file of the repository.
+        """
+        if self._comment_syntax is None:
+            self._comment_syntax = get_comment_syntax_registry(self.git_repository)
+        return self._comment_syntax
+
+    @property
+    def path_filter(self):
+        """
+        The paths issues are read from, as configured by the .sciitignore and .sciitinclude files of the repository.
+        """
+        if self._path_filter is None:
+            self._path_filter = get_sciit_path_filter(self.git_repository)
+        return self._path_filter
+
+    @property
+    def commit_metadata(self):
+        if self._commit_metadata is None:
+            self._commit_metadata = CommitMetadataCache(self.git_repository, self.store, self.child_index)
+        return self._commit_metadata
+
+    @property
+    def child_index(self):
+        if self._child_index is None:
+            self._child_index = CommitChildIndex(self.git_repository.working_dir, self.store)
+        return self._child_index
+
+    def close(self):
+        self._commit_metadata = None
+        self._child_index = None
+        self._dependency_graph = None
+        self._comment_syntax = None
+        self._path_filter = None
+        if self._parsed_blob_store is not None:
+            self._parsed_blob_store.close()
+            self._parsed_blob_store = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
     def setup_file_system_resources(self, install_hooks=True):
         os.makedirs(self.issue_dir)
 
@@ -75,6 +183,9 @@ class IssueRepo(object):
             func(path)
 
         if self.is_init():
+            self.close()
+            self.issue_snapshot_cache = dict()
+            self._serialized_issue_snapshot_cache = OrderedDict()
             shutil.rmtree(self.issue_dir, onerror=onerror)
         else:
             raise EmptyRepositoryError
@@ -123,13 +234,20 @@ class IssueRepo(object):
         all_commits = list(self.git_repository.iter_commits('--all'))
         latest_commit = all_commits[0].hexsha
 
-        revision = last_issue_commit + '..' + latest_commit
-        str_commits = self.git_repository.git.execute(['git', 'rev-list', '--reverse', revision])
+        # new commits may be on any branch, not only on those leading to the latest commit.
+        revision = ['--all', '^' + last_issue_commit]
+        str_commits = self.git_repository.git.execute(['git', 'rev-list', '--reverse'] + revision)
 
-        new_commits = list(self.git_repository.iter_commits(revision)) if str_commits != '' else list()
+        # enforcing the topology order of parents to children, so that each commit carries over from its parents.
+        # noinspection SpellCheckingInspection
+        new_commits = list(self.git_repository.iter_commits(revision + ['--topo-order', '--reverse'])) \
+            if str_commits != '' else list()
 
-        # Reprocess head commits in case branch membership has changed.
-        head_commits = [head.commit for head in self.git_repository.heads]
+        # Reprocess head commits in case branch membership has changed, unless they are new anyway.
+        new_commit_hexshas = {commit.hexsha for commit in new_commits}
+        head_commits = list(
+            {head.commit.hexsha: head.commit for head in self.git_repository.heads
+             if head.commit.hexsha not in new_commit_hexshas}.values())
 
         commits_for_processing = new_commits + head_commits
 
@@ -153,32 +271,233 @@ class IssueRepo(object):
 
     def _extract_and_synchronise_issue_snapshots_from_commits(self, commits_for_processing):
 
-        ignored_files = get_sciit_ignore_path_spec(self.git_repository)
         progress_tracker = ProgressTracker(len(commits_for_processing), object_type_name='commits')
 
-        for commit in commits_for_processing:
-            self._cache_issue_snapshots_from_commit(commit, ignored_files, progress_tracker)
+        commit_hexshas = [commit.hexsha for commit in commits_for_processing]
 
-    def _cache_issue_snapshots_from_commit(self, commit, ignored_files, progress_tracker):
+        self.branch_index.invalidate()
+        self._serialized_issue_snapshot_cache = OrderedDict()
 
-        changed_issue_snapshots, files_changed_in_commit, in_branches = \
-            find_issue_snapshots_in_commit_paths_that_changed(
-                commit,
-                git_working_dir=self.git_repository.working_dir,
-                ignore_files=ignored_files)
+        scan_counts = Counter()
+
+        changed_paths_stream = ChangedPathsStream(
+            self.git_repository, commit_hexshas, exclude_pathspecs=self.path_filter.git_exclude_pathspecs())
+
+        if self.jobs is not None and self.jobs > 1:
+            with closing(changed_paths_stream), \
+                    closing(BlobParserPool(self.git_repository.working_dir, self.jobs, self.max_blob_size)) as pool:
+                self._cache_issue_snapshots_from_commits_in_parallel(
+                    commits_for_processing, changed_paths_stream, pool, progress_tracker, scan_counts)
+
+            scan_counts.update(pool.scan_counts)
+            objects_served, bytes_served = pool.objects_served, pool.bytes_served
+            stage_stats = list()
 
-        unchanged_issue_snapshots = \
+        else:
+            with closing(changed_paths_stream), \
+                    closing(BlobReader(
+                        self.git_repository, self.max_blob_size, ISSUE_MARKER_BYTES,
+                        find_issues_in_blob_chunks)) as blob_reader:
+                stage_stats = self._cache_issue_snapshots_from_commits_in_pipeline(
+                    commits_for_processing, changed_paths_stream, blob_reader, progress_tracker, scan_counts)
+
+            objects_served, bytes_served = blob_reader.objects_served, blob_reader.bytes_served
+
+        self._serialized_issue_snapshot_cache = OrderedDict()
+
+        self.store.flush()
+        self.parsed_blob_store.flush()
+        self.child_index.update()
+
+        self._refresh_issue_states(commits_for_processing)
+
+        self.last_ingestion_summary = {
+            'commits': len(commits_for_processing),
+            'blobs_read': objects_served,
+            'blob_bytes_read': bytes_served,
+            'blobs_skipped': scan_counts['blobs_without_issue_markers'],
+            'binary_blobs_skipped': scan_counts['binary_blobs'],
+            'blobs_too_large': scan_counts['blobs_too_large'],
+            'blobs_parsed_before': scan_counts['blobs_parsed_before'],
+            'stages': {stats.name: stats.as_dict() for stats in stage_stats}
+        }
+
+        if self.cli:
+            print('Read %d blobs (%d bytes) from %d commits, skipping %d without issue markers, %d binary, '
+                  '%d too large and %d parsed before' %
+                  (objects_served, bytes_served, len(commits_for_processing),
+                   scan_counts['blobs_without_issue_markers'], scan_counts['binary_blobs'],
+                   scan_counts['blobs_too_large'], scan_counts['blobs_parsed_before']))
+            if stage_stats:
+                print('Stages: ' + ', '.join(
+                    '%s %.1fs busy (%.0f commits/s)' % (stats.name, stats.busy_seconds, stats.items_per_second)
+                    for stats in stage_stats))
+
+    def _cache_issue_snapshots_from_commits_in_pipeline(
+            self, commits_for_processing, changed_paths_stream, blob_reader, progress_tracker, scan_counts):
+        """
+        Reads the commits in an IngestionPipeline, so that git works on the blobs of later commits while issues are
+        read from those of earlier ones, and records the snapshots of each on this thread.
+
+        :return: the StageStats of each stage of the pipeline.
+        """
+        # The stores are connected to here, so that the parse stage never waits on the store of the fetch stage to
+        # set up the database.
+        _ = self.parsed_blob_store.connection
+        lookup_blob_store = ParsedBlobStore(
+            self.parsed_blob_store.db_path, ISSUE_PARSER_VERSION, check_same_thread=False)
+        _ = lookup_blob_store.connection
+
+        def write_issue_snapshots(commit, changed_issue_snapshots, files_changed_in_commit, in_branches):
+            self._write_issue_snapshots_for_commit(
+                commit, changed_issue_snapshots, files_changed_in_commit, in_branches, progress_tracker)
+
+        with closing(lookup_blob_store):
+            pipeline = IngestionPipeline(
+                commits_for_processing,
+                write_issue_snapshots,
+                changed_paths_stream,
+                blob_reader,
+                self.parsed_blob_store,
+                lookup_blob_store,
+                scan_counts,
+                git_working_dir=self.git_repository.working_dir,
+                branch_index=self.branch_index,
+                comment_syntax=self.comment_syntax,
+                path_filter=self.path_filter)
+            pipeline.run()
+
+        return pipeline.stats
+
+    def _write_issue_snapshots_for_commit(
+            self, commit, changed_issue_snapshots, files_changed_in_commit, in_branches, progress_tracker):
+        """
+        Records the snapshots of the issues in a commit, from those in the paths it changed and those carried over
+        from its first parent, which must have been recorded already. Only the changed snapshots are serialised, as
+        those carried over keep the JSON of the parent.
+        """
+        unchanged_serialized_issue_snapshots = \
             self._find_unchanged_issue_snapshots_in_immediate_parent(commit, in_branches, files_changed_in_commit)
 
-        all_commit_issue_snapshots = changed_issue_snapshots + unchanged_issue_snapshots
+        all_commit_serialized_issue_snapshots = \
+            [(issue_snapshot, json.dumps(issue_snapshot.data)) for issue_snapshot in changed_issue_snapshots] + \
+            unchanged_serialized_issue_snapshots
 
-        self._serialize_issue_snapshots_to_db(commit.hexsha, all_commit_issue_snapshots)
+        self.store.write_commit_metadata_rows([make_commit_metadata_row(commit)])
+        self._serialize_issue_snapshots_to_db(commit.hexsha, all_commit_serialized_issue_snapshots)
 
         if self.cli:
             progress_tracker.processed_object()
 
-    def _find_unchanged_issue_snapshots_in_immediate_parent(self, commit, in_branches, files_changed_in_commit):
+    def _cache_issue_snapshots_from_commits_in_parallel(
+            self, commits_for_processing, changed_paths_stream, pool, progress_tracker, scan_counts):
+        """
+        Only carrying snapshots over from a parent depends on the commits before, so the blobs changed in a window of
+        commits are parsed by the pool while the snapshots of the window before are stitched together in order.
+        """
+        window = None
+
+        for start in range(0, len(commits_for_processing), PARALLEL_INGESTION_WINDOW_SIZE):
+            next_window = self._plan_parallel_ingestion_window(
+                commits_for_processing[start:start + PARALLEL_INGESTION_WINDOW_SIZE], changed_paths_stream, pool,
+                window_before=window)
+
+            if window is not None:
+                self._stitch_parallel_ingestion_window(window, pool, progress_tracker, scan_counts)
+
+            window = next_window
+
+        if window is not None:
+            self._stitch_parallel_ingestion_window(window, pool, progress_tracker, scan_counts)
+
+    def _plan_parallel_ingestion_window(self, commits, changed_paths_stream, pool, window_before=None):
+        """
+        Finds the blobs changed in each of the commits, and submits those that have not been parsed before, nor are
+        being parsed for the window before, to the pool.
+        """
+        commit_plans = list()
+        for commit in commits:
+            blobs_for_scanning, files_changed_in_commit, in_branches = find_blobs_for_scanning_in_commit(
+                commit,
+                git_working_dir=self.git_repository.working_dir,
+                changed_paths_stream=changed_paths_stream,
+                branch_index=self.branch_index,
+                comment_syntax=self.comment_syntax,
+                path_filter=self.path_filter)
+            commit_plans.append((commit, blobs_for_scanning, files_changed_in_commit, in_branches))
+
+        blob_keys = dict.fromkeys(
+            (blob.hexsha, comment_pattern)
+            for _, blobs_for_scanning, _, _ in commit_plans for _, blob, comment_pattern in blobs_for_scanning)
+
+        parsed_issue_data = self.parsed_blob_store.read_issue_data(blob_keys)
+        # The issues in the blobs submitted for the window before are only recorded once that window is stitched.
+        submitted_before = window_before['submitted'] if window_before is not None else dict()
+        submitted_keys_before = window_before['submitted_keys'] if window_before is not None else set()
+
+        unparsed_blob_keys = [
+            blob_key for blob_key in blob_keys
+            if blob_key not in parsed_issue_data and blob_key not in submitted_keys_before]
+
+        return {
+            'commit_plans': commit_plans,
+            'parsed': parsed_issue_data,
+            'submitted_before': submitted_before,
+            'submitted_keys': set(unparsed_blob_keys),
+            'futures': pool.submit(unparsed_blob_keys),
+            'submitted': dict()
+        }
+
+    def _stitch_parallel_ingestion_window(self, window, pool, progress_tracker, scan_counts):
+        """
+        Records the snapshots of each commit in a window in order, once the blobs submitted for it are parsed. Blobs
+        are counted as they would be if the commits were ingested one after another.
+        """
+        window['submitted'].update(pool.collect(window['futures']))
+        for blob_key, issue_data in window['submitted'].items():
+            if isinstance(issue_data, str):
+                self.parsed_blob_store.write_issue_data(*blob_key, issue_data)
+
+        # The blobs parsed for this window that have not yet been found in a commit.
+        newly_parsed = set(window['submitted'])
+
+        for commit, blobs_for_scanning, files_changed_in_commit, in_branches in window['commit_plans']:
+            changed_issue_snapshots = list()
+
+            for file_changed, blob, comment_pattern in blobs_for_scanning:
+                blob_key = (blob.hexsha, comment_pattern)
+
+                if blob_key in window['parsed']:
+                    issue_data = window['parsed'][blob_key]
+                    scan_counts['blobs_parsed_before'] += 1
+                else:
+                    if blob_key in window['submitted']:
+                        issue_data = window['submitted'][blob_key]
+                    else:
+                        issue_data = window['submitted_before'].get(blob_key, None)
+
+                    # Blobs that were not recorded would be read again, and those too large skipped again.
+                    if blob_key in newly_parsed:
+                        newly_parsed.remove(blob_key)
+                    elif isinstance(issue_data, str):
+                        scan_counts['blobs_parsed_before'] += 1
+                    elif isinstance(issue_data, SkippedBlob):
+                        scan_counts['blobs_too_large'] += 1
+
+                if not isinstance(issue_data, str):
+                    continue
+
+                changed_issue_snapshots.extend(
+                    make_issue_snapshots(commit, file_changed, json.loads(issue_data), in_branches))
+
+            self._write_issue_snapshots_for_commit(
+                commit, changed_issue_snapshots, files_changed_in_commit, in_branches, progress_tracker)
 
+    def _find_unchanged_issue_snapshots_in_immediate_parent(self, commit, in_branches, files_changed_in_commit):
+        """
+        :return: the snapshots of the issues in the first parent of the commit that the commit did not change, each
+        with its data as JSON.
+        """
         parent_commit_snapshots = list()
 
         if len(commit.parents) < 1:
@@ -186,20 +505,76 @@ class IssueRepo(object):
 
         immediate_parent = commit.parents[0]
 
-        parent_issue_snapshots = self.find_issue_snapshots_by_commit(immediate_parent.hexsha)
+        parent_serialized_issue_snapshots = self._serialized_issue_snapshot_cache.pop(immediate_parent.hexsha, None)
+        if parent_serialized_issue_snapshots is None:
+            # The parent was written by an earlier ingestion, or its snapshots were let go of.
+            parent_serialized_issue_snapshots = \
+                [(parent_issue_snapshot, json.dumps(parent_issue_snapshot.data))
+                 for parent_issue_snapshot in self._deserialize_issue_snapshots_from_db([immediate_parent.hexsha])]
 
         unchanged_issue_snapshots_in_parent = \
-            [parent_issue_snapshot for parent_issue_snapshot in parent_issue_snapshots
+            [(parent_issue_snapshot, json_data)
+             for parent_issue_snapshot, json_data in parent_serialized_issue_snapshots
              if parent_issue_snapshot.file_path not in files_changed_in_commit]
 
-        for unchanged_issue_snapshot_in_parent in unchanged_issue_snapshots_in_parent:
+        for unchanged_issue_snapshot_in_parent, json_data in unchanged_issue_snapshots_in_parent:
             issue_snapshot = \
                 IssueSnapshot(commit, unchanged_issue_snapshot_in_parent.data, in_branches)
 
-            parent_commit_snapshots.append(issue_snapshot)
+            parent_commit_snapshots.append((issue_snapshot, json_data))
 
         return parent_commit_snapshots
 
+    def _refresh_issue_states(self, processed_commits=None):
+        """
+        Brings the recorded current state of issues up to date after an ingestion. Only issues with snapshots in the
+        processed commits, in their parents, or in the previous tips of branches that have since moved or been
+        deleted, can have changed, so only their states are rebuilt. All states are rebuilt when none are recorded.
+        """
+        head_commits = {head.name: head.commit.hexsha for head in self.git_repository.heads}
+        recorded_head_commits_str = self.store.read_setting(ISSUE_STATE_HEADS_SETTING)
+
+        if processed_commits is None or recorded_head_commits_str is None:
+            history = self._build_history()
+            replace_all = True
+        else:
+            recorded_head_commits = json.loads(recorded_head_commits_str)
+            previous_tips = [commit_hexsha for head_name, commit_hexsha in recorded_head_commits.items()
+                             if head_commits.get(head_name, None) != commit_hexsha]
+
+            commit_hexshas = list(dict.fromkeys(
+                [commit.hexsha for commit in processed_commits] +
+                [parent.hexsha for commit in processed_commits for parent in commit.parents] +
+                previous_tips))
+
+            changed_issue_ids = \
+                sorted({row['issue_id'] for row in self.store.read_issue_snapshot_rows(commit_hexshas)})
+            history = self._build_history(issue_ids=changed_issue_ids) if changed_issue_ids else dict()
+            replace_all = False
+
+        self.store.write_issue_state_rows([IssueState.make_row(issue) for issue in history.values()], replace_all)
+        self.store.write_setting(ISSUE_STATE_HEADS_SETTING, json.dumps(head_commits, sort_keys=True))
+        self.store.flush()
+        self._dependency_graph = None
+
+    def get_issue_states(self):
+        """
+        :return: the current state of each issue, as recorded at the end of the last ingestion, keyed by issue id.
+        """
+        if self.store.read_setting(ISSUE_STATE_HEADS_SETTING) is None:
+            self._refresh_issue_states()
+        return {row[0]: IssueState(*row) for row in self.store.read_issue_state_rows()}
+
+    @property
+    def dependency_graph(self):
+        """
+        :return: the graph of blocking relationships between issues, built from their current recorded state, and
+        kept until the next ingestion.
+        """
+        if self._dependency_graph is None:
+            self._dependency_graph = IssueDependencyGraph(self.get_issue_states())
+        return self._dependency_graph
+
     def get_all_issues(self, rev=None):
         return self._build_history(rev)
 
@@ -215,11 +590,7 @@ class IssueRepo(object):
         return self._build_history(revision, [issue_id]).get(issue_id, None)
 
     def issue_keys(self):
-        with closing(sqlite3.connect(self.issue_dir + '/issues.db')) as connection:
-            cursor = connection.cursor()
-            self._create_issue_snapshot_table(cursor)
-
-            return [row[0] for row in cursor.execute('SELECT DISTINCT issue_id FROM IssueSnapshot').fetchall()]
+        return self.store.read_issue_ids()
 
     def _build_history(self, revision=None, issue_ids=None):
 
@@ -228,16 +599,26 @@ class IssueRepo(object):
 
         history = dict()
 
-        issue_snapshots = self.find_issue_snapshots(revision, issue_ids)
+        # Snapshots are read in date order, so that each issue is built without re-sorting its history.
+        issue_snapshots = \
+            self._deserialize_issue_snapshots_from_db(self._get_commit_hexshas(revision), issue_ids, in_date_order=True)
         head_commits = {head.name: head.commit.hexsha for head in self.git_repository.heads}
 
+        issue_snapshots_by_issue_id = dict()
         for issue_snapshot in issue_snapshots:
 
             issue_id = issue_snapshot.issue_id
             if issue_ids is None or issue_id in issue_ids:
-                if issue_id not in history:
-                    history[issue_id] = Issue(issue_id, self, head_commits)
-                history[issue_id].add_snapshot(issue_snapshot)
+                if issue_id not in issue_snapshots_by_issue_id:
+                    issue_snapshots_by_issue_id[issue_id] = list()
+                issue_snapshots_by_issue_id[issue_id].append(issue_snapshot)
+
+        for issue_id, issue_snapshots_of_issue in issue_snapshots_by_issue_id.items():
+            history[issue_id] = Issue(issue_id, self, head_commits)
+            history[issue_id].add_snapshots(issue_snapshots_of_issue)
+
+        for issue_id, status in classify_issue_statuses(history.values(), head_commits).items():
+            history[issue_id].classified_status = status
 
         return history
 
@@ -263,79 +644,55 @@ class IssueRepo(object):
             self.issue_snapshot_cache[commit_hexsha] = issue_snapshots
         return self.issue_snapshot_cache[commit_hexsha]
 
-    def _serialize_issue_snapshots_to_db(self, commit_hexsha, issue_snapshots):
+    def _serialize_issue_snapshots_to_db(self, commit_hexsha, serialized_issue_snapshots):
+        """
+        :param serialized_issue_snapshots: the (issue snapshot, data as JSON) of each issue in the commit.
+        """
         row_values = [
             (commit_hexsha,
              issue_snapshot.issue_id,
-             json.dumps(issue_snapshot.data),
+             json_data,
              ','.join(issue_snapshot.in_branches))
-            for issue_snapshot in issue_snapshots
+            for issue_snapshot, json_data in serialized_issue_snapshots
         ]
 
-        with closing(sqlite3.connect(self.issue_dir + '/issues.db')) as connection:
-            cursor = connection.cursor()
-            self._create_issue_snapshot_table(cursor)
-            cursor.executemany("INSERT INTO IssueSnapshot VALUES(?, ?, ?, ?)", row_values)
-            connection.commit()
-        self.issue_snapshot_cache[commit_hexsha] = issue_snapshots
-
-    @staticmethod
-    def _make_query_issue_snapshot_sql_statement(commit_hexshas, issue_ids):
-
-        def _make_set_membership_condition(values, column):
-            if not values:
-                return '1'
-            else:
-                question_marks = ','.join(['?'] * len(values))
-                return f'{column} IN ({question_marks})'
-
-        commit_hexsha_condition = _make_set_membership_condition(commit_hexshas, 'commit_sha')
-        issue_ids_condition = _make_set_membership_condition(issue_ids, 'issue_id')
+        self.store.write_issue_snapshot_rows(row_values, commit_hexsha)
 
-        return f'SELECT * FROM IssueSnapshot WHERE {commit_hexsha_condition} AND {issue_ids_condition}'
+        # Only a few recent commits are kept, so that an ingestion holds the snapshots of the same number of commits
+        # however long the history is.
+        self.issue_snapshot_cache.pop(commit_hexsha, None)
+        self._serialized_issue_snapshot_cache[commit_hexsha] = serialized_issue_snapshots
+        if len(self._serialized_issue_snapshot_cache) > SERIALIZED_ISSUE_SNAPSHOT_CACHE_SIZE:
+            self._serialized_issue_snapshot_cache.popitem(last=False)
 
-    def _deserialize_issue_snapshots_from_db(self, commit_hexshas=None, issue_ids=None):
+    def _deserialize_issue_snapshots_from_db(self, commit_hexshas=None, issue_ids=None, in_date_order=False):
         result = list()
 
-        sql_statement_template = self._make_query_issue_snapshot_sql_statement(commit_hexshas, issue_ids)
+        # Unchanged issues share a payload across many commits, so each distinct payload is parsed once.
+        payloads = dict()
 
-        data_values = list()
-        if commit_hexshas:
-            data_values.extend(commit_hexshas)
-        if issue_ids:
-            data_values.extend(issue_ids)
+        row_values = self.store.read_issue_snapshot_rows(commit_hexshas, issue_ids, in_date_order)
 
-        with closing(sqlite3.connect(self.issue_dir + '/issues.db')) as connection:
+        # Commits are served from the metadata recorded at ingestion, and only read from git if it is missing.
+        commits = {commit.hexsha: commit for commit in
+                   self.commit_metadata.commits([row_value['commit_sha'] for row_value in row_values])}
 
-            cursor = connection.cursor()
-            cursor.row_factory = dict_factory
-            self._create_issue_snapshot_table(cursor)
+        for row_value in row_values:
+            commit = commits.get(row_value['commit_sha'], None)
+            if commit is None:
+                commit = Commit(self.git_repository, hex_to_bin(row_value['commit_sha']))
 
-            row_values = cursor.execute(sql_statement_template, data_values).fetchall()
+            payload_id = row_value['payload_id']
+            if payload_id not in payloads:
+                payloads[payload_id] = json.loads(row_value['json_data'])
+            data = payloads[payload_id]
 
-            for row_value in row_values:
-                commit = Commit(self.git_repository, hex_to_bin(row_value['commit_sha']))
-                data = json.loads(row_value['json_data'])
-                in_branches = row_value['in_branches'].split(',')
-                issue_snapshot = IssueSnapshot(commit, data, in_branches)
-                result.append(issue_snapshot)
+            in_branches = row_value['in_branches'].split(',')
+            issue_snapshot = IssueSnapshot(commit, data, in_branches)
+            result.append(issue_snapshot)
 
         return result
 
-    @staticmethod
-    def _create_issue_snapshot_table(cursor):
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS IssueSnapshot(
-             commit_sha TEXT,
-             issue_id TEXT,
-             json_data BLOB,
-             in_branches TEXT,
-             UNIQUE (commit_sha, issue_id) ON CONFLICT REPLACE
-            )
-            """
-        )
-
 
 class IssueHistoryIterator:
 
@@ -363,10 +720,17 @@ class IssueHistoryIterator:
         self._historic_head_commits = {key: value[0] for key, value in self._all_commits_heads.items()}
 
     def _update_historic_head_commits(self, commit_hexsha):
+        heads_moved = False
         for head_name in self._historic_head_commits:
             if commit_hexsha in self._all_commits_heads[head_name]:
+                heads_moved = heads_moved or self._historic_head_commits[head_name] != commit_hexsha
                 self._historic_head_commits[head_name] = commit_hexsha
 
+        # The issues share the head commits, so what they derived from the old ones is stale.
+        if heads_moved:
+            for issue in self._history.values():
+                issue.clear_derived_values()
+
     def __iter__(self):
         return self
 
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Linear time scanners that find the comments matched by each of the comment patterns in sciit.regex.
+
+Each scanner can also be told that the content is incomplete, as it is when a blob is scanned a chunk at a time. It
+then only finds the comments that the rest of the content cannot change, and returns where the scan must start again
+once there is more of it.
+"""
+
+import re
+
+from sciit.regex import C_STYLE, PYTHON, HTML, MATLAB, HASKELL, PLAIN, MARKDOWN, HASH_LINES, SLASH_LINES
+
+
+__all__ = ('scan_comments', 'CommentStream')
+
+
+_TRIPLE_QUOTE_RE = re.compile(r'[\'"]{3}')
+_QUOTE_RUN_RE = re.compile(r'[\'"]{3,}')
+
+_PLAIN_MARKER_RE = re.compile(r'#\*{3,}')
+
+_HASH_LINE_RE = re.compile(r'[ \t]*#')
+_SLASH_LINE_RE = re.compile(r'[ \t]*//')
+
+
+def _scan_delimited(content, opening, closing, min_length, complete=True):
+    """
+    Finds comments that run from an opening delimiter to the first closing delimiter at least `min_length` characters
+    after it, as a lazy repetition between the delimiters does.
+    """
+    position = 0
+    while True:
+        start = content.find(opening, position)
+        if start == -1:
+            # An opening delimiter may be cut off at the end.
+            return None if complete else max(position, len(content) - len(opening) + 1)
+
+        close = content.find(closing, start + len(opening) + min_length)
+        if close == -1:
+            # Any later opening is further from every closing delimiter.
+            return None if complete else start
+
+        position = close + len(closing)
+        yield start, position
+
+
+def _scan_plain(content, complete=True):
+    position = 0
+    while True:
+        opening = _PLAIN_MARKER_RE.search(content, position)
+        if opening is None:
+            # A marker may be cut off at the end, after its # and up to two of its stars.
+            return None if complete else max(position, len(content) - 3)
+
+        closing = _PLAIN_MARKER_RE.search(content, opening.end())
+        if closing is None or (not complete and closing.end() == len(content)):
+            # A marker that reaches the end may go on with more stars.
+            return None if complete else opening.start()
+
+        position = closing.end()
+        yield opening.start(), position
+
+
+def _scan_lines(content, marker, comment_line_re, complete=True):
+    """
+    Finds each block of consecutive lines that start with the marker, after any spaces and tabs, including the line
+    break that ends the block.
+    """
+    position = 0
+    while True:
+        found = content.find(marker, position)
+        if found == -1:
+            if complete:
+                return None
+            # The last line may start with the marker once it is complete.
+            line_break = content.rfind('\n', position)
+            return position if line_break == -1 else line_break + 1
+
+        # The position is always at the start of a line.
+        line_break = content.rfind('\n', position, found)
+        line_start = position if line_break == -1 else line_break + 1
+
+        if comment_line_re.match(content, line_start) is None:
+            line_end = content.find('\n', found)
+            if line_end == -1:
+                return None if complete else line_start
+            position = line_end + 1
+            continue
+
+        end = line_start
+        while end < len(content) and comment_line_re.match(content, end) is not None:
+            line_end = content.find('\n', end)
+            end = len(content) if line_end == -1 else line_end + 1
+
+        if not complete and content.find('\n', end) == -1:
+            # The block may go on into the last line, or past the end.
+            return line_start
+
+        position = end
+        yield line_start, end
+
+
+def _python_docstring_end(content, body_start, complete=True):
+    """
+    :return: where the docstring whose body starts at `body_start` ends, or None if it does not. The PYTHON pattern
+    reads its body as `.*` followed by a lazy repetition, so it first looks for closing quotes on the lines after the
+    first, and only then for the last closing quotes on the first line. Until the content is complete, closing quotes
+    may still follow, so None is also returned when there are none on the lines after the first.
+    """
+    line_end = content.find('\n', body_start)
+    if line_end == -1:
+        if not complete:
+            return None
+        line_end = len(content)
+
+    closing = _TRIPLE_QUOTE_RE.search(content, line_end)
+    if closing is not None:
+        return closing.end()
+
+    if not complete:
+        return None
+
+    last_quote_run = None
+    for last_quote_run in _QUOTE_RUN_RE.finditer(content, body_start, line_end):
+        pass
+
+    return last_quote_run.end() if last_quote_run is not None else None
+
+
+def _python_docstring_may_start(content, position, index):
+    """
+    :return: where a docstring that opens at the index would start, without looking back past the position.
+    """
+    assignment = index
+    while assignment > position and content[assignment - 1].isspace():
+        assignment -= 1
+    return assignment - 1 if assignment > position and content[assignment - 1] == '=' else index
+
+
+def _scan_python(content, complete=True):
+    position = 0
+    while True:
+        opening = _TRIPLE_QUOTE_RE.search(content, position)
+        if opening is None:
+            # Opening quotes may be cut off at the end, after the = they are assigned with.
+            return None if complete else _python_docstring_may_start(
+                content, position, max(position, len(content) - 2))
+
+        # A docstring assigned with = starts at the =, when only whitespace separates them.
+        start = _python_docstring_may_start(content, position, opening.start())
+
+        end = _python_docstring_end(content, opening.end(), complete)
+        if end is None:
+            # There are no triple quotes after the opening ones to close this or any later docstring.
+            return None if complete else start
+
+        position = end
+        yield start, end
+
+
+def _scan_pattern(comment_pattern, content, complete=True):
+    if not complete:
+        # Where a match of any other pattern ends cannot be told until the content is complete.
+        return 0
+
+    for match in re.finditer(comment_pattern, content):
+        yield match.span()
+
+
+def _scan(comment_pattern, content, complete):
+    if comment_pattern == C_STYLE:
+        return _scan_delimited(content, '/*', '*/', 0, complete)
+    elif comment_pattern == HASKELL:
+        return _scan_delimited(content, '{-', '-}', 0, complete)
+    elif comment_pattern == MATLAB:
+        return _scan_delimited(content, '%{', '%}', 0, complete)
+    elif comment_pattern == HTML:
+        return _scan_delimited(content, '<!--', '-->', 1, complete)
+    elif comment_pattern == MARKDOWN:
+        return _scan_delimited(content, '---', '---', 1, complete)
+    elif comment_pattern == PLAIN:
+        return _scan_plain(content, complete)
+    elif comment_pattern == PYTHON:
+        return _scan_python(content, complete)
+    elif comment_pattern == HASH_LINES:
+        return _scan_lines(content, '#', _HASH_LINE_RE, complete)
+    elif comment_pattern == SLASH_LINES:
+        return _scan_lines(content, '//', _SLASH_LINE_RE, complete)
+    else:
+        return _scan_pattern(comment_pattern, content, complete)
+
+
+def scan_comments(comment_pattern, content):
+    """
+    Finds the comments in the content that `re.finditer(comment_pattern, content)` would match, without the
+    backtracking that the lazy repetitions of the patterns cost on large inputs.
+
+    :return: the (start, end) span of each comment, in order.
+    """
+    return _scan(comment_pattern, content, complete=True)
+
+
+class CommentStream:
+    """
+    Finds the comments that scan_comments would in content that is given a chunk at a time. Only the content from
+    where the scan starts again is kept between chunks: the start of a comment that may still be open, or of a line
+    that may still become one.
+    """
+
+    def __init__(self, comment_pattern):
+        self._comment_pattern = comment_pattern
+        self._content = ''
+        self._offset = 0
+
+    def feed(self, chunk):
+        """
+        :return: the (start, end, text) of each comment that the content given so far holds and that the rest of the
+        content cannot change, in order. Positions are in the whole of the content.
+        """
+        self._content += chunk
+        return self._take_comments(complete=False)
+
+    def close(self):
+        """
+        :return: the (start, end, text) of each of the remaining comments, as feed gives them.
+        """
+        return self._take_comments(complete=True)
+
+    def _take_comments(self, complete):
+        comments = list()
+        spans = _scan(self._comment_pattern, self._content, complete)
+        while True:
+            try:
+                start, end = next(spans)
+            except StopIteration as stop:
+                position = stop.value if not complete else len(self._content)
+                break
+            comments.append((self._offset + start, self._offset + end, self._content[start:end]))
+
+        self._content = self._content[position:]
+        self._offset += position
+        return comments
@@ -0,0 +1,669 @@
+# -*- coding: utf-8 -*-
+"""
+Persistence of issue snapshots in the sqlite database kept in the issue directory, and of the issue data parsed
+from blobs.
+"""
+
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+from sciit.errors import SnapshotStorageError
+
+
+__all__ = ('IssueSnapshotStore', 'ParsedBlobStore', 'ROW_STORAGE', 'INTERVAL_STORAGE')
+
+
+# Issue snapshots are stored either as one row per issue per commit, or as one row per distinct issue state with the
+# range of commits, in the order they were written, over which that state is present.
+ROW_STORAGE = 'rows'
+INTERVAL_STORAGE = 'intervals'
+
+
+def dict_factory(cursor, row):
+    d = {}
+    for idx, col in enumerate(cursor.description):
+        d[col[0]] = row[idx]
+    return d
+
+
+def _create_issue_snapshot_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS IssueSnapshot(
+         commit_sha TEXT,
+         issue_id TEXT,
+         json_data BLOB,
+         in_branches TEXT,
+         UNIQUE (commit_sha, issue_id) ON CONFLICT REPLACE
+        )
+        """
+    )
+
+
+def _create_issue_snapshot_issue_id_index(cursor):
+    # Lookups by commit_sha are served by the index behind the UNIQUE (commit_sha, issue_id) constraint.
+    cursor.execute('CREATE INDEX IF NOT EXISTS IssueSnapshotIssueId ON IssueSnapshot(issue_id, commit_sha)')
+
+
+def _store_issue_snapshot_payloads_by_content_hash(cursor):
+    """
+    Moves the JSON payload of each issue snapshot into an IssuePayload table holding each distinct payload once,
+    keyed by the SHA-1 of its content. Snapshot rows refer to their payload by id.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IssuePayload(
+         payload_id INTEGER PRIMARY KEY,
+         payload_sha TEXT UNIQUE,
+         json_data BLOB
+        )
+        """
+    )
+
+    cursor.execute('ALTER TABLE IssueSnapshot RENAME TO IssueSnapshotWithPayload')
+    cursor.execute('DROP INDEX IF EXISTS IssueSnapshotIssueId')
+    cursor.execute(
+        """
+        CREATE TABLE IssueSnapshot(
+         commit_sha TEXT,
+         issue_id TEXT,
+         payload_id INTEGER REFERENCES IssuePayload(payload_id),
+         in_branches TEXT,
+         UNIQUE (commit_sha, issue_id) ON CONFLICT REPLACE
+        )
+        """
+    )
+    _create_issue_snapshot_issue_id_index(cursor)
+
+    payload_ids = dict()
+    for commit_sha, issue_id, json_data, in_branches in \
+            cursor.execute('SELECT * FROM IssueSnapshotWithPayload').fetchall():
+        payload_sha = _payload_sha(json_data)
+        if payload_sha not in payload_ids:
+            cursor.execute('INSERT INTO IssuePayload VALUES (NULL, ?, ?)', (payload_sha, json_data))
+            payload_ids[payload_sha] = cursor.lastrowid
+        cursor.execute(
+            'INSERT INTO IssueSnapshot VALUES (?, ?, ?, ?)',
+            (commit_sha, issue_id, payload_ids[payload_sha], in_branches))
+
+    cursor.execute('DROP TABLE IssueSnapshotWithPayload')
+
+
+def _create_issue_snapshot_interval_tables(cursor):
+    cursor.execute('CREATE TABLE StoreSetting(name TEXT PRIMARY KEY, value TEXT)')
+    cursor.execute('CREATE TABLE CommitSequence(sequence INTEGER PRIMARY KEY, commit_sha TEXT UNIQUE)')
+    cursor.execute(
+        """
+        CREATE TABLE IssueSnapshotInterval(
+         interval_id INTEGER PRIMARY KEY,
+         issue_id TEXT,
+         payload_id INTEGER REFERENCES IssuePayload(payload_id),
+         in_branches TEXT,
+         first_sequence INTEGER,
+         last_sequence INTEGER
+        )
+        """
+    )
+    cursor.execute('CREATE INDEX IssueSnapshotIntervalLast ON IssueSnapshotInterval(last_sequence, first_sequence)')
+    cursor.execute('CREATE INDEX IssueSnapshotIntervalIssueFirst ON IssueSnapshotInterval(issue_id, first_sequence)')
+    cursor.execute('CREATE INDEX IssueSnapshotIntervalIssueLast ON IssueSnapshotInterval(issue_id, last_sequence)')
+
+
+def _create_commit_metadata_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE CommitMetadata(
+         commit_sha TEXT PRIMARY KEY,
+         parent_shas TEXT,
+         author_name TEXT,
+         author_email TEXT,
+         authored_date INTEGER,
+         author_tz_offset INTEGER,
+         summary TEXT
+        )
+        """
+    )
+
+
+def _create_issue_state_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IssueState(
+         issue_id TEXT PRIMARY KEY,
+         title TEXT,
+         status TEXT,
+         sub_status TEXT,
+         labels TEXT,
+         last_author TEXT,
+         last_authored_date_string TEXT,
+         file_path TEXT,
+         open_in_branches TEXT,
+         closed_in_branches TEXT
+        )
+        """
+    )
+
+
+def _create_commit_child_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE CommitChild(
+         parent_sha TEXT,
+         child_sha TEXT,
+         walk_position INTEGER,
+         PRIMARY KEY (parent_sha, child_sha)
+        )
+        """
+    )
+
+
+def _add_issue_state_blockers(cursor):
+    cursor.execute('ALTER TABLE IssueState ADD COLUMN blockers TEXT')
+    # States recorded without their blockers are discarded, so that all are rebuilt when next read.
+    cursor.execute('DELETE FROM IssueState')
+    cursor.execute("DELETE FROM StoreSetting WHERE name = 'issue_state_heads'")
+
+
+# Snapshots carried over from a parent commit share the JSON of the parent, so the same payloads are hashed over and
+# over while a history is ingested. Hashing a string kept by the cache is a dictionary lookup.
+@functools.lru_cache(maxsize=16384)
+def _payload_sha(json_data):
+    if isinstance(json_data, str):
+        json_data = json_data.encode('utf-8')
+    return hashlib.sha1(json_data).hexdigest()
+
+
+# Forward migrations of the database schema. Each schema version n is reached by applying the first n migrations, so
+# new migrations must only ever be appended.
+SCHEMA_MIGRATIONS = (
+    _create_issue_snapshot_table,
+    _create_issue_snapshot_issue_id_index,
+    _store_issue_snapshot_payloads_by_content_hash,
+    _create_issue_snapshot_interval_tables,
+    _create_commit_metadata_table,
+    _create_issue_state_table,
+    _create_commit_child_table,
+    _add_issue_state_blockers,
+)
+
+
+def get_schema_version(cursor):
+    cursor.execute('CREATE TABLE IF NOT EXISTS SchemaVersion(version INTEGER NOT NULL)')
+    version = cursor.execute('SELECT MAX(version) FROM SchemaVersion').fetchone()[0]
+    return 0 if version is None else version
+
+
+def migrate_schema(connection):
+    """
+    Brings the database schema up to the latest version by applying, in order, the migrations it has not yet had.
+    Databases created before the schema was versioned are at version 0.
+    """
+    cursor = connection.cursor()
+    schema_version = get_schema_version(cursor)
+
+    for version, migration in enumerate(SCHEMA_MIGRATIONS, 1):
+        if version > schema_version:
+            migration(cursor)
+            cursor.execute('INSERT INTO SchemaVersion VALUES (?)', (version, ))
+
+    connection.commit()
+
+
+def _holding_lock(method):
+    """
+    Runs a method of a store while holding the lock of the store, so that threads take turns on its connection.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _make_set_membership_condition(values, column):
+    if not values:
+        return '1'
+    else:
+        question_marks = ','.join(['?'] * len(values))
+        return f'{column} IN ({question_marks})'
+
+
+class IssueSnapshotStore:
+    """
+    Holds a single connection to the issue snapshot database open for the life of an issue repository. The schema is
+    migrated to the latest version when the connection is opened. The database is journaled in WAL mode, and snapshot
+    writes are grouped into one transaction, committed once every `batch_size` commits have been written or
+    `batch_interval_ms` milliseconds have passed, whichever comes first, and whenever the store is flushed or closed.
+
+    The snapshot storage, rows or intervals, is fixed when the first snapshots are written. A store opened without a
+    storage uses the one the database already has.
+
+    The connection may be used from any thread, such as those of the web interface, and each method holds a lock
+    while it does, so that statements and the temporary tables they fill are not interleaved.
+    """
+
+    DEFAULT_BATCH_SIZE = 1000
+    DEFAULT_BATCH_INTERVAL_MS = 2000
+
+    # Older sqlite builds allow at most 999 bound values in a statement.
+    MAX_VALUES_PER_QUERY = 500
+
+    # The most payload ids kept in memory. Others are looked up by their hash, which is unique in the database.
+    MAX_CACHED_PAYLOAD_IDS = 16384
+
+    def __init__(self, db_path, batch_size=None, batch_interval_ms=None, storage=None):
+        self.db_path = db_path
+        self._requested_storage = storage
+        self._storage = None
+
+        self.batch_size = self.DEFAULT_BATCH_SIZE if batch_size is None else batch_size
+        self.batch_interval_ms = self.DEFAULT_BATCH_INTERVAL_MS if batch_interval_ms is None else batch_interval_ms
+
+        self._connection = None
+        self._lock = threading.RLock()
+        self._payload_ids = OrderedDict()
+
+        self._commits_in_batch = 0
+        self._batch_started = None
+
+    @property
+    @_holding_lock
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            migrate_schema(self._connection)
+            self._storage = self._settle_storage(self._connection.cursor())
+        return self._connection
+
+    @property
+    @_holding_lock
+    def storage(self):
+        if self._storage is None:
+            _ = self.connection
+        return self._storage
+
+    def _settle_storage(self, cursor):
+        row = cursor.execute("SELECT value FROM StoreSetting WHERE name = 'storage'").fetchone()
+
+        if row is not None:
+            storage = row[0]
+        else:
+            # Databases written before intervals existed hold rows.
+            has_rows = cursor.execute('SELECT 1 FROM IssueSnapshot LIMIT 1').fetchone() is not None
+            storage = ROW_STORAGE if has_rows or self._requested_storage is None else self._requested_storage
+            cursor.execute("INSERT INTO StoreSetting VALUES ('storage', ?)", (storage, ))
+            self._connection.commit()
+
+        if self._requested_storage is not None and self._requested_storage != storage:
+            raise SnapshotStorageError(storage, self._requested_storage)
+
+        return storage
+
+    @_holding_lock
+    def query(self, sql_statement, values=()):
+        cursor = self.connection.cursor()
+        cursor.row_factory = dict_factory
+        return cursor.execute(sql_statement, values).fetchall()
+
+    def _payload_id(self, json_data):
+        payload_sha = _payload_sha(json_data)
+
+        payload_id = self._payload_ids.get(payload_sha, None)
+        if payload_id is not None:
+            self._payload_ids.move_to_end(payload_sha)
+            return payload_id
+
+        cursor = self.connection.cursor()
+        row = cursor.execute('SELECT payload_id FROM IssuePayload WHERE payload_sha = ?', (payload_sha, )).fetchone()
+        if row is not None:
+            payload_id = row[0]
+        else:
+            cursor.execute('INSERT INTO IssuePayload VALUES (NULL, ?, ?)', (payload_sha, json_data))
+            payload_id = cursor.lastrowid
+
+        self._payload_ids[payload_sha] = payload_id
+        if len(self._payload_ids) > self.MAX_CACHED_PAYLOAD_IDS:
+            self._payload_ids.popitem(last=False)
+
+        return payload_id
+
+    @_holding_lock
+    def write_issue_snapshot_rows(self, row_values, commit_sha=None):
+        """
+        Writes the snapshot rows of one commit, given as (commit_sha, issue_id, json_data, in_branches), as part of
+        the current batch. Payloads already in the store are referred to rather than written again. The same
+        statement text is used for every write, so sqlite reuses its prepared statement.
+
+        :param commit_sha: the commit the rows are of, so that a commit without any can still be written.
+        """
+        if self._commits_in_batch == 0:
+            self._batch_started = time.monotonic()
+
+        if self.storage == INTERVAL_STORAGE:
+            self._write_issue_snapshot_intervals(row_values[0][0] if row_values else commit_sha, row_values)
+        else:
+            self.connection.executemany(
+                "INSERT INTO IssueSnapshot VALUES(?, ?, ?, ?)",
+                [(commit_sha, issue_id, self._payload_id(json_data), in_branches)
+                 for commit_sha, issue_id, json_data, in_branches in row_values])
+        self._commits_in_batch += 1
+
+        batch_age_ms = (time.monotonic() - self._batch_started) * 1000
+        if self._commits_in_batch >= self.batch_size or batch_age_ms >= self.batch_interval_ms:
+            self.flush()
+
+    def _commit_sequence(self, cursor, commit_sha, add=True):
+        """
+        :return: the sequence number of the commit, which is None if it had not been written and is not to be added,
+        and whether it had already been written.
+        """
+        row = cursor.execute('SELECT sequence FROM CommitSequence WHERE commit_sha = ?', (commit_sha, )).fetchone()
+        if row is not None:
+            return row[0], True
+        elif not add:
+            return None, False
+
+        cursor.execute('INSERT INTO CommitSequence VALUES (NULL, ?)', (commit_sha, ))
+        return cursor.lastrowid, False
+
+    @staticmethod
+    def _remove_sequence_from_intervals(cursor, sequence):
+        intervals = cursor.execute(
+            'SELECT * FROM IssueSnapshotInterval WHERE last_sequence >= ? AND first_sequence <= ?',
+            (sequence, sequence)).fetchall()
+
+        for interval_id, issue_id, payload_id, in_branches, first_sequence, last_sequence in intervals:
+            if first_sequence == last_sequence:
+                cursor.execute('DELETE FROM IssueSnapshotInterval WHERE interval_id = ?', (interval_id, ))
+            elif first_sequence == sequence:
+                cursor.execute(
+                    'UPDATE IssueSnapshotInterval SET first_sequence = ? WHERE interval_id = ?',
+                    (sequence + 1, interval_id))
+            else:
+                cursor.execute(
+                    'UPDATE IssueSnapshotInterval SET last_sequence = ? WHERE interval_id = ?',
+                    (sequence - 1, interval_id))
+                if last_sequence > sequence:
+                    cursor.execute(
+                        'INSERT INTO IssueSnapshotInterval VALUES (NULL, ?, ?, ?, ?, ?)',
+                        (issue_id, payload_id, in_branches, sequence + 1, last_sequence))
+
+    def _write_issue_snapshot_intervals(self, commit_sha, row_values):
+        """
+        Adds the commit to the interval of each issue state that is present in the commit and in the commit written
+        just before it, or otherwise starts a new interval. Commits that are written again are first taken out of
+        the intervals they were in. Commits without snapshots are not given a sequence number.
+        """
+        if commit_sha is None:
+            return
+
+        cursor = self.connection.cursor()
+        sequence, rewritten = self._commit_sequence(cursor, commit_sha, add=bool(row_values))
+
+        if rewritten:
+            self._remove_sequence_from_intervals(cursor, sequence)
+
+        if not row_values:
+            return
+
+        # As with rows, a later snapshot of an issue in the same commit replaces an earlier one.
+        states = dict()
+        for _, issue_id, json_data, in_branches in row_values:
+            states.pop(issue_id, None)
+            states[issue_id] = (issue_id, self._payload_id(json_data), in_branches)
+
+        state_condition = 'issue_id = ? AND payload_id = ? AND in_branches = ?'
+
+        for state in states.values():
+
+            before = cursor.execute(
+                f'SELECT interval_id FROM IssueSnapshotInterval WHERE {state_condition} AND last_sequence = ?',
+                state + (sequence - 1, )).fetchone()
+            after = cursor.execute(
+                f'SELECT interval_id, last_sequence FROM IssueSnapshotInterval '
+                f'WHERE {state_condition} AND first_sequence = ?',
+                state + (sequence + 1, )).fetchone() if rewritten else None
+
+            if before is not None and after is not None:
+                cursor.execute(
+                    'UPDATE IssueSnapshotInterval SET last_sequence = ? WHERE interval_id = ?', (after[1], before[0]))
+                cursor.execute('DELETE FROM IssueSnapshotInterval WHERE interval_id = ?', (after[0], ))
+            elif before is not None:
+                cursor.execute(
+                    'UPDATE IssueSnapshotInterval SET last_sequence = ? WHERE interval_id = ?', (sequence, before[0]))
+            elif after is not None:
+                cursor.execute(
+                    'UPDATE IssueSnapshotInterval SET first_sequence = ? WHERE interval_id = ?', (sequence, after[0]))
+            else:
+                cursor.execute(
+                    'INSERT INTO IssueSnapshotInterval VALUES (NULL, ?, ?, ?, ?, ?)', state + (sequence, sequence))
+
+    def _make_filter_condition(self, values, column, temporary_table):
+        """
+        Filters on a short list of values are written into the statement. Longer lists, such as the commits of a
+        revision range, are loaded into a temporary table, since they could exceed the number of values sqlite allows
+        in a statement and are looked up faster by index.
+
+        :return: the condition, and the values to bind to it.
+        """
+        if not values or len(values) <= self.MAX_VALUES_PER_QUERY:
+            return _make_set_membership_condition(values, column), list(values or list())
+
+        cursor = self.connection.cursor()
+        cursor.execute(f'CREATE TEMPORARY TABLE IF NOT EXISTS {temporary_table}({column} TEXT PRIMARY KEY)')
+        cursor.execute(f'DELETE FROM temp.{temporary_table}')
+        cursor.executemany(f'INSERT OR IGNORE INTO temp.{temporary_table} VALUES (?)', ((value, ) for value in values))
+
+        return f'{column} IN (SELECT {column} FROM temp.{temporary_table})', list()
+
+    @_holding_lock
+    def read_issue_snapshot_rows(self, commit_hexshas=None, issue_ids=None, in_date_order=False):
+        """
+        :return: the snapshot rows, with commit_sha, issue_id, in_branches, payload_id and json_data, of the given
+        issues in the given commits, in the order they were written. Either filter may be left out. In date order,
+        rows are ordered by the recorded authored date of their commit, and rows with the same date in the order they
+        were written.
+        """
+        commit_hexsha_condition, commit_hexsha_values = \
+            self._make_filter_condition(commit_hexshas, 'commit_sha', 'RequestedCommit')
+        issue_ids_condition, issue_id_values = self._make_filter_condition(issue_ids, 'issue_id', 'RequestedIssue')
+
+        if self.storage == INTERVAL_STORAGE:
+            source = \
+                'CommitSequence ' \
+                'JOIN IssueSnapshotInterval ON sequence BETWEEN first_sequence AND last_sequence ' \
+                'JOIN IssuePayload USING (payload_id)'
+            # The unary plus keeps a read of one commit from scanning every interval in interval_id order to skip
+            # the sort, so that the intervals reaching that commit are found through IssueSnapshotIntervalLast.
+            write_order = 'sequence, +interval_id'
+        else:
+            source = 'IssueSnapshot JOIN IssuePayload USING (payload_id)'
+            write_order = 'IssueSnapshot.rowid'
+
+        if in_date_order:
+            source += ' LEFT JOIN CommitMetadata USING (commit_sha)'
+            order = 'CommitMetadata.authored_date, ' + write_order
+        else:
+            order = write_order
+
+        sql_statement = \
+            f'SELECT commit_sha, issue_id, in_branches, payload_id, json_data ' \
+            f'FROM {source} ' \
+            f'WHERE {commit_hexsha_condition} AND {issue_ids_condition} ' \
+            f'ORDER BY {order}'
+
+        return self.query(sql_statement, commit_hexsha_values + issue_id_values)
+
+    @_holding_lock
+    def write_commit_metadata_rows(self, row_values):
+        """
+        Records commit metadata, given as (commit_sha, parent_shas, author_name, author_email, authored_date,
+        author_tz_offset, summary), as part of the current batch.
+        """
+        self.connection.executemany('INSERT OR REPLACE INTO CommitMetadata VALUES (?, ?, ?, ?, ?, ?, ?)', row_values)
+
+    @_holding_lock
+    def read_commit_metadata_rows(self, commit_hexshas):
+        """
+        :return: the recorded metadata rows of the commits, keyed by commit_sha. Unrecorded commits are omitted.
+        """
+        result = dict()
+        cursor = self.connection.cursor()
+
+        for start in range(0, len(commit_hexshas), self.MAX_VALUES_PER_QUERY):
+            requested_hexshas = commit_hexshas[start:start + self.MAX_VALUES_PER_QUERY]
+            condition = _make_set_membership_condition(requested_hexshas, 'commit_sha')
+            for row in cursor.execute(f'SELECT * FROM CommitMetadata WHERE {condition}', requested_hexshas):
+                result[row[0]] = row
+
+        return result
+
+    @_holding_lock
+    def read_setting(self, name):
+        row = self.connection.execute('SELECT value FROM StoreSetting WHERE name = ?', (name, )).fetchone()
+        return None if row is None else row[0]
+
+    @_holding_lock
+    def write_setting(self, name, value):
+        self.connection.execute('INSERT OR REPLACE INTO StoreSetting VALUES (?, ?)', (name, value))
+
+    @_holding_lock
+    def write_issue_state_rows(self, row_values, replace_all=False):
+        """
+        Records the current state of issues, as rows in the order of the IssueState table, replacing any recorded
+        state of the same issues, or of all issues.
+        """
+        if replace_all:
+            self.connection.execute('DELETE FROM IssueState')
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO IssueState VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row_values)
+
+    @_holding_lock
+    def read_issue_state_rows(self):
+        return self.connection.execute('SELECT * FROM IssueState ORDER BY issue_id').fetchall()
+
+    @_holding_lock
+    def write_commit_child_rows(self, row_values, replace_all=False):
+        """
+        Records parent to child links between commits, given as (parent_sha, child_sha, walk_position), replacing
+        all recorded links if asked to.
+        """
+        if replace_all:
+            self.connection.execute('DELETE FROM CommitChild')
+        self.connection.executemany('INSERT OR REPLACE INTO CommitChild VALUES (?, ?, ?)', row_values)
+
+    @_holding_lock
+    def read_child_commit_shas(self, commit_sha):
+        """
+        :return: the children of the commit, latest walk position first.
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT child_sha FROM CommitChild WHERE parent_sha = ? ORDER BY walk_position DESC', (commit_sha, ))]
+
+    @_holding_lock
+    def read_first_commit_child_walk_position(self):
+        return self.connection.execute('SELECT IFNULL(MIN(walk_position), 0) FROM CommitChild').fetchone()[0]
+
+    @_holding_lock
+    def read_issue_ids(self):
+        table = 'IssueSnapshotInterval' if self.storage == INTERVAL_STORAGE else 'IssueSnapshot'
+        return [row['issue_id'] for row in self.query(f'SELECT DISTINCT issue_id FROM {table}')]
+
+    @_holding_lock
+    def flush(self):
+        if self._connection is not None:
+            self._connection.commit()
+        self._commits_in_batch = 0
+
+    @_holding_lock
+    def close(self):
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+            self._storage = None
+            self._payload_ids = OrderedDict()
+
+
+class ParsedBlobStore:
+    """
+    Records the issue data found in each blob, keyed by blob sha and comment pattern, so that content that appears in
+    many commits, on many branches or again after the issue repository is rebuilt is parsed only once. The database is
+    kept apart from the issue snapshot database, so that it survives a reset of the issue repository, and what it
+    records is discarded whenever the version of the parser that found it changes. Writes are committed on flush.
+    """
+
+    # Older sqlite builds allow at most 999 bound values in a statement.
+    MAX_VALUES_PER_QUERY = 500
+
+    def __init__(self, db_path, parser_version, check_same_thread=True):
+        """
+        :param check_same_thread: whether the store may only be used by the thread that first used it. A store used by
+        more than one thread must only be used by one at a time.
+        """
+        self.db_path = db_path
+        self.parser_version = parser_version
+        self.check_same_thread = check_same_thread
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=self.check_same_thread)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS ParsedBlob('
+                'blob_sha TEXT, comment_pattern TEXT, issue_data TEXT, PRIMARY KEY (blob_sha, comment_pattern))')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS ParserVersion(version INTEGER)')
+
+            row = self._connection.execute('SELECT version FROM ParserVersion').fetchone()
+            if row is None or row[0] != self.parser_version:
+                self._connection.execute('DELETE FROM ParsedBlob')
+                self._connection.execute('DELETE FROM ParserVersion')
+                self._connection.execute('INSERT INTO ParserVersion VALUES (?)', (self.parser_version, ))
+            self._connection.commit()
+        return self._connection
+
+    def read_issue_data(self, blob_keys):
+        """
+        :param blob_keys: the (blob_sha, comment_pattern) of each blob.
+        :return: the JSON issue data recorded for each of the blobs, keyed by (blob_sha, comment_pattern). Blobs that
+        have not been parsed are omitted.
+        """
+        blob_keys = set(blob_keys)
+        blob_shas = sorted({blob_sha for blob_sha, _ in blob_keys})
+
+        result = dict()
+        cursor = self.connection.cursor()
+
+        for start in range(0, len(blob_shas), self.MAX_VALUES_PER_QUERY):
+            requested_shas = blob_shas[start:start + self.MAX_VALUES_PER_QUERY]
+            condition = _make_set_membership_condition(requested_shas, 'blob_sha')
+            for blob_sha, comment_pattern, issue_data in \
+                    cursor.execute(f'SELECT * FROM ParsedBlob WHERE {condition}', requested_shas):
+                if (blob_sha, comment_pattern) in blob_keys:
+                    result[(blob_sha, comment_pattern)] = issue_data
+
+        return result
+
+    def write_issue_data(self, blob_sha, comment_pattern, issue_data):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO ParsedBlob VALUES (?, ?, ?)', (blob_sha, comment_pattern, issue_data))
+
+    def flush(self):
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
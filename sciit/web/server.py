@@ -21,7 +21,7 @@ def index():
     """
     The homepage of the web interface that shows all the open and closed issues stored in the tracker.
     """
-    history = global_issue_repository.get_all_issues()
+    history = global_issue_repository.get_issue_states()
     data = dict()
 
     data['Num Open Issues'] = sum(map(lambda issue: 1 if issue.status[0] == 'Open' else 0, history.values()))
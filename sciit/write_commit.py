@@ -3,11 +3,10 @@ import logging
 import re
 import slugify
 
-from sciit.functions import get_sciit_ignore_path_spec
 from sciit.read_commit import find_issue_snapshots_in_commit_paths_that_changed
 from sciit.cli.styling import Styling
 
-from sciit.regex import get_file_object_pattern, IssuePropertyRegularExpressions, add_comment_chars, \
+from sciit.regex import IssuePropertyRegularExpressions, add_comment_chars, \
     strip_comment_chars, get_issue_property_regex
 
 
@@ -15,11 +14,10 @@ def do_commit_contains_duplicate_issue_file_paths_check(issue_repository, commit
 
     git_repository = issue_repository.git_repository
 
-    ignored_files = get_sciit_ignore_path_spec(issue_repository.git_repository)
-
     issue_snapshots, _, _ = \
         find_issue_snapshots_in_commit_paths_that_changed(
-            commit, git_working_dir=git_repository.working_dir, ignore_files=ignored_files)
+            commit, git_working_dir=git_repository.working_dir, path_filter=issue_repository.path_filter,
+            branch_index=issue_repository.branch_index, comment_syntax=issue_repository.comment_syntax)
 
     if len(set(issue_snapshots)) != len(issue_snapshots):
         file_paths_by_issue_id = dict()
@@ -174,7 +172,8 @@ def update_issue(issue_repository, issue, changes, message=None, push=False):
 
         with git_commit_to_issue(issue_repository, branch, _message, push) as commit_to_issue:
 
-            new_sciit_issue_file_content = _get_changed_file_content(issue, changes, branch)
+            new_sciit_issue_file_content = \
+                _get_changed_file_content(issue, changes, branch, issue_repository.comment_syntax)
 
             with open(issue.working_file_path(branch), 'w') as sciit_issue_file:
                 sciit_issue_file.write(new_sciit_issue_file_content)
@@ -182,9 +181,9 @@ def update_issue(issue_repository, issue, changes, message=None, push=False):
             commit_to_issue.file_paths.append(issue.file_path)
 
 
-def _get_changed_file_content(sciit_issue, changes, branch):
+def _get_changed_file_content(sciit_issue, changes, branch, comment_syntax):
 
-    comment_pattern = get_file_object_pattern(sciit_issue.file_path)
+    comment_pattern = comment_syntax.comment_pattern(sciit_issue.file_path)
 
     with open(sciit_issue.working_file_path(branch), 'r') as sciit_issue_file:
 
@@ -1,3 +1,4 @@
+import datetime
 import os
 import stat
 import shutil
@@ -47,7 +48,11 @@ def create_mock_commit(hexsha, author_name, authored_datetime, parents=list()):
     mock_commit = MagicMock()
     mock_commit.hexsha = hexsha
     mock_commit.author.name = author_name
+    mock_commit.author.email = author_name.lower() + '@example.com'
     mock_commit.authored_datetime = authored_datetime
+    mock_commit.authored_date = int(authored_datetime.replace(tzinfo=datetime.timezone.utc).timestamp())
+    mock_commit.author_tz_offset = 0
+    mock_commit.summary = 'Commit ' + hexsha
     mock_commit.parents = parents
     mock_commit.repo.git.execute = MagicMock(return_value="master")
     return mock_commit
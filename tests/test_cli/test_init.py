@@ -13,6 +13,8 @@ class TestInitCommand(TestCase):
     def setUp(self):
         self.held, sys.stdout = sys.stdout, StringIO()
         self.mock_args = Mock()
+        self.mock_args.max_blob_size = None
+        self.mock_args.jobs = None
         mock_git_repository = create_mock_git_repository('there', list(), list())
 
         self.mock_args.repo = IssueRepo(mock_git_repository)
@@ -25,6 +27,20 @@ class TestInitCommand(TestCase):
     def tearDown(self):
         remove_existing_repo('there')
 
+    def test_init_max_blob_size(self):
+        self.mock_args.reset = False
+        self.mock_args.max_blob_size = 2
+        init(self.mock_args)
+
+        self.assertEqual(2 * 1024 * 1024, self.mock_args.repo.max_blob_size)
+
+    def test_init_jobs(self):
+        self.mock_args.reset = False
+        self.mock_args.jobs = 4
+        init(self.mock_args)
+
+        self.assertEqual(4, self.mock_args.repo.jobs)
+
     def test_init_reset_repo_exists_no_commits(self):
         self.mock_args.reset = True
         self.mock_args.repo.setup_file_system_resources()
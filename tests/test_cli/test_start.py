@@ -39,6 +39,24 @@ class TestCLIStartup(TestCase):
             start.main()
             self.assertIn('usage: git sciit [-h] [-v]', sys.stdout.getvalue())
 
+    def test_max_blob_size_must_be_positive(self):
+        parser = start.create_command_parser(MagicMock())
+        self.assertEqual(5, parser.parse_args(['init', '-m', '5']).max_blob_size)
+
+        for max_blob_size in ('0', '-1', 'large'):
+            with patch.object(sys, 'stderr', StringIO()) as stderr, self.assertRaises(SystemExit):
+                parser.parse_args(['init', '--max-blob-size', max_blob_size])
+            self.assertIn('--max-blob-size', stderr.getvalue())
+
+    def test_jobs_must_be_positive(self):
+        parser = start.create_command_parser(MagicMock())
+        self.assertEqual(2, parser.parse_args(['init', '-j', '2']).jobs)
+
+        for jobs in ('0', '-1', 'all'):
+            with patch.object(sys, 'stderr', StringIO()) as stderr, self.assertRaises(SystemExit):
+                parser.parse_args(['init', '--jobs', jobs])
+            self.assertIn('--jobs', stderr.getvalue())
+
     @patch('argparse.ArgumentParser.parse_args', new_callable=Mock)
     def test_init_command_runs_smoothly(self, parse_args):
         args = Mock()
@@ -46,6 +64,8 @@ class TestCLIStartup(TestCase):
         args.func = init
         args.reset = False
         args.synchronize = False
+        args.max_blob_size = None
+        args.jobs = None
         parse_args.return_value = args
 
         start.main()
@@ -21,7 +21,7 @@ class TestStatusCommand(TestCase):
     @patch('sciit.cli.status.page', new_callable=Mock)
     def test_prints_correct_status_info(self, page):
         self.args.revision = False
-        self.args.repo.get_all_issues.return_value = {str(i): issues[str(i)] for i in [1, 2, 3, 4, 5, 6, 9, 12]}
+        self.args.repo.get_issue_states.return_value = {str(i): issues[str(i)] for i in [1, 2, 3, 4, 5, 6, 9, 12]}
 
         status(self.args)
         print(page.call_args)
@@ -0,0 +1,24 @@
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from sciit.blob_parser_pool import BlobParserPool
+
+
+class TestBlobParserPool(TestCase):
+
+    @patch('sciit.blob_parser_pool.ProcessPoolExecutor')
+    def test_close_cancels_tasks_still_to_run(self, executor_constructor):
+        executor = executor_constructor.return_value
+        finished_task, pending_task = Mock(), Mock()
+        finished_task.done.return_value = True
+        pending_task.done.return_value = False
+        executor.submit.side_effect = [finished_task, pending_task]
+
+        pool = BlobParserPool('/repo', jobs=1)
+        pool.submit([('a' * 40, 'pattern')])
+        pool.submit([('b' * 40, 'pattern')])
+        pool.close()
+
+        finished_task.cancel.assert_not_called()
+        pending_task.cancel.assert_called_once_with()
+        executor.shutdown.assert_called_once_with(wait=True)
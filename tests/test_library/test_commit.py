@@ -1,17 +1,34 @@
+import io
 import random
 import string
+from collections import Counter
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock, patch
 
-from pathspec import PathSpec
-
-from sciit.read_commit import find_issue_snapshots_in_commit_paths_that_changed, extract_issue_data_from_comment_string
+from sciit.path_filter import PathFilter
+from sciit.read_blob import SkippedBlob
+from sciit.read_commit import find_issue_snapshots_in_commit_paths_that_changed, \
+    extract_issue_data_from_comment_string, _read_nul_separated_tokens, ChangedPathsStream, decode_blob_contents, \
+    _iter_changed_blobs_from_raw_log
 
 
 def random_40_chars():
     return [random.SystemRandom().choice(string.ascii_letters + string.digits) for _ in range(40)]
 
 
+class MasterBranchIndex:
+    """
+    Stands in for the branch membership index of a repository with all of its commits on master.
+    """
+
+    def __init__(self, working_dir):
+        self.working_dir = working_dir
+
+    @staticmethod
+    def branches_for_commit(_):
+        return ['master']
+
+
 class TestFindIssuesInCommit(TestCase):
 
     @staticmethod
@@ -21,10 +38,28 @@ class TestFindIssuesInCommit(TestCase):
         tree.blobs = blobs
         return tree
 
+    @staticmethod
+    def create_tree_lookup(tree):
+        def all_blobs(sub_tree):
+            blobs = {blob.path: blob for blob in sub_tree.blobs}
+            for sub_sub_tree in sub_tree.trees:
+                blobs.update(all_blobs(sub_sub_tree))
+            return blobs
+
+        blobs_by_path = all_blobs(tree)
+
+        def join(path):
+            if path not in blobs_by_path:
+                raise KeyError(path)
+            return blobs_by_path[path]
+
+        return join
+
     @staticmethod
     def create_commit_mock(trees=list(), blobs=list(), commit_files=None):
         commit = Mock()
         commit.tree = TestFindIssuesInCommit.create_tree_mock(trees, blobs)
+        commit.tree.join.side_effect = TestFindIssuesInCommit.create_tree_lookup(commit.tree)
         if not commit_files:
             commit_files = [blob.path for blob in commit.tree.blobs]
         commit.stats.files.keys.return_value = commit_files
@@ -43,7 +78,7 @@ class TestFindIssuesInCommit(TestCase):
         blob.data_stream.read = Mock(return_value=content)
         return blob
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_no_issues_one_changed_file(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -56,7 +91,7 @@ class TestFindIssuesInCommit(TestCase):
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def _tests_retrieve_one_issue_from_commit(self,
                                               commit,
                                               expected_number_of_issues=1,
@@ -162,7 +197,7 @@ class TestFindIssuesInCommit(TestCase):
         self._tests_retrieve_one_issue_from_commit(
             commit, expected_number_of_issues=2, comment_char_that_should_be_filtered='#')
 
-    @patch('sciit.read_commit._find_branches_for_commit', new_callable=MagicMock())
+    @patch('sciit.read_commit.BranchMembershipIndex', new_callable=MagicMock())
     def test_no_issues_one_changed_supported_file_no_pattern(self, _):
         commit = self.create_commit_mock(
             blobs=[
@@ -181,7 +216,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertEqual(len(issue_snapshots), 1)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_no_issues_one_changed_unsupported_file_no_pattern(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -200,7 +235,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_no_issues_multiple_changed_files(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -216,7 +251,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_no_issues_renamed_file_change(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -232,7 +267,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_no_issues_multiple_changed_files_in_trees(self):
 
         commit = self.create_commit_mock(
@@ -260,7 +295,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_skips_unicode_error_one_file(self):
 
         commit = self.create_commit_mock(
@@ -276,7 +311,98 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertFalse(issue_snapshots)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
+    def test_only_changed_paths_are_resolved_in_tree(self):
+        commit = self.create_commit_mock(
+            trees=[
+                self.create_tree_mock(
+                    blobs=[
+                        self.create_blob_mock(
+                            content=''.join(random_40_chars()).encode(),
+                            mime_type='text',
+                            path='docs/file' + str(i) + '.py'
+                        ) for i in range(12)
+                    ]
+                )
+            ],
+            commit_files=['docs/file9.py', 'deleted.py']
+        )
+
+        find_issue_snapshots_in_commit_paths_that_changed(commit)
+        looked_up_paths = {call[0][0] for call in commit.tree.join.call_args_list}
+        self.assertEqual({'docs/file9.py', 'deleted.py'}, looked_up_paths)
+
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
+    @patch('sciit.read_commit.decode_blob_contents', wraps=decode_blob_contents)
+    def test_blobs_without_issue_markers_are_skipped(self, decode):
+        commit = self.create_commit_mock(
+            blobs=[
+                self.create_blob_mock(
+                    content=b'"""\n@title only a title\n"""\n', mime_type='text/x-python', path='title.py'),
+                self.create_blob_mock(content=b'\xff\xfe not text', mime_type='text/x-python', path='binary.py'),
+                self.create_blob_mock(content=b'"""\n@Issue 2\n"""\n', mime_type='text/x-python', path='issue.py')
+            ]
+        )
+
+        scan_counts = Counter()
+        issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit, scan_counts=scan_counts)
+
+        self.assertEqual(['2'], [issue_snapshot.issue_id for issue_snapshot in issue_snapshots])
+        self.assertEqual(2, scan_counts['blobs_without_issue_markers'])
+        decode.assert_called_once_with(b'"""\n@Issue 2\n"""\n')
+
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
+    def test_skipped_blobs_are_counted(self):
+        blobs = [
+            self.create_blob_mock(content=b'"""\n@issue 1\n"""\n\0', mime_type='text/x-python', path='binary.py'),
+            self.create_blob_mock(content=b'"""\n@issue 2\n"""\n', mime_type='text/x-python', path='large.py'),
+            self.create_blob_mock(content=b'"""\n@issue 3\n"""\n', mime_type='text/x-python', path='issue.py')
+        ]
+        for hexsha, blob in zip('abc', blobs):
+            blob.hexsha = hexsha * 40
+        commit = self.create_commit_mock(blobs=blobs)
+
+        blob_reader = MagicMock()
+        blob_reader.read_blobs.return_value = {
+            'a' * 40: blobs[0].data_stream.read(),
+            'b' * 40: SkippedBlob(SkippedBlob.TOO_LARGE, 20 * 1024 * 1024),
+            'c' * 40: blobs[2].data_stream.read()
+        }
+
+        scan_counts = Counter()
+        issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(
+            commit, blob_reader=blob_reader, scan_counts=scan_counts)
+
+        self.assertEqual(['3'], [issue_snapshot.issue_id for issue_snapshot in issue_snapshots])
+        self.assertEqual(1, scan_counts['binary_blobs'])
+        self.assertEqual(1, scan_counts['blobs_too_large'])
+
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
+    def test_parsed_blobs_are_recorded_and_not_read_again(self):
+        blob = self.create_blob_mock(content=b'"""\n@issue 2\n"""\n', mime_type='text/x-python', path='issue.py')
+        blob.hexsha = 'b' * 40
+        commit = self.create_commit_mock(blobs=[blob])
+
+        parsed_blob_store = MagicMock()
+        parsed_blob_store.read_issue_data.return_value = dict()
+
+        find_issue_snapshots_in_commit_paths_that_changed(commit, parsed_blob_store=parsed_blob_store)
+        blob_sha, comment_pattern, issue_data = parsed_blob_store.write_issue_data.call_args[0]
+        self.assertEqual(blob.hexsha, blob_sha)
+
+        parsed_blob_store.read_issue_data.return_value = {(blob_sha, comment_pattern): issue_data}
+        blob.data_stream.read.reset_mock()
+        scan_counts = Counter()
+
+        issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(
+            commit, scan_counts=scan_counts, parsed_blob_store=parsed_blob_store)
+
+        self.assertEqual(['2'], [issue_snapshot.issue_id for issue_snapshot in issue_snapshots])
+        self.assertEqual('issue.py', issue_snapshots[0].file_path)
+        self.assertEqual(1, scan_counts['blobs_parsed_before'])
+        blob.data_stream.read.assert_not_called()
+
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_contains_issues_multiple_changed_files(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -294,7 +420,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertEqual(len(issue_snapshots), 3)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_contains_issues_multiple_changed_files_multiple_trees(self):
         commit = self.create_commit_mock(
             trees=[
@@ -323,7 +449,7 @@ value that has some contents
         issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit)
         self.assertEqual(len(issue_snapshots), 2)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_commit_ignores_certain_files(self):
 
         commit = self.create_commit_mock(
@@ -339,11 +465,28 @@ value that has some contents
 
         commit.tree.blobs[3].contents = b'This one has no issue in it'
 
-        ignored_files = PathSpec.from_lines('gitignore', ['README*'])
-        issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(commit, ignored_files)
+        issue_snapshots, _, _ = find_issue_snapshots_in_commit_paths_that_changed(
+            commit, path_filter=PathFilter(['README*']))
         self.assertEqual(len(issue_snapshots), 0)
 
-    @patch('sciit.read_commit._find_branches_for_commit', MagicMock(return_value=['master']))
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
+    def test_commit_reads_only_paths_in_filter(self):
+        commit = self.create_commit_mock(
+            blobs=[
+                self.create_blob_mock(content=b'#***\n# @issue 1\n#***', mime_type='text/plain', path='vendor/README'),
+                self.create_blob_mock(content=b'#***\n# @issue 2\n#***', mime_type='text/plain', path='src/README'),
+                self.create_blob_mock(content=b'#***\n# @issue 3\n#***', mime_type='text/plain', path='README')
+            ],
+            commit_files=['vendor/README', 'src/README', 'README']
+        )
+
+        issue_snapshots, files_changed_in_commit, _ = find_issue_snapshots_in_commit_paths_that_changed(
+            commit, path_filter=PathFilter(['vendor/'], ['src/']))
+
+        self.assertEqual(['2'], [issue_snapshot.issue_id for issue_snapshot in issue_snapshots])
+        self.assertEqual({'src/README'}, files_changed_in_commit)
+
+    @patch('sciit.read_commit.BranchMembershipIndex', MasterBranchIndex)
     def test_commit_skip_ignore_file_does_not_exist(self):
         commit = self.create_commit_mock(
             blobs=[
@@ -360,6 +503,103 @@ value that has some contents
         self.assertEqual(3, len(issue_snapshots))
 
 
+class TestChangedPathsStream(TestCase):
+
+    first_sha = 'a' * 40
+    merge_sha = 'b' * 40
+    empty_sha = 'c' * 40
+
+    raw_log = \
+        first_sha.encode() + b'\0\n' + \
+        b':000000 100644 ' + b'0' * 40 + b' ' + b'1' * 40 + b' A\0README.md\0' + \
+        b':100644 100644 ' + b'1' * 40 + b' ' + b'2' * 40 + b' M\0docs/with space.py\0' + \
+        merge_sha.encode() + b'\0\n' + \
+        b':100644 000000 ' + b'1' * 40 + b' ' + b'0' * 40 + b' D\0README.md\0' + \
+        merge_sha.encode() + b'\0\n' + \
+        b':000000 100644 ' + b'0' * 40 + b' ' + b'3' * 40 + b' A\0second/parent.c\0' + \
+        empty_sha.encode() + b'\0'
+
+    def test_reads_tokens_across_chunks(self):
+        tokens = list(_read_nul_separated_tokens(io.BytesIO(b'abc\0defgh\0ij'), chunk_size=2))
+        self.assertEqual([b'abc', b'defgh', b'ij'], tokens)
+
+    def test_parses_changed_paths_for_each_commit(self):
+        changed_blobs = dict(_iter_changed_blobs_from_raw_log(_read_nul_separated_tokens(io.BytesIO(self.raw_log))))
+        self.assertEqual({'README.md', 'docs/with space.py'}, set(changed_blobs[self.first_sha]))
+        self.assertEqual(dict(), changed_blobs[self.empty_sha])
+
+    def test_merge_commit_changes_are_against_first_parent(self):
+        changed_blobs = dict(_iter_changed_blobs_from_raw_log(_read_nul_separated_tokens(io.BytesIO(self.raw_log))))
+        self.assertEqual({'README.md'}, set(changed_blobs[self.merge_sha]))
+
+    def test_parses_blobs_changed_paths_hold(self):
+        changed_blobs = dict(_iter_changed_blobs_from_raw_log(_read_nul_separated_tokens(io.BytesIO(self.raw_log))))
+        self.assertEqual(
+            {'README.md': (0o100644, '1' * 40), 'docs/with space.py': (0o100644, '2' * 40)},
+            changed_blobs[self.first_sha])
+        self.assertEqual({'README.md': None}, changed_blobs[self.merge_sha])
+
+    @patch('sciit.read_commit.subprocess.Popen')
+    def test_blobs_are_taken_from_stream(self, popen):
+        popen.return_value.stdout = io.BytesIO(self.raw_log)
+        stream = ChangedPathsStream(MagicMock(), [self.first_sha, self.merge_sha])
+
+        commit = Mock(hexsha=self.first_sha)
+        blobs = stream.blobs_changed_in_commit(commit)
+        self.assertEqual('2' * 40, blobs['docs/with space.py'].hexsha)
+        self.assertEqual('with space.py', blobs['docs/with space.py'].name)
+        self.assertEqual({'README.md': None}, stream.blobs_changed_in_commit(Mock(hexsha=self.merge_sha)))
+        commit.tree.join.assert_not_called()
+
+    def test_parses_both_paths_of_renames(self):
+        raw_log = self.first_sha.encode() + b'\0\n:100644 100644 ' + b'1' * 40 + b' ' + b'1' * 40 + \
+            b' R100\0old/name.py\0new/name.py\0'
+        changed_blobs = dict(_iter_changed_blobs_from_raw_log(_read_nul_separated_tokens(io.BytesIO(raw_log))))
+        self.assertEqual({'old/name.py': None, 'new/name.py': (0o100644, '1' * 40)}, changed_blobs[self.first_sha])
+
+    @patch('sciit.read_commit.subprocess.Popen')
+    def test_commits_requested_out_of_order_are_buffered(self, popen):
+        popen.return_value.stdout = io.BytesIO(self.raw_log)
+        stream = ChangedPathsStream(MagicMock(), [self.first_sha, self.merge_sha, self.empty_sha])
+
+        self.assertEqual({'README.md'}, set(stream.blobs_changed_in_commit(Mock(hexsha=self.merge_sha))))
+        self.assertEqual(
+            {'README.md', 'docs/with space.py'}, set(stream.blobs_changed_in_commit(Mock(hexsha=self.first_sha))))
+        self.assertEqual(1, popen.call_count)
+
+    @patch('sciit.read_commit.subprocess.Popen')
+    def test_excluded_paths_are_given_to_git(self, popen):
+        popen.return_value.stdout = io.BytesIO(self.raw_log)
+        stream = ChangedPathsStream(MagicMock(), [self.first_sha], exclude_pathspecs=[':(exclude,glob)**/vendor/**'])
+        stream.blobs_changed_in_commit(Mock(hexsha=self.first_sha))
+
+        command = popen.call_args[0][0]
+        self.assertEqual(['--full-history', '--sparse', '--', ':(exclude,glob)**/vendor/**'], command[-4:])
+
+    @patch('sciit.read_commit.subprocess.run')
+    @patch('sciit.read_commit.subprocess.Popen')
+    def test_commits_not_given_are_not_waited_for(self, popen, run):
+        popen.return_value.stdout = io.BytesIO(self.raw_log)
+        run.return_value.stdout = b''
+        stream = ChangedPathsStream(MagicMock(), [self.first_sha, self.merge_sha, self.empty_sha])
+        stream.blobs_changed_in_commit(Mock(hexsha=self.first_sha))
+
+        self.assertEqual(dict(), stream.blobs_changed_in_commit(Mock(hexsha='d' * 40)))
+        self.assertEqual(dict(), stream._buffered_changed_blobs)
+
+    @patch('sciit.read_commit.subprocess.run')
+    @patch('sciit.read_commit.subprocess.Popen')
+    def test_blobs_of_commit_missing_from_stream_are_listed_by_git(self, popen, run):
+        popen.return_value.stdout = io.BytesIO(self.raw_log)
+        missing_sha = 'd' * 40
+        run.return_value.stdout = \
+            missing_sha.encode() + b'\0\n' + b':100644 000000 ' + b'1' * 40 + b' ' + b'0' * 40 + b' D\0README.md\0'
+        stream = ChangedPathsStream(MagicMock(), [self.first_sha])
+
+        self.assertEqual({'README.md': None}, stream.blobs_changed_in_commit(Mock(hexsha=missing_sha)))
+        self.assertEqual((missing_sha + '\n').encode(), run.call_args[1]['input'])
+
+
 class TestFindIssueInComment(TestCase):
 
     def test_no_issue_data_if_id_not_specified(self):
@@ -0,0 +1,203 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from git.exc import GitCommandError
+
+from sciit.commit_index import BranchMembershipIndex, CommitChildIndex
+from sciit.store import IssueSnapshotStore
+from tests.external_resources import safe_create_repo_dir, remove_existing_repo
+
+
+class FakeGit:
+    """
+    Answers the git commands used by the commit graph indexes from a fixed commit graph.
+    """
+
+    def __init__(self, parents, branch_tips):
+        self.parents = parents
+        self.branch_tips = branch_tips
+        self.commands = list()
+
+    def _reachable(self, tips):
+        result, pending = list(), list(tips)
+        while pending:
+            hexsha = pending.pop(0)
+            if hexsha not in result:
+                result.append(hexsha)
+                pending.extend(self.parents[hexsha])
+        return result
+
+    def execute(self, command):
+        self.commands.append(command)
+        if command[1] == 'for-each-ref':
+            return '\n'.join('%s refs/heads/%s' % (tip, name) for name, tip in self.branch_tips.items())
+        elif '--left-right' in command:
+            old_tip, tip = command[-1].split('...')
+            if old_tip not in self.parents:
+                raise GitCommandError(command, 128)
+            old_commits, new_commits = self._reachable([old_tip]), self._reachable([tip])
+            return '\n'.join(['<' + h for h in old_commits if h not in new_commits] +
+                             ['>' + h for h in new_commits if h not in old_commits])
+        elif command[1] == 'rev-parse':
+            raise GitCommandError(command, 1)
+        elif command[1] == 'merge-base':
+            if command[-2] not in self._reachable([command[-1]]):
+                raise GitCommandError(command, 1)
+            return ''
+        elif command[2:4] == ['--parents', '--all']:
+            return '\n'.join(' '.join([h] + self.parents[h]) for h in self._reachable(self.branch_tips.values()))
+        elif command[2] == '--parents':
+            tips, excluded_tips = command[3:command.index('--not')], command[command.index('--not') + 1:]
+            excluded = self._reachable(excluded_tips)
+            return '\n'.join(' '.join([h] + self.parents[h]) for h in self._reachable(tips) if h not in excluded)
+        elif '--parents' in command:
+            return '\n'.join(' '.join([h] + self.parents[h]) for h in self._topological_order(command[4:]))
+        else:
+            return '\n'.join(self._reachable(command[2:]))
+
+    def _topological_order(self, tips):
+        reachable = self._reachable(tips)
+        result = list()
+
+        def visit(hexsha):
+            if hexsha in result:
+                return
+            for child in [h for h in reachable if hexsha in self.parents[h]]:
+                visit(child)
+            result.append(hexsha)
+
+        for hexsha in reachable:
+            visit(hexsha)
+        return result
+
+
+class TestBranchMembershipIndex(TestCase):
+
+    def setUp(self):
+        self.fake_git = FakeGit(
+            parents={'a': [], 'b': ['a'], 'c': ['a'], 'd': ['b', 'c']},
+            branch_tips={'master': 'd', 'feature': 'c'})
+
+        with patch('sciit.commit_index.Git', return_value=self.fake_git):
+            self.branch_index = BranchMembershipIndex('working_dir')
+
+    def test_commit_branches_from_one_walk(self):
+        self.assertEqual(['feature', 'master'], self.branch_index.branches_for_commit('a'))
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('b'))
+        self.assertEqual(['feature', 'master'], self.branch_index.branches_for_commit('c'))
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('d'))
+
+        walks = [command for command in self.fake_git.commands if command[1] == 'rev-list']
+        self.assertEqual(1, len(walks))
+
+    def test_unknown_commit_belongs_to_no_branches(self):
+        self.assertEqual([], self.branch_index.branches_for_commit('z'))
+
+    def test_lookups_do_not_recheck_refs_until_invalidated(self):
+        self.branch_index.branches_for_commit('a')
+        self.branch_index.branches_for_commit('z')
+        self.assertEqual(2, len(self.fake_git.commands))
+
+    def test_index_is_extended_when_branch_moves(self):
+        self.branch_index.branches_for_commit('a')
+
+        self.fake_git.parents['e'] = ['c']
+        self.fake_git.branch_tips['feature'] = 'e'
+        self.branch_index.invalidate()
+
+        self.assertEqual(['feature'], self.branch_index.branches_for_commit('e'))
+        self.assertEqual(['feature', 'master'], self.branch_index.branches_for_commit('c'))
+        self.assertIn(['git', 'rev-list', '--left-right', 'c...e'], self.fake_git.commands)
+
+    def test_commits_leave_branch_when_it_is_reset(self):
+        self.branch_index.branches_for_commit('a')
+
+        self.fake_git.branch_tips['master'] = 'b'
+        self.branch_index.invalidate()
+
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('b'))
+        self.assertEqual(['feature'], self.branch_index.branches_for_commit('c'))
+        self.assertEqual([], self.branch_index.branches_for_commit('d'))
+
+    def test_new_and_deleted_branches(self):
+        self.branch_index.branches_for_commit('a')
+
+        del self.fake_git.branch_tips['feature']
+        self.fake_git.branch_tips['hotfix'] = 'b'
+        self.branch_index.invalidate()
+
+        self.assertEqual(['hotfix', 'master'], self.branch_index.branches_for_commit('a'))
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('c'))
+
+    def test_commits_past_the_first_byte_of_the_bitmaps(self):
+        self.fake_git.parents.update({'m%02d' % number: ['m%02d' % (number - 1)] for number in range(1, 20)})
+        self.fake_git.parents['m00'] = ['d']
+        self.fake_git.branch_tips.update({'master': 'm19', 'feature': 'm09'})
+        self.branch_index.branches_for_commit('a')
+
+        self.assertEqual(['feature', 'master'], self.branch_index.branches_for_commit('m09'))
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('m10'))
+
+        self.fake_git.parents.update({'f%02d' % number: ['m09'] for number in range(20)})
+        self.fake_git.parents.update({'f%02d' % number: ['f%02d' % (number - 1)] for number in range(1, 20)})
+        self.fake_git.branch_tips['feature'] = 'f19'
+        self.branch_index.invalidate()
+
+        self.assertEqual(['feature'], self.branch_index.branches_for_commit('f19'))
+        self.assertEqual(['feature', 'master'], self.branch_index.branches_for_commit('m09'))
+        self.assertEqual(['master'], self.branch_index.branches_for_commit('m19'))
+
+
+class TestCommitChildIndex(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.store = IssueSnapshotStore('store_dir/issues.db')
+
+        self.fake_git = FakeGit(
+            parents={'a': [], 'b': ['a'], 'c': ['a'], 'd': ['b', 'c']},
+            branch_tips={'master': 'd', 'feature': 'c'})
+
+    def _make_child_index(self):
+        with patch('sciit.commit_index.Git', return_value=self.fake_git):
+            return CommitChildIndex('working_dir', self.store)
+
+    def test_children_are_listed_latest_reached_first(self):
+        child_index = self._make_child_index()
+
+        self.assertEqual(['b', 'c'], child_index.children('a'))
+        self.assertEqual(['d'], child_index.children('c'))
+        self.assertEqual([], child_index.children('d'))
+
+    def test_index_is_recorded_in_store(self):
+        self._make_child_index().update()
+        self.fake_git.commands.clear()
+
+        child_index = self._make_child_index()
+        self.assertEqual(['b', 'c'], child_index.children('a'))
+        self.assertEqual([], [command for command in self.fake_git.commands if command[1] == 'rev-list'])
+
+    def test_index_is_extended_when_refs_move_forward(self):
+        self._make_child_index().update()
+
+        self.fake_git.parents['e'] = ['c']
+        self.fake_git.branch_tips['feature'] = 'e'
+        child_index = self._make_child_index()
+
+        self.assertEqual(['d', 'e'], child_index.children('c'))
+        self.assertEqual(['b', 'c'], child_index.children('a'))
+        self.assertIn(['git', 'rev-list', '--parents', 'e', '--not', 'c', 'd'], self.fake_git.commands)
+
+    def test_index_is_rebuilt_when_ref_is_rewritten(self):
+        self._make_child_index().update()
+
+        self.fake_git.parents['e'] = ['a']
+        self.fake_git.branch_tips['feature'] = 'e'
+        child_index = self._make_child_index()
+
+        self.assertEqual(['c', 'b', 'e'], child_index.children('a'))
+        self.assertEqual(['d'], child_index.children('c'))
+
+    def tearDown(self):
+        self.store.close()
+        remove_existing_repo('store_dir')
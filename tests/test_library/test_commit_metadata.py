@@ -0,0 +1,84 @@
+import datetime
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from sciit.commit_metadata import CommitMetadataCache, read_commit_metadata_rows_from_git
+from sciit.store import IssueSnapshotStore
+from tests.external_resources import safe_create_repo_dir, remove_existing_repo
+
+
+class TestCommitMetadata(TestCase):
+
+    first_sha = 'a' * 40
+    second_sha = 'b' * 40
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.store = IssueSnapshotStore('store_dir/issues.db')
+        self.git_repository = MagicMock()
+        self.cache = CommitMetadataCache(self.git_repository, self.store)
+
+        self.store.write_commit_metadata_rows([
+            (self.first_sha, '', 'Nystrome', 'nystrome@example.com', 1514764800, -3600, 'First commit'),
+            (self.second_sha, self.first_sha, 'Nystrome', 'nystrome@example.com', 1514851200, 0, 'Second commit')
+        ])
+
+    def test_commit_is_read_from_recorded_metadata(self):
+        commit = self.cache.commit(self.second_sha)
+
+        self.assertEqual('Nystrome', commit.author.name)
+        self.assertEqual('nystrome@example.com', commit.author.email)
+        self.assertEqual('Second commit', commit.summary)
+        self.assertEqual([self.first_sha], [parent.hexsha for parent in commit.parents])
+        self.git_repository.git.execute.assert_not_called()
+
+    def test_authored_datetime_keeps_author_timezone(self):
+        authored_datetime = self.cache.commit(self.first_sha).authored_datetime
+
+        self.assertEqual(datetime.datetime(2018, 1, 1, 1, 0), authored_datetime.replace(tzinfo=None))
+        self.assertEqual(datetime.timedelta(hours=1), authored_datetime.utcoffset())
+
+    def test_commits_are_equal_to_commits_with_the_same_hexsha(self):
+        commit = self.cache.commit(self.first_sha)
+
+        self.assertEqual(MagicMock(hexsha=self.first_sha), commit)
+        self.assertIn(commit, self.cache.commit(self.second_sha).parents)
+        self.assertIs(commit, self.cache.commit(self.first_sha))
+
+    @patch('sciit.commit_metadata.Commit')
+    def test_other_attributes_are_read_from_git_commit(self, commit_constructor):
+        commit_constructor.return_value.message = 'First commit\n\nWith a body'
+
+        commit = self.cache.commit(self.first_sha)
+        self.assertEqual('First commit\n\nWith a body', commit.message)
+        self.assertEqual('First commit\n\nWith a body', commit.message)
+        commit_constructor.assert_called_once()
+
+    def test_unrecorded_metadata_is_read_from_git_and_recorded(self):
+        third_sha = 'c' * 40
+        self.git_repository.git.execute.return_value = \
+            f'{third_sha}\n{self.second_sha}\nNystrome\nnystrome@example.com\n1514937600 +0000\nThird\n\nBody\n\0'
+
+        commit = self.cache.commit(third_sha)
+        self.assertEqual('Third', commit.summary)
+        self.assertIn(third_sha, self.store.read_commit_metadata_rows([third_sha]))
+
+    def tearDown(self):
+        self.store.close()
+        remove_existing_repo('store_dir')
+
+
+class TestReadCommitMetadataFromGit(TestCase):
+
+    def test_log_records_are_parsed(self):
+        git_repository = MagicMock()
+        git_repository.git.execute.return_value = \
+            'a\n\nNystrome\nnystrome@example.com\n1514764800 +0100\nFirst\n\0' \
+            'b\na c\nNystrome\nnystrome@example.com\n1514851200 -0230\nMerge\nsecond line\n\0'
+
+        rows = read_commit_metadata_rows_from_git(git_repository, ['a', 'b'])
+
+        self.assertEqual([
+            ('a', '', 'Nystrome', 'nystrome@example.com', 1514764800, -3600, 'First'),
+            ('b', 'a c', 'Nystrome', 'nystrome@example.com', 1514851200, 9000, 'Merge')
+        ], rows)
@@ -0,0 +1,100 @@
+from collections import Counter
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from sciit.ingestion_pipeline import IngestionPipeline
+from sciit.read_blob import SkippedBlob
+from sciit.regex import C_STYLE
+from sciit.store import ParsedBlobStore
+from tests.external_resources import safe_create_repo_dir, remove_existing_repo
+
+
+class FakeBlobReader:
+
+    def __init__(self, contents_by_hexsha):
+        self.contents_by_hexsha = contents_by_hexsha
+        self.hexshas_read = list()
+
+    def read_blobs(self, hexshas, comment_patterns_by_hexsha=None):
+        self.hexshas_read.extend(hexshas)
+        return {hexsha: self.contents_by_hexsha[hexsha] for hexsha in hexshas if hexsha in self.contents_by_hexsha}
+
+
+class TestIngestionPipeline(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('pipeline_dir')
+        self.db_path = 'pipeline_dir/parsed-blobs.db'
+
+        self.blob_reader = FakeBlobReader({
+            'a': b'/*\n * @issue issue-a\n * @title A\n */\n',
+            'b': b'/*\n * @issue issue-b\n * @title B\n */\n',
+            'big': SkippedBlob(SkippedBlob.TOO_LARGE, 10 ** 9)
+        })
+
+        # The blob in the first and third commits is found on both sides of the parsed blobs flushed after the second.
+        self.blobs_in_commits = [['a', 'big', 'gone'], ['a', 'b'], ['a', 'big', 'gone'], ['b', 'big']]
+
+    def ingest(self, queue_size):
+        commits = [MagicMock(hexsha=str(number)) for number in range(len(self.blobs_in_commits))]
+        blobs_for_scanning = {
+            commit.hexsha: [(hexsha + '.c', MagicMock(hexsha=hexsha), C_STYLE) for hexsha in hexshas]
+            for commit, hexshas in zip(commits, self.blobs_in_commits)}
+
+        parsed_blob_store = ParsedBlobStore(self.db_path, 1, check_same_thread=False)
+        lookup_blob_store = ParsedBlobStore(self.db_path, 1, check_same_thread=False)
+        _ = parsed_blob_store.connection, lookup_blob_store.connection
+
+        written = list()
+        scan_counts = Counter()
+
+        def find_blobs_for_scanning_in_commit(commit, **_):
+            return blobs_for_scanning[commit.hexsha], {path for path, _, _ in blobs_for_scanning[commit.hexsha]}, \
+                ['master']
+
+        with patch('sciit.ingestion_pipeline.find_blobs_for_scanning_in_commit', find_blobs_for_scanning_in_commit), \
+                patch.object(IngestionPipeline, 'COMMITS_PER_PARSED_BLOB_FLUSH', 2):
+            pipeline = IngestionPipeline(
+                commits,
+                lambda commit, issue_snapshots, *_: written.append(
+                    (commit.hexsha, sorted(snapshot.issue_id for snapshot in issue_snapshots))),
+                MagicMock(), self.blob_reader, parsed_blob_store, lookup_blob_store, scan_counts,
+                queue_size=queue_size)
+            pipeline.run()
+
+        parsed_blob_store.close()
+        lookup_blob_store.close()
+        return written, scan_counts
+
+    def test_blobs_are_read_once_and_counted_as_if_read_in_turn(self):
+        for queue_size in (1, 32):
+            with self.subTest(queue_size=queue_size):
+                remove_existing_repo('pipeline_dir')
+                safe_create_repo_dir('pipeline_dir')
+                self.blob_reader.hexshas_read = list()
+
+                written, scan_counts = self.ingest(queue_size)
+
+                self.assertEqual(
+                    [('0', ['issue-a']), ('1', ['issue-a', 'issue-b']), ('2', ['issue-a']), ('3', ['issue-b'])],
+                    written)
+                self.assertEqual(1, self.blob_reader.hexshas_read.count('a'))
+                self.assertEqual(1, self.blob_reader.hexshas_read.count('b'))
+
+                # The large blob is skipped each time it is found, and the missing one is never counted.
+                self.assertEqual(3, scan_counts['blobs_too_large'])
+                self.assertEqual(3, scan_counts['blobs_parsed_before'])
+
+    def test_blobs_found_again_before_they_are_flushed_are_not_read_again(self):
+        self.blobs_in_commits = [['a'], ['a'], ['a']]
+
+        with patch.object(ParsedBlobStore, 'flush') as flush:
+            written, scan_counts = self.ingest(queue_size=32)
+
+        flush.assert_called_once_with()
+        self.assertEqual(['a'], self.blob_reader.hexshas_read)
+        self.assertEqual([('0', ['issue-a']), ('1', ['issue-a']), ('2', ['issue-a'])], written)
+        self.assertEqual(2, scan_counts['blobs_parsed_before'])
+
+    def tearDown(self):
+        remove_existing_repo('pipeline_dir')
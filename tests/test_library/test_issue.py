@@ -1,8 +1,80 @@
+import datetime
 import unittest
 
+from sciit import Issue, IssueSnapshot
+from sciit.cli.functions import build_issue_history
+from tests.external_resources import create_mock_commit
+
 
 class TestIssue(unittest.TestCase):
-    pass
+
+    def setUp(self):
+        self.issue_snapshots = [
+            IssueSnapshot(create_mock_commit(hexsha, 'Nystrome', datetime.datetime(2018, 1, day)), {'issue_id': '1'},
+                          ['master'])
+            for hexsha, day in [('a', 3), ('b', 1), ('c', 2), ('d', 1), ('e', 3)]]
+
+    def test_snapshots_are_kept_in_date_order_with_ties_in_order_added(self):
+        issue = Issue('1', None, dict())
+        for issue_snapshot in self.issue_snapshots:
+            issue.add_snapshot(issue_snapshot)
+
+        self.assertEqual(['b', 'd', 'c', 'a', 'e'], [s.commit.hexsha for s in issue.issue_snapshots])
+
+    def test_snapshots_added_together_are_ordered_as_if_added_in_turn(self):
+        issue = Issue('1', None, dict())
+        issue.add_snapshot(self.issue_snapshots[0])
+        issue.add_snapshots(self.issue_snapshots[1:])
+        issue.add_snapshot(IssueSnapshot(
+            create_mock_commit('f', 'Nystrome', datetime.datetime(2018, 1, 2)), {'issue_id': '1'}, ['master']))
+
+        self.assertEqual(['b', 'd', 'c', 'f', 'a', 'e'], [s.commit.hexsha for s in issue.issue_snapshots])
+
+    def test_child_commits_are_found_once_without_a_child_index(self):
+        parent_sha, child_sha = 'a' * 40, 'b' * 40
+        commit = create_mock_commit(parent_sha, 'Nystrome', datetime.datetime(2018, 1, 1))
+        commit.repo.git.execute.return_value = f'{child_sha}\n{parent_sha} {child_sha}\n'
+        issue_snapshot = IssueSnapshot(commit, {'issue_id': '1'}, ['master'])
+
+        self.assertEqual([child_sha], [child.hexsha for child in issue_snapshot.child_commits])
+        self.assertEqual([child_sha], [child.hexsha for child in issue_snapshot.child_commits])
+        commit.repo.git.execute.assert_called_once_with(['git', 'rev-list', '--all', '--children'])
+
+
+class TestIssueDerivedValues(unittest.TestCase):
+
+    def setUp(self):
+        self.commits = [create_mock_commit(hexsha, 'Nystrome', datetime.datetime(2018, 1, day))
+                        for hexsha, day in [('1', 1), ('2', 2), ('3', 3)]]
+
+        self.issue = Issue('1', None, {'master': '3'})
+        self.issue.add_snapshots([
+            IssueSnapshot(self.commits[0], {'issue_id': '1', 'title': 'First', 'file_path': 'a.md'}, ['master']),
+            IssueSnapshot(self.commits[1], {'issue_id': '1', 'title': 'Second', 'file_path': 'a.md'}, ['master'])])
+
+    def test_rendering_issue_derives_each_value_once(self):
+        build_issue_history(self.issue, 'full')
+        build_issue_history(self.issue, 'full')
+
+        self.assertEqual({'_status', 'closing_commit', 'in_progress_commit', 'revisions', 'activity', 'file_paths',
+                          '_in_branches', '_open_in_branches', 'issue_snapshot_commit_hexshas'},
+                         set(self.issue.derivation_counts))
+        self.assertEqual({1}, set(self.issue.derivation_counts.values()))
+
+    def test_derived_values_are_cleared_when_snapshot_added(self):
+        self.assertEqual(('Closed', 'Resolved'), self.issue.status)
+        self.assertEqual(2, len(self.issue.revisions))
+
+        self.issue.add_snapshot(
+            IssueSnapshot(self.commits[2], {'issue_id': '1', 'title': 'Third', 'file_path': 'a.md'}, ['master']))
+
+        self.assertEqual(('Open', 'Accepted'), self.issue.status)
+        self.assertEqual(3, len(self.issue.revisions))
+        self.assertEqual(2, self.issue.derivation_counts['revisions'])
+
+    def test_derived_branch_sets_are_copies(self):
+        self.issue.open_in_branches.add('feature')
+        self.assertEqual(set(), self.issue.open_in_branches)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from sciit import IssueState
+from sciit.issue_dependencies import IssueDependencyGraph
+
+
+class TestIssueDependencyGraph(TestCase):
+
+    @staticmethod
+    def _make_graph(blockers):
+        return IssueDependencyGraph({
+            issue_id: IssueState(issue_id, issue_id, 'Open', 'Accepted', '', 'Nystrome', '', 'path', 'master', '',
+                                 ','.join(blocker_issue_ids))
+            for issue_id, blocker_issue_ids in blockers.items()})
+
+    def test_blockers_and_blocks(self):
+        graph = self._make_graph({'1': ['2', '3'], '2': ['3'], '3': [], '4': ['missing']})
+
+        self.assertEqual(['2', '3'], graph.blockers('1'))
+        self.assertEqual(['1', '2'], graph.blocks('3'))
+        self.assertEqual(['4'], graph.blocks('missing'))
+        self.assertEqual([], graph.blocks('1'))
+        self.assertEqual([], graph.blockers('unknown'))
+
+    def test_transitive_blockers_are_listed_nearest_first(self):
+        graph = self._make_graph({'1': ['2'], '2': ['3', '4'], '3': ['4'], '4': ['5'], '5': []})
+
+        self.assertEqual(['2', '3', '4', '5'], graph.transitive_blockers('1'))
+        self.assertEqual(['5'], graph.transitive_blockers('4'))
+        self.assertEqual([], graph.transitive_blockers('5'))
+
+    def test_transitive_blockers_of_cycle_exclude_issue(self):
+        graph = self._make_graph({'1': ['2'], '2': ['1']})
+        self.assertEqual(['2'], graph.transitive_blockers('1'))
+
+    def test_cycles(self):
+        graph = self._make_graph({
+            '1': ['2'], '2': ['3'], '3': ['1', '4'], '4': [], '5': ['5'], '6': ['7'], '7': ['6', '1']})
+
+        self.assertEqual([['1', '2', '3'], ['5'], ['6', '7']], graph.cycles())
+
+    def test_no_cycles(self):
+        graph = self._make_graph({str(number): [str(number + 1)] for number in range(5000)})
+
+        self.assertEqual([], graph.cycles())
+        self.assertEqual(5000, len(graph.transitive_blockers('0')))
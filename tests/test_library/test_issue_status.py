@@ -0,0 +1,58 @@
+import datetime
+import random
+from unittest import TestCase
+
+from sciit import Issue, IssueSnapshot
+from sciit.issue_status import classify_issue_statuses
+from tests.external_resources import create_mock_commit
+
+
+class TestClassifyIssueStatuses(TestCase):
+
+    def setUp(self):
+        self.commits = [create_mock_commit('%040x' % number, 'Nystrome', datetime.datetime(2018, 1, 1 + number % 28))
+                        for number in range(40)]
+
+    def _make_issue(self, issue_id, head_commits, snapshots):
+        issue = Issue(issue_id, None, head_commits)
+        issue.add_snapshots([IssueSnapshot(self.commits[number], {'issue_id': issue_id}, in_branches)
+                             for number, in_branches in snapshots])
+        return issue
+
+    def test_feature_branch_life_cycle(self):
+        head_commits = {'master': self.commits[3].hexsha, 'feature': self.commits[2].hexsha}
+
+        issues = [
+            self._make_issue('feature', head_commits, [(0, ['feature']), (2, ['feature'])]),
+            self._make_issue('other', head_commits, [(1, ['master']), (3, ['master'])]),
+            self._make_issue('gone', head_commits, [(1, ['master'])])
+        ]
+
+        self.assertEqual(
+            {'feature': ('Open', 'Proposed'), 'other': ('Open', 'Accepted'), 'gone': ('Closed', 'Resolved')},
+            classify_issue_statuses(issues, head_commits))
+
+    def test_statuses_are_those_of_each_issue(self):
+        rng = random.Random(7)
+        branch_names = ['master', 'a', 'b', 'c', 'd']
+
+        for _ in range(20):
+            head_commits = {name: rng.choice(self.commits).hexsha for name in branch_names if rng.random() < 0.8}
+
+            issues = list()
+            for issue_id in branch_names + ['e', 'f']:
+                snapshots = [(number, rng.sample(branch_names, rng.randint(1, 3)))
+                             for number in rng.sample(range(len(self.commits)), rng.randint(1, 10))]
+                issues.append(self._make_issue(issue_id, head_commits, snapshots))
+
+            self.assertEqual({issue.issue_id: issue.classify_status() for issue in issues},
+                             classify_issue_statuses(issues, head_commits))
+
+    def test_classified_status_is_cleared_when_history_changes(self):
+        head_commits = {'master': self.commits[3].hexsha}
+        issue = self._make_issue('1', head_commits, [(1, ['master'])])
+        issue.classified_status = classify_issue_statuses([issue], head_commits)['1']
+        self.assertEqual(('Closed', 'Resolved'), issue.status)
+
+        issue.add_snapshot(IssueSnapshot(self.commits[3], {'issue_id': '1'}, ['master']))
+        self.assertEqual(('Open', 'Accepted'), issue.status)
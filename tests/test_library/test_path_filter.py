@@ -0,0 +1,56 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from sciit.path_filter import PathFilter
+
+
+class TestPathFilter(TestCase):
+
+    def test_includes_everything_without_patterns(self):
+        path_filter = PathFilter()
+        self.assertTrue(path_filter.includes('vendor/lib.js'))
+        self.assertEqual([], path_filter.git_exclude_pathspecs())
+
+    def test_ignores_paths(self):
+        path_filter = PathFilter(['vendor/', '*.min.js', '/build', '# comment', ''])
+
+        self.assertFalse(path_filter.includes('vendor/lib.js'))
+        self.assertFalse(path_filter.includes('src/vendor/deep/lib.js'))
+        self.assertFalse(path_filter.includes('src/app.min.js'))
+        self.assertFalse(path_filter.includes('build/out.py'))
+        self.assertTrue(path_filter.includes('src/build/out.py'))
+        self.assertTrue(path_filter.includes('src/app.js'))
+
+    def test_ignored_directories_are_matched_once(self):
+        path_filter = PathFilter(['node_modules/'])
+
+        with patch.object(path_filter._ignore_spec, 'match_file', wraps=path_filter._ignore_spec.match_file) as match:
+            for i in range(100):
+                self.assertFalse(path_filter.includes(f'node_modules/package/file{i}.js'))
+
+        self.assertEqual(['node_modules/'], [call[0][0] for call in match.call_args_list])
+
+    def test_negated_patterns_are_matched_per_path(self):
+        path_filter = PathFilter(['vendor/*', '!vendor/keep.js'])
+
+        self.assertFalse(path_filter.includes('vendor/lib.js'))
+        self.assertTrue(path_filter.includes('vendor/keep.js'))
+        self.assertEqual([], path_filter.git_exclude_pathspecs())
+
+    def test_include_patterns(self):
+        path_filter = PathFilter(['src/generated/'], ['src/', '*.md'])
+
+        self.assertTrue(path_filter.includes('src/app.py'))
+        self.assertTrue(path_filter.includes('docs/README.md'))
+        self.assertFalse(path_filter.includes('scripts/build.sh'))
+        self.assertFalse(path_filter.includes('src/generated/model.py'))
+
+    def test_git_exclude_pathspecs(self):
+        path_filter = PathFilter(['vendor/', '/build', 'docs/gen/', '*.min.js', 'node_modules'])
+
+        self.assertEqual(
+            [':(exclude,glob)**/vendor/**',
+             ':(exclude,glob)build/**', ':(exclude,glob)build',
+             ':(exclude,glob)docs/gen/**',
+             ':(exclude,glob)**/node_modules/**', ':(exclude,glob)**/node_modules'],
+            path_filter.git_exclude_pathspecs())
@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+from sciit.pipeline import Pipeline
+
+
+class TestPipeline(TestCase):
+
+    def test_items_reach_the_sink_in_order_through_every_stage(self):
+        results = list()
+        pipeline = Pipeline(
+            ('numbers', range(100)),
+            [('double', lambda number: number * 2), ('increment', lambda number: number + 1)],
+            ('collect', results.append),
+            queue_size=2)
+
+        pipeline.run()
+
+        self.assertEqual([number * 2 + 1 for number in range(100)], results)
+        self.assertEqual(['numbers', 'double', 'increment', 'collect'], [stats.name for stats in pipeline.stats])
+        self.assertEqual([100] * 4, [stats.items for stats in pipeline.stats])
+
+    def test_empty_source(self):
+        results = list()
+        pipeline = Pipeline(('numbers', []), [('double', lambda number: number * 2)], ('collect', results.append))
+
+        pipeline.run()
+
+        self.assertEqual([], results)
+        self.assertEqual([0] * 3, [stats.items for stats in pipeline.stats])
+
+    def test_error_in_a_stage_stops_the_pipeline(self):
+        def fail_at_ten(number):
+            if number == 10:
+                raise ValueError('ten')
+            return number
+
+        results = list()
+        pipeline = Pipeline(('numbers', range(1000)), [('check', fail_at_ten)], ('collect', results.append),
+                            queue_size=1)
+
+        with self.assertRaises(ValueError):
+            pipeline.run()
+        self.assertEqual(list(range(10)), results)
+
+    def test_error_in_the_sink_stops_the_pipeline(self):
+        def fail_at_ten(number):
+            if number == 10:
+                raise ValueError('ten')
+
+        pipeline = Pipeline(('numbers', range(1000)), [('same', lambda number: number)], ('check', fail_at_ten),
+                            queue_size=1)
+
+        with self.assertRaises(ValueError):
+            pipeline.run()
+        self.assertEqual(10, pipeline.stats[-1].items)
@@ -0,0 +1,125 @@
+import io
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from sciit.read_blob import BlobReader, SkippedBlob, ScannedBlob
+
+
+class TestBlobReader(TestCase):
+
+    first_sha = 'a' * 40
+    second_sha = 'b' * 40
+    missing_sha = 'c' * 40
+
+    cat_file_output = \
+        first_sha.encode() + b' blob 5\nhello\n' + \
+        missing_sha.encode() + b' missing\n' + \
+        second_sha.encode() + b' blob 11\n@issue 1\nxy\n'
+
+    def setUp(self):
+        self.popen_patcher = patch('sciit.read_blob.subprocess.Popen')
+        self.popen = self.popen_patcher.start()
+        self.popen.return_value.stdout = io.BytesIO(self.cat_file_output)
+        self.blob_reader = BlobReader(MagicMock())
+
+    def test_reads_blobs_in_bulk(self):
+        contents = self.blob_reader.read_blobs([self.first_sha, self.missing_sha, self.second_sha])
+        self.assertEqual({self.first_sha: b'hello', self.second_sha: b'@issue 1\nxy'}, contents)
+
+    def test_requests_are_written_in_one_batch(self):
+        self.blob_reader.read_blobs([self.first_sha, self.missing_sha, self.second_sha])
+        self.popen.return_value.stdin.write.assert_called_once_with(
+            (self.first_sha + '\n' + self.missing_sha + '\n' + self.second_sha + '\n').encode())
+
+    def test_counts_objects_and_bytes_served(self):
+        self.blob_reader.read_blobs([self.first_sha, self.missing_sha, self.second_sha])
+        self.assertEqual(2, self.blob_reader.objects_served)
+        self.assertEqual(16, self.blob_reader.bytes_served)
+
+    def test_process_is_started_once(self):
+        self.blob_reader.read_blob(self.first_sha)
+        self.blob_reader.read_blob(self.missing_sha)
+        self.assertEqual(1, self.popen.call_count)
+
+    def test_process_is_not_started_until_needed(self):
+        self.blob_reader.close()
+        self.popen.assert_not_called()
+
+    def tearDown(self):
+        self.blob_reader.close()
+        self.popen_patcher.stop()
+
+
+class TestBlobReaderSkipping(TestCase):
+
+    def read_blobs(self, blobs, comment_patterns_by_hexsha=None, **kwargs):
+        cat_file_output = b''.join(
+            hexsha.encode() + b' blob %d\n' % len(contents) + contents + b'\n' for hexsha, contents in blobs)
+        # A second request reads blobs that were read past again, unless they were scanned as they were read.
+        cat_file_output += b''.join(
+            hexsha.encode() + b' blob %d\n' % len(contents) + contents + b'\n' for hexsha, contents in blobs
+            if b'@issue' in contents and len(contents) > BlobReader.CHUNK_SIZE and
+            hexsha not in (comment_patterns_by_hexsha or dict()))
+
+        with patch('sciit.read_blob.subprocess.Popen') as popen:
+            popen.return_value.stdout = io.BytesIO(cat_file_output)
+            blob_reader = BlobReader(MagicMock(), **kwargs)
+            contents = blob_reader.read_blobs([hexsha for hexsha, _ in blobs], comment_patterns_by_hexsha)
+            blob_reader.close()
+
+        return blob_reader, contents
+
+    def test_skips_blobs_that_are_too_large(self):
+        blob_reader, contents = self.read_blobs([('a' * 40, b'x' * 20), ('b' * 40, b'small')], max_blob_size=10)
+
+        self.assertEqual(SkippedBlob.TOO_LARGE, contents['a' * 40].reason)
+        self.assertEqual(b'small', contents['b' * 40])
+        self.assertEqual(1, blob_reader.objects_skipped[SkippedBlob.TOO_LARGE])
+        self.assertEqual(1, blob_reader.objects_served)
+
+    def test_skips_blobs_that_look_binary(self):
+        blob_reader, contents = self.read_blobs([('a' * 40, b'\x89PNG\0@issue 1' + b'x' * 10000), ('b' * 40, b'text')])
+
+        self.assertEqual(SkippedBlob.BINARY, contents['a' * 40].reason)
+        self.assertEqual(b'text', contents['b' * 40])
+
+    @patch('sciit.read_blob.BlobReader.CHUNK_SIZE', 10000)
+    def test_large_blobs_are_only_read_in_full_with_markers(self):
+        with_marker = b'x' * 25000 + b'@iss' + b'ue 1\n' + b'y' * 10000
+        without_marker = b'x' * 25000 + b'@iss' + b'y' * 10000
+
+        blob_reader, contents = self.read_blobs(
+            [('a' * 40, without_marker), ('b' * 40, with_marker), ('c' * 40, b'@issue 2')],
+            required_markers=(b'@issue', ))
+
+        self.assertEqual(SkippedBlob.WITHOUT_MARKERS, contents['a' * 40].reason)
+        self.assertEqual(with_marker, contents['b' * 40])
+        self.assertEqual(b'@issue 2', contents['c' * 40])
+        self.assertEqual(2, blob_reader.objects_served)
+
+    @patch('sciit.read_blob.BlobReader.CHUNK_SIZE', 10000)
+    def test_large_blobs_are_scanned_as_they_are_read_with_comment_patterns(self):
+        with_marker = b'x' * 25000 + b'@iss' + b'ue 1\n' + b'y' * 10000
+        without_marker = b'x' * 25000 + b'@iss' + b'y' * 10000
+        chunk_sizes = list()
+
+        def scan_blob(comment_patterns, chunks):
+            contents = b''
+            for chunk in chunks:
+                chunk_sizes.append(len(chunk))
+                contents += chunk
+            return {comment_pattern: [contents.count(b'@issue')] for comment_pattern in comment_patterns}
+
+        blob_reader, contents = self.read_blobs(
+            [('a' * 40, without_marker), ('b' * 40, with_marker), ('c' * 40, b'@issue 2'), ('d' * 40, with_marker[1:])],
+            {'a' * 40: {'pattern'}, 'b' * 40: {'pattern', 'other pattern'}, 'c' * 40: {'pattern'}},
+            required_markers=(b'@issue', ), scan_blob=scan_blob)
+
+        self.assertEqual(SkippedBlob.WITHOUT_MARKERS, contents['a' * 40].reason)
+        self.assertIsInstance(contents['b' * 40], ScannedBlob)
+        self.assertEqual({'pattern': [1], 'other pattern': [1]}, contents['b' * 40].issues_by_comment_pattern)
+        self.assertEqual(b'@issue 2', contents['c' * 40])
+        # Blobs read without comment patterns are read in full.
+        self.assertEqual(with_marker[1:], contents['d' * 40])
+        self.assertEqual(3, blob_reader.objects_served)
+        self.assertLessEqual(max(chunk_sizes), BlobReader.CHUNK_SIZE)
@@ -0,0 +1,75 @@
+import random
+from unittest import TestCase
+
+from sciit.read_comment import read_issue_data_from_comment, read_issue_data_from_comment_with_regexes
+
+
+# Comments that exercise the corners of the issue property regular expressions.
+CORPUS = [
+    '',
+    'no markers at all',
+    '@',
+    '@issue',
+    '@issue\n',
+    '@issue 1',
+    '@Issue: 1\n@Title: One',
+    '@issue_id = 1\n@issue_title => One\n@issue-description - Words\n',
+    '@issue number 1\n@issuenumber 2',
+    '@issue slug my-slug\n@tags a, b\n@labels c',
+    '@title Only a title, so the id is its slug',
+    '@title\n@issue 1',
+    '@issue title is the id',
+    '@issue issue title\n@weight 1',
+    '\n    @issue 2\n    @description\n        over\n        lines\n    @due_date today\n',
+    '@issue 2\n@description ends at the end',
+    '@issue 2\n@description ends before a final newline\n',
+    '@issue 2\n@description ends before blank lines then a marker\n\n\n   @weight 3',
+    '@issue 2\n@description\r\n  windows\r\n  lines\r\n@priority low\r\n',
+    '@issue 2\n@descriptionnnn many ns\n@descriptio no n',
+    '@issue 2\n@description mentions email@example.com and\n an@inline marker\n @assignees a, b',
+    '@issue 2\n@assigned to mark\n@assignee paul\n@assign-to peter',
+    '@issue 2\n@assignees:mark',
+    '@issue 2\n@due date 10 dec 2018\n@issue_due-date 11 dec 2018\n@due10 dec',
+    '@issue 2\n@label   spaced   \n@tag x',
+    '@issue 2\n@weight\n@priority\n@blockers\n',
+    '@issue 2\n@blockers 1, 3\n@blockers 4',
+    '@@issue 3 @title Inline @weight 5',
+    '@issue_issue_title nested prefixes\n@issue 9',
+    '@Issues are not ids\n@ISSUE upper case is not one either\n@issue 4',
+    'email@example.com\n@issue 5\n\t@title\ttabbed',
+]
+
+
+class TestReadIssueDataFromComment(TestCase):
+
+    def assertReadsAsWithRegexes(self, comment):
+        expected = read_issue_data_from_comment_with_regexes(comment)
+        actual = read_issue_data_from_comment(comment)
+
+        self.assertEqual(expected, actual, repr(comment))
+        self.assertEqual(list(expected), list(actual), repr(comment))
+
+    def test_corpus_reads_as_with_regexes(self):
+        for comment in CORPUS:
+            self.assertReadsAsWithRegexes(comment)
+
+    def test_generated_comments_read_as_with_regexes(self):
+        pieces = ['@', '@issue', '@Issue', '@issue_', '@issue-', 'issue', ' ', '\n', '\r\n', '\t', 'id', 'number',
+                  'slug', ':', '=', ';', '>', '-', 'title', 'Title', 'description', 'Descriptio', 'descriptionnn',
+                  'assigned to', 'assignees', 'due', 'due_date', 'Due Date', 'label', 'tags', 'weight', 'blockers',
+                  'priority', 'words', 'a, b', '\n  @', '\n\n']
+        rng = random.Random(17)
+
+        for _ in range(5000):
+            self.assertReadsAsWithRegexes(''.join(rng.choice(pieces) for _ in range(rng.randint(0, 25))))
+
+    def test_description_runs_to_next_marker_line(self):
+        data = read_issue_data_from_comment('@issue 1\n@description first\n  second @inline\n  @weight 2')
+        self.assertEqual('first\n  second @inline', data['description'])
+        self.assertEqual('2', data['weight'])
+
+    def test_long_description(self):
+        comment = '@issue 1\n@description\n' + 'words on a line\n' * 20000 + '@priority high\n'
+        data = read_issue_data_from_comment(comment)
+        self.assertEqual(20000, data['description'].count('words on a line'))
+        self.assertEqual('high', data['priority'])
@@ -1,6 +1,14 @@
+import os
+import shutil
+import tempfile
 from unittest import TestCase
-from sciit.regex import get_file_object_pattern, strip_comment_chars, add_comment_chars
-from sciit.regex import (C_STYLE, PYTHON, HTML, MATLAB, HASKELL, PLAIN, MARKDOWN)
+from unittest.mock import Mock, PropertyMock
+
+from sciit.errors import CommentSyntaxConfigError
+from sciit.functions import get_comment_syntax_registry
+from sciit.read_commit import find_issues_in_blob, find_issues_in_blob_chunks
+from sciit.regex import get_file_object_pattern, strip_comment_chars, add_comment_chars, CommentSyntaxRegistry
+from sciit.regex import (C_STYLE, PYTHON, HTML, MATLAB, HASKELL, PLAIN, MARKDOWN, HASH_LINES, SLASH_LINES)
 
 
 class TestFileObjectPattern(TestCase):
@@ -138,3 +146,124 @@ Another line.
         comment_string = add_comment_chars(C_STYLE, issue, indent)
 
         self.assertEqual(expected, comment_string)
+
+
+class TestCommentSyntaxRegistry(TestCase):
+
+    def test_line_comment_files(self):
+        registry = CommentSyntaxRegistry()
+        self.assertEqual(HASH_LINES, registry.comment_pattern('scripts/build.sh'))
+        self.assertEqual(HASH_LINES, registry.comment_pattern('docker/Dockerfile'))
+        self.assertEqual(SLASH_LINES, registry.comment_pattern('src/app.ts'))
+
+    def test_mime_type_is_only_read_for_unregistered_files(self):
+        registry = CommentSyntaxRegistry()
+        blob = Mock(path='src/Main.java')
+        mime_type = PropertyMock(return_value='text/plain')
+        type(blob).mime_type = mime_type
+
+        self.assertEqual(C_STYLE, registry.comment_pattern_for_blob(blob))
+        mime_type.assert_not_called()
+
+        blob.path = 'notes'
+        self.assertEqual(PLAIN, registry.comment_pattern_for_blob(blob))
+        self.assertEqual(PLAIN, registry.comment_pattern_for_blob(blob))
+        mime_type.assert_called_once()
+
+    def test_registrations_override_defaults(self):
+        registry = CommentSyntaxRegistry()
+        self.assertEqual(C_STYLE, registry.comment_pattern('main.go'))
+
+        registry.register_extension('.go', SLASH_LINES)
+        registry.register_file_name('Jenkinsfile', C_STYLE)
+
+        self.assertEqual(SLASH_LINES, registry.comment_pattern('main.go'))
+        self.assertEqual(C_STYLE, registry.comment_pattern('ci/Jenkinsfile'))
+
+    def test_unguessable_mime_type_uses_default(self):
+        self.assertFalse(CommentSyntaxRegistry().comment_pattern('notes'))
+        self.assertEqual(PLAIN, CommentSyntaxRegistry(default_mime_type='text/plain').comment_pattern('notes'))
+
+    def test_read_config_file(self):
+        working_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, working_dir)
+        with open(os.path.join(working_dir, '.sciitsyntax'), 'w') as config_file:
+            config_file.write(
+                '# Go issues are in line comments\n.go = slash-lines\n\nJenkinsfile = c-style\n.log = none\n')
+
+        registry = get_comment_syntax_registry(Mock(working_dir=working_dir))
+
+        self.assertEqual(SLASH_LINES, registry.comment_pattern('main.go'))
+        self.assertEqual(C_STYLE, registry.comment_pattern('Jenkinsfile'))
+        self.assertFalse(registry.comment_pattern('build.log'))
+        self.assertEqual(PLAIN, registry.comment_pattern('notes'))
+
+        with open(os.path.join(working_dir, '.sciitsyntax'), 'w') as config_file:
+            config_file.write('.go = slashes\n')
+        with self.assertRaises(CommentSyntaxConfigError):
+            get_comment_syntax_registry(Mock(working_dir=working_dir))
+
+    def test_find_issues_in_hash_lines(self):
+        content = \
+            """#!/bin/sh
+# Builds the project.
+
+  # @issue build-cache
+  # @title Cache the build
+  # @description
+  #   Rebuilding takes too long.
+make all
+"""
+        issues = find_issues_in_blob(HASH_LINES, content)
+
+        self.assertEqual(1, len(issues))
+        self.assertEqual('build-cache', issues[0]['issue_id'])
+        self.assertEqual('Rebuilding takes too long.', issues[0]['description'].strip())
+        self.assertEqual(content.index('  # @issue'), issues[0]['start_position'])
+        self.assertEqual(content.index('make'), issues[0]['end_position'])
+
+    def test_plain_blocks_in_files_read_as_hash_lines(self):
+        content = 'all:\n#***\n# @issue build-all\n#***\n\tmake\n'
+        comment_pattern = CommentSyntaxRegistry().comment_pattern('Makefile')
+
+        issues = find_issues_in_blob(comment_pattern, content)
+
+        self.assertEqual(HASH_LINES, comment_pattern)
+        self.assertEqual(1, len(issues))
+        self.assertEqual('build-all', issues[0]['issue_id'])
+        self.assertEqual(content.index('#***'), issues[0]['start_position'])
+        # The newline ending the block is part of it, where it was not when the file was read as plain text.
+        self.assertEqual(content.index('\tmake'), issues[0]['end_position'])
+
+    def test_find_issues_in_blob_chunks(self):
+        content = \
+            """x = '''
+  @issue café
+  @title The first issue
+'''
+#***
+# @issue plain
+#***
+\"\"\"@issue 2
+@description Ends after the ‘quotes’ on its last line.\"\"\"
+"""
+        raw_content = content.encode('utf-8')
+
+        for chunk_size in (1, 2, 7, len(raw_content)):
+            chunks = (raw_content[start:start + chunk_size] for start in range(0, len(raw_content), chunk_size))
+
+            issues_by_comment_pattern = find_issues_in_blob_chunks({PYTHON, PLAIN}, chunks)
+
+            self.assertEqual(find_issues_in_blob(PYTHON, content), issues_by_comment_pattern[PYTHON])
+            self.assertEqual(find_issues_in_blob(PLAIN, content), issues_by_comment_pattern[PLAIN])
+        self.assertEqual(['café', '2'], [issue['issue_id'] for issue in issues_by_comment_pattern[PYTHON]])
+
+        # As for blobs read whole, no issues are read from blobs that are not UTF-8.
+        latin_1_content = '#***\n# @issue café\n#***\n'.encode('latin-1')
+        self.assertEqual({PLAIN: []}, find_issues_in_blob_chunks({PLAIN}, [latin_1_content]))
+
+    def test_strip_slash_lines_comment_chars(self):
+        issue_content, indent = strip_comment_chars(SLASH_LINES, '    // @issue 1\n    /// @title Issue 1\n')
+
+        self.assertEqual('@issue 1\n@title Issue 1\n', issue_content)
+        self.assertEqual('    ', indent)
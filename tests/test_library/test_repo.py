@@ -1,10 +1,16 @@
 import datetime
+import json
 import os
+from collections import Counter
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
+
+from git import Repo as GitRepository
+
 from sciit import IssueRepo
 from sciit.functions import get_last_issue_commit_sha
 from sciit.errors import EmptyRepositoryError, NoCommitsError
+from sciit.read_blob import SkippedBlob
 
 from tests.external_resources import create_mock_git_repository, remove_existing_repo, create_mock_commit, \
     create_mock_commit_with_issue_snapshots, create_mock_parents
@@ -101,6 +107,19 @@ class TestBuildIssueRepo(TestCase):
         self.issue_repository = IssueRepo(self.mock_git_repository)
         self.issue_repository.setup_file_system_resources()
 
+    def read_commits_as(self, results):
+        """
+        Has ingestion find the (issue snapshots, paths changed, branches) of each result in each commit in turn.
+        """
+        find_blobs_for_scanning_in_commit = patch('sciit.ingestion_pipeline.find_blobs_for_scanning_in_commit').start()
+        find_blobs_for_scanning_in_commit.side_effect = [
+            (list(), files_changed_in_commit, in_branches) for _, files_changed_in_commit, in_branches in results]
+
+        find_issue_snapshots_in_blobs = patch('sciit.ingestion_pipeline.find_issue_snapshots_in_blobs').start()
+        find_issue_snapshots_in_blobs.side_effect = [issue_snapshots for issue_snapshots, _, _ in results]
+
+        self.addCleanup(patch.stopall)
+
     def test_build_from_empty_repo(self):
         self.mock_git_repository.heads = list()
 
@@ -109,15 +128,12 @@ class TestBuildIssueRepo(TestCase):
         self.assertTrue('The repository has no commits.' in str(context.exception))
 
     @patch('sciit.repo.Commit', new_callable=MagicMock)
-    @patch('sciit.repo.find_issue_snapshots_in_commit_paths_that_changed', new_callable=MagicMock)
-    def test_build_issue_cache_from_mocked_git_repo(
-            self, find_issues_in_commit_paths_that_changed,
-            commit_constructor):
+    def test_build_issue_cache_from_mocked_git_repo(self, commit_constructor):
 
-        find_issues_in_commit_paths_that_changed.side_effect = [
+        self.read_commits_as([
             [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
             [self.head_issue_snapshots, ['another/path'], ['master']]
-        ]
+        ])
         commit_constructor.side_effect = [self.first_commit] * 6 + [self.head_commit] * 5
 
         self.issue_repository.cache_issue_snapshots_from_all_commits()
@@ -125,6 +141,253 @@ class TestBuildIssueRepo(TestCase):
         self.assertEqual(8, len(history))
         self.assertEqual(2, len(history['1'].revisions))
 
+    @patch('sciit.repo.Commit', new_callable=MagicMock)
+    def test_unchanged_issue_payloads_are_stored_and_parsed_once(self, _):
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ])
+
+        self.head_commit.parents = [self.first_commit]
+
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+        self.issue_repository.issue_snapshot_cache = dict()
+
+        issue_3_snapshots = self.issue_repository.find_issue_snapshots(issue_ids=['3'])
+        self.assertEqual(2, len(issue_3_snapshots))
+        self.assertIs(issue_3_snapshots[0].data, issue_3_snapshots[1].data)
+
+        number_of_snapshots = len(self.issue_repository.store.query('SELECT * FROM IssueSnapshot'))
+        number_of_payloads = len(self.issue_repository.store.query('SELECT * FROM IssuePayload'))
+        self.assertEqual(13, number_of_snapshots)
+        self.assertEqual(10, number_of_payloads)
+
+    @patch('sciit.repo.Commit', new_callable=MagicMock)
+    def test_interval_storage_holds_the_same_snapshots_as_rows(self, _):
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ] * 2)
+
+        self.head_commit.parents = [self.first_commit]
+
+        def read_snapshots(issue_repository):
+            return [(row['commit_sha'], row['issue_id'], row['json_data'], row['in_branches'])
+                    for row in issue_repository.store.read_issue_snapshot_rows()]
+
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+        snapshots_in_rows = read_snapshots(self.issue_repository)
+        self.issue_repository.reset()
+
+        self.issue_repository = IssueRepo(self.mock_git_repository, snapshot_storage='intervals')
+        self.issue_repository.setup_file_system_resources()
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        self.assertEqual(sorted(snapshots_in_rows), sorted(read_snapshots(self.issue_repository)))
+        self.assertEqual(sorted(['1', '2', '3', '4', '5', '6', '9', '12']), sorted(self.issue_repository.issue_keys()))
+        self.issue_repository.issue_snapshot_cache = dict()
+        self.assertEqual(6, len(self.issue_repository.find_issue_snapshots_by_commit(self.first_commit.hexsha)))
+
+    @patch('sciit.repo.SERIALIZED_ISSUE_SNAPSHOT_CACHE_SIZE', 1)
+    @patch('sciit.repo.Commit', new_callable=MagicMock)
+    def test_snapshots_let_go_of_during_ingestion_are_read_back_from_store(self, _):
+        sibling_commit = create_mock_commit('b' * 40, 'Nystrome', datetime.datetime(2018, 1, 2), [self.first_commit])
+        self.head_commit.parents = [self.first_commit]
+        self.mock_git_repository.iter_commits.return_value = [self.first_commit, self.head_commit, sibling_commit]
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['path'], ['master']],
+            [list(), ['path'], ['feature']]
+        ])
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        # Ingestion only keeps the snapshots of the commits it has just written.
+        self.assertEqual(dict(), self.issue_repository.issue_snapshot_cache)
+        self.assertEqual(
+            [('2', ['feature'])],
+            [(snapshot.issue_id, snapshot.in_branches) for snapshot in
+             self.issue_repository.find_issue_snapshots_by_commit(sibling_commit.hexsha)])
+        self.assertEqual(
+            ['1', '12', '2', '6', '9'],
+            sorted(snapshot.issue_id for snapshot in
+                   self.issue_repository.find_issue_snapshots_by_commit(self.head_commit.hexsha)))
+
+    @patch('sciit.repo.Commit', new_callable=MagicMock)
+    def test_issue_commits_are_read_from_recorded_metadata(self, commit_constructor):
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ])
+
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+        self.issue_repository.issue_snapshot_cache = dict()
+
+        history = self.issue_repository.get_all_issues()
+        self.assertEqual('Nystrome', history['6'].creator)
+        self.assertEqual(['Commit ' + self.head_commit.hexsha, 'Commit ' + self.first_commit.hexsha],
+                         [revision['summary'] for revision in history['6'].revisions])
+        commit_constructor.assert_not_called()
+
+    def test_issue_states_are_recorded_after_ingestion(self):
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ])
+
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        history = self.issue_repository.get_all_issues()
+        issue_states = self.issue_repository.get_issue_states()
+
+        self.assertEqual(sorted(history), sorted(issue_states))
+        for issue_id, issue in history.items():
+            self.assertEqual(issue.status, issue_states[issue_id].status)
+            self.assertEqual(issue.title, issue_states[issue_id].title)
+            self.assertEqual(issue.last_authored_date_string, issue_states[issue_id].last_authored_date_string)
+            self.assertEqual(issue.open_in_branches, issue_states[issue_id].open_in_branches)
+
+    def test_blockers_are_resolved_from_dependency_graph(self):
+
+        self.head_issue_snapshots[0].data['blockers'] = '9, missing'
+        self.head_issue_snapshots[0].blockers = '9, missing'
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ])
+
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        history = self.issue_repository.get_all_issues()
+
+        with patch.object(self.issue_repository, '_build_history') as build_history:
+            blockers = history['1'].blockers
+            build_history.assert_not_called()
+
+        self.assertEqual(['9', 'missing'], list(blockers))
+        self.assertEqual(history['9'].status, blockers['9'].status)
+        self.assertIsNone(blockers['missing'])
+
+        dependency_graph = self.issue_repository.dependency_graph
+        self.assertEqual(['9', 'missing'], dependency_graph.blockers('1'))
+        self.assertEqual(['1'], dependency_graph.blocks('9'))
+
+    def test_only_issue_states_in_processed_commits_are_rebuilt(self):
+
+        self.read_commits_as([
+            [self.first_issue_snapshots, ['path', 'another/path'], ['master']],
+            [self.head_issue_snapshots, ['another/path'], ['master']]
+        ])
+
+        self.mock_git_repository.iter_commits.return_value = [self.first_commit]
+        self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        self.mock_git_repository.iter_commits.return_value = [self.head_commit]
+        with patch.object(self.issue_repository, '_build_history', wraps=self.issue_repository._build_history) \
+                as build_history:
+            self.issue_repository._extract_and_synchronise_issue_snapshots_from_commits([self.head_commit])
+
+        build_history.assert_called_once_with(issue_ids=['1', '12', '6', '9'])
+        self.assertEqual(8, len(self.issue_repository.get_issue_states()))
+
+    @patch('sciit.repo.PARALLEL_INGESTION_WINDOW_SIZE', 1)
+    @patch('sciit.repo.find_blobs_for_scanning_in_commit', new_callable=MagicMock)
+    def test_parallel_ingestion_stitches_snapshots_in_commit_order(self, find_blobs_for_scanning_in_commit):
+        issues_in_blobs = {
+            'b1': [{'issue_id': '1', 'title': 'one'}],
+            'b2': [{'issue_id': '2', 'title': 'two'}],
+            'b3': [{'issue_id': '3', 'title': 'three'}],
+            'b4': [],
+            'b5': [{'issue_id': '5', 'title': 'five'}]
+        }
+
+        class BlobParserPool:
+            submitted = list()
+
+            def __init__(self, git_working_dir, jobs, max_blob_size=None):
+                self.objects_served, self.bytes_served, self.scan_counts = 0, 0, dict()
+
+            def submit(self, blob_keys):
+                blob_keys = list(blob_keys)
+                self.submitted.extend(hexsha for hexsha, _ in blob_keys)
+                self.objects_served += len(blob_keys)
+                return [blob_keys]
+
+            def collect(self, futures):
+                return {blob_key: json.dumps(issues_in_blobs[blob_key[0]]) for blob_keys in futures
+                        for blob_key in blob_keys}
+
+            def close(self):
+                pass
+
+        def blob(hexsha):
+            return MagicMock(hexsha=hexsha)
+
+        find_blobs_for_scanning_in_commit.side_effect = [
+            [[('path', blob('b1'), 'pattern'), ('another/path', blob('b2'), 'pattern'),
+              ('fourth/path', blob('b5'), 'pattern')], {'path', 'another/path', 'fourth/path'}, ['master']],
+            [[('another/path', blob('b3'), 'pattern'), ('path', blob('b4'), 'pattern'),
+              ('third/path', blob('b1'), 'pattern')], {'another/path', 'path', 'third/path'}, ['master']]
+        ]
+
+        self.head_commit.parents = [self.first_commit]
+        self.issue_repository.jobs = 2
+
+        with patch('sciit.repo.BlobParserPool', BlobParserPool):
+            self.issue_repository.cache_issue_snapshots_from_all_commits()
+        self.issue_repository.issue_snapshot_cache = dict()
+
+        # The blob in both commits is submitted for the first, and found for the second once the first is stitched.
+        self.assertEqual(['b1', 'b2', 'b5', 'b3', 'b4'], BlobParserPool.submitted)
+        self.assertEqual(
+            [('1', 'path'), ('2', 'another/path'), ('5', 'fourth/path')],
+            sorted((snapshot.issue_id, snapshot.file_path) for snapshot in
+                   self.issue_repository.find_issue_snapshots_by_commit(self.first_commit.hexsha)))
+        self.assertEqual(
+            [('1', 'third/path'), ('3', 'another/path'), ('5', 'fourth/path')],
+            sorted((snapshot.issue_id, snapshot.file_path) for snapshot in
+                   self.issue_repository.find_issue_snapshots_by_commit(self.head_commit.hexsha)))
+        self.assertEqual(5, self.issue_repository.last_ingestion_summary['blobs_read'])
+        self.assertEqual(1, self.issue_repository.last_ingestion_summary['blobs_parsed_before'])
+
+    @patch('sciit.repo.PARALLEL_INGESTION_WINDOW_SIZE', 1)
+    @patch('sciit.repo.find_blobs_for_scanning_in_commit', new_callable=MagicMock)
+    def test_parallel_ingestion_counts_blobs_too_large_but_not_missing_blobs(self, find_blobs_for_scanning_in_commit):
+
+        class BlobParserPool:
+
+            def __init__(self, git_working_dir, jobs, max_blob_size=None):
+                self.objects_served, self.bytes_served, self.scan_counts = 0, 0, Counter()
+
+            def submit(self, blob_keys):
+                return [list(blob_keys)]
+
+            def collect(self, futures):
+                self.scan_counts['blobs_too_large'] += 1
+                return {('big', 'pattern'): SkippedBlob(SkippedBlob.TOO_LARGE, 10 ** 9), ('gone', 'pattern'): None}
+
+            def close(self):
+                pass
+
+        find_blobs_for_scanning_in_commit.side_effect = [
+            [[('big', MagicMock(hexsha='big'), 'pattern'), ('gone', MagicMock(hexsha='gone'), 'pattern')],
+             {'big', 'gone'}, ['master']]
+        ] * 2
+
+        self.issue_repository.jobs = 2
+
+        with patch('sciit.repo.BlobParserPool', BlobParserPool):
+            self.issue_repository.cache_issue_snapshots_from_all_commits()
+
+        # As when ingesting one commit after another, the large blob is skipped each time it is found.
+        self.assertEqual(2, self.issue_repository.last_ingestion_summary['blobs_too_large'])
+        self.assertEqual(0, self.issue_repository.last_ingestion_summary['blobs_parsed_before'])
+
     def tearDown(self):
         remove_existing_repo('working_dir')
 
@@ -135,12 +398,14 @@ class TestRepoSync(TestCase):
 
         self.first_commit = create_mock_commit(
             '43e8d11ec2cb9802151533ae8d9c5dcc5dec91a4',
+            'Nystrome',
             datetime.datetime(2018, 1, 1),
             list(),
         )
 
         self.head_commit = create_mock_commit(
             '622918a4c6539f853320e06804f73d1165df69d0',
+            'Nystrome',
             datetime.datetime(2018, 1, 1),
             [self.first_commit],
         )
@@ -157,10 +422,11 @@ class TestRepoSync(TestCase):
         self.repo = IssueRepo(self.mock_git_repository)
         self.repo.setup_file_system_resources()
 
-    @patch('sciit.read_commit._find_branches_for_commit', new_callable=MagicMock())
-    def test_sync_repository(self, find_branches_mock):
+    @patch('sciit.repo.ChangedPathsStream', new_callable=MagicMock())
+    def test_sync_repository(self, _):
 
-        find_branches_mock.return_value=['master']
+        self.repo.branch_index = MagicMock()
+        self.repo.branch_index.branches_for_commit.return_value = ['master']
 
         # write_last_issue_commit_sha(self.repo.issue_dir, self.first)
 
@@ -173,3 +439,86 @@ class TestRepoSync(TestCase):
         os.chdir('../')
         remove_existing_repo('working_dir')
 
+
+
+class TestIncrementalIngestion(TestCase):
+
+    def setUp(self):
+        remove_existing_repo('working_dir')
+        os.mkdir('working_dir')
+        os.chdir('working_dir')
+
+        self.git_repository = GitRepository.init('.')
+        with self.git_repository.config_writer() as config_writer:
+            config_writer.set_value('user', 'name', 'Nystrome')
+            config_writer.set_value('user', 'email', 'nystrome@example.com')
+
+        self._commit('issues.py', '"""\n@issue beta\n"""\n\n"""\n@issue gamma\n"""\n', 'Add issues', 1)
+
+    def _commit(self, path, content, message, day):
+        with open(path, 'w') as file_handle:
+            file_handle.write(content)
+        self.git_repository.index.add([path])
+        date = '2018-01-%02dT00:00:00' % day
+        self.git_repository.index.commit(message, author_date=date, commit_date=date)
+
+    @staticmethod
+    def _ingested_issues(issue_repository):
+        return {
+            issue_id: (issue.status, sorted(issue.open_in_branches), sorted(issue.closed_in_branches),
+                       sorted(issue.issue_snapshot_commit_hexshas))
+            for issue_id, issue in issue_repository.get_all_issues().items()}
+
+    @staticmethod
+    def _recorded_issue_states(issue_repository):
+        return {
+            issue_id: (issue_state.status, issue_state.title, issue_state.last_authored_date_string,
+                       issue_state.file_path, sorted(issue_state.open_in_branches),
+                       sorted(issue_state.closed_in_branches))
+            for issue_id, issue_state in issue_repository.get_issue_states().items()}
+
+    def test_ingesting_new_commits_across_a_merge_matches_ingesting_all_commits(self):
+        for snapshot_storage in ('rows', 'intervals'):
+            with self.subTest(snapshot_storage=snapshot_storage):
+                issue_repository = IssueRepo(self.git_repository, snapshot_storage=snapshot_storage)
+                issue_repository.setup_file_system_resources(install_hooks=False)
+                issue_repository.cache_issue_snapshots_from_all_commits()
+                issue_repository.close()
+
+                master = self.git_repository.active_branch
+                self.git_repository.git.checkout('-b', 'feature-' + snapshot_storage)
+                # The newest commit is on the feature branch, so new commits are not all found from the newest.
+                self._commit('feature.py', '"""\n@issue eps-%s\n"""\n' % snapshot_storage, 'Add eps', 28)
+                master.checkout()
+                self._commit('README.md', snapshot_storage + '\n', 'Change the readme', 2)
+                self.git_repository.git.merge(
+                    '--no-ff', '-m', 'Merge feature', 'feature-' + snapshot_storage,
+                    env={'GIT_AUTHOR_DATE': '2018-01-03T00:00:00', 'GIT_COMMITTER_DATE': '2018-01-03T00:00:00'})
+                self._commit('issues.py', '"""\n@issue beta\n"""\n', 'Close gamma', 4)
+
+                issue_repository = IssueRepo(self.git_repository)
+                issue_repository.cache_issue_snapshots_from_unprocessed_commits()
+                incrementally_ingested = self._ingested_issues(issue_repository)
+                incrementally_recorded = self._recorded_issue_states(issue_repository)
+                issue_repository.reset()
+
+                issue_repository = IssueRepo(self.git_repository, snapshot_storage=snapshot_storage)
+                issue_repository.setup_file_system_resources(install_hooks=False)
+                issue_repository.cache_issue_snapshots_from_all_commits()
+                fully_ingested = self._ingested_issues(issue_repository)
+                fully_recorded = self._recorded_issue_states(issue_repository)
+                issue_repository.reset()
+
+                self.assertEqual(fully_ingested, incrementally_ingested)
+                self.assertEqual(fully_recorded, incrementally_recorded)
+                self.assertEqual(
+                    {issue_id: issue[0] for issue_id, issue in fully_ingested.items()},
+                    {issue_id: issue_state[0] for issue_id, issue_state in incrementally_recorded.items()})
+                self.assertEqual('Open', fully_ingested['beta'][0][0])
+                self.assertEqual('Closed', fully_ingested['gamma'][0][0])
+
+    def tearDown(self):
+        # Forces proper clean up of git repository resources on Windows.
+        self.git_repository.__del__()
+        os.chdir('../')
+        remove_existing_repo('working_dir')
@@ -0,0 +1,91 @@
+import random
+import re
+from unittest import TestCase
+
+from sciit.regex import C_STYLE, PYTHON, HTML, MATLAB, HASKELL, PLAIN, MARKDOWN, HASH_LINES, SLASH_LINES
+from sciit.scan_comments import scan_comments, CommentStream
+
+
+# Sources that exercise the corners of each comment pattern.
+CORPUS = {
+    C_STYLE: ['', 'int x;', '/**/', '/* a */ b /* c */', '/* a\n b\r\n */', '/*/', '/* a /* b */ c */', '/* open',
+              'a */ b /* c', '/***/***/'],
+    HASKELL: ['', '{--}', '{- a -} b {- c -}', '{-}', '{- open', '{- a\n -}'],
+    MATLAB: ['', '%{%}', '%{ a %} b %{ c %}', '%{}', '%{ open', '%{ a\n %}'],
+    HTML: ['', '<!---->', '<!--->', '<!-- a -->', '<!--\n a\n-->b<!-- c -->', '<!-- open', '<!--->-->'],
+    MARKDOWN: ['', '------', '-------', '--- a ---', '---\na\n---\nb\n---\nc\n---', '--- open', '-----'],
+    PLAIN: ['', '#***#***', '#*** a #***', '#***** a #****** b', '#** a #***', '#*** open', '#*** a\n#*** b #***'],
+    PYTHON: ['', '""""""', '""" a """', "''' a '''", '""" a \'\'\'', 'x = """ a """', 'x =\n\t""" a """',
+             'x = y """ a """', '""" a """ b """ c """', '""" a\n b\n """', '""" a """ """', '""" open',
+             '"""""""', '""" a """"\n', '= """ a\n""" = """ b\n"""'],
+    HASH_LINES: ['', '#', '# a\n# b\nc\n  # d', 'a # b\n# c', '\t#\r\n#\n\n#', 'a\n b # c\n#'],
+    SLASH_LINES: ['', '//', '/ /', '// a\n  /// b\nc // d\n//', 'a\n// b'],
+}
+
+# The pieces that sources are generated from for each comment pattern.
+PIECES = {
+    C_STYLE: ['/', '*', '/*', '*/', 'x', '\n', ' ', '**'],
+    HASKELL: ['{', '-', '}', '{-', '-}', 'x', '\n'],
+    MATLAB: ['%', '{', '}', '%{', '%}', 'x', '\n'],
+    HTML: ['<', '!', '-', '>', '<!--', '-->', 'x', '\n', '--'],
+    MARKDOWN: ['-', '---', 'x', '\n', '--'],
+    PLAIN: ['#', '*', '***', '#***', 'x', '\n', ' '],
+    PYTHON: ['"', "'", '"""', "'''", '=', ' ', '\t', '\n', 'x', '\r', ' ', '= """'],
+    HASH_LINES: ['#', '##', ' ', '\t', '\n', '\n#', 'x', '\r'],
+    SLASH_LINES: ['/', '//', ' ', '\t', '\n', '\n//', 'x', '\r'],
+}
+
+
+class TestScanComments(TestCase):
+
+    def assertScansAsPattern(self, pattern, content):
+        expected = [match.span() for match in re.finditer(pattern, content)]
+        self.assertEqual(expected, list(scan_comments(pattern, content)), repr(content))
+
+    def test_corpus_scans_as_patterns(self):
+        for pattern, sources in CORPUS.items():
+            for content in sources:
+                self.assertScansAsPattern(pattern, content)
+
+    def test_generated_sources_scan_as_patterns(self):
+        rng = random.Random(20)
+
+        for pattern, pieces in PIECES.items():
+            for _ in range(2000):
+                self.assertScansAsPattern(pattern, ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30))))
+
+    def test_generated_sources_scan_the_same_in_chunks(self):
+        rng = random.Random(21)
+
+        for pattern, pieces in list(PIECES.items()) + [(r'<[a-z]>', ['<', 'a', '>', 'x'])]:
+            for _ in range(2000):
+                content = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+                cuts = sorted(rng.sample(range(len(content) + 1), rng.randint(0, min(len(content) + 1, 8))))
+
+                comment_stream = CommentStream(pattern)
+                comments = list()
+                for start, end in zip([0] + cuts, cuts + [len(content)]):
+                    comments.extend(comment_stream.feed(content[start:end]))
+                comments.extend(comment_stream.close())
+
+                expected = [(start, end, content[start:end]) for start, end in scan_comments(pattern, content)]
+                self.assertEqual(expected, comments, repr((content, cuts)))
+
+    def test_stream_only_keeps_what_may_still_be_a_comment(self):
+        comment_stream = CommentStream(C_STYLE)
+
+        self.assertEqual([(2, 9, '/* a */')], comment_stream.feed('x /* a */ ' + 'y' * 1000 + ' /'))
+        self.assertEqual(1, len(comment_stream._content))
+        self.assertEqual([], comment_stream.feed('* b ' + 'z' * 1000))
+        self.assertEqual([(1011, 2019, '/* b ' + 'z' * 1000 + ' */')], comment_stream.feed(' */ w'))
+        self.assertEqual([], comment_stream.close())
+
+    def test_other_patterns_use_the_pattern(self):
+        self.assertEqual([(2, 5)], list(scan_comments(r'<[a-z]>', 'x <a> y')))
+
+    def test_unclosed_comment_in_large_source(self):
+        # The C_STYLE pattern takes quadratic time to give up on each opening in this source.
+        content = 'int x = 1; /* y *' * 50000
+        self.assertEqual([], list(scan_comments(C_STYLE, content)))
+        # Once closed, the comment runs from the first opening.
+        self.assertEqual([(11, len(content) + 3)], list(scan_comments(C_STYLE, content + ' */')))
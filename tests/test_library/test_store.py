@@ -0,0 +1,347 @@
+import sqlite3
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from sciit.errors import SnapshotStorageError
+from sciit.store import IssueSnapshotStore, ParsedBlobStore, SCHEMA_MIGRATIONS, get_schema_version, INTERVAL_STORAGE, \
+    ROW_STORAGE
+from tests.external_resources import safe_create_repo_dir, remove_existing_repo
+
+
+class TestIssueSnapshotStore(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.db_path = 'store_dir/issues.db'
+
+    def _committed_row_count(self):
+        with sqlite3.connect(self.db_path) as other_connection:
+            return other_connection.execute('SELECT COUNT(*) FROM IssueSnapshot').fetchone()[0]
+
+    @staticmethod
+    def _rows(commit_hexsha):
+        return [(commit_hexsha, '1', '{"issue_id": "1"}', 'master'),
+                (commit_hexsha, '2', '{"issue_id": "2"}', 'master')]
+
+    def test_database_uses_wal_journal(self):
+        store = IssueSnapshotStore(self.db_path)
+        self.assertEqual('wal', store.connection.execute('PRAGMA journal_mode').fetchone()[0])
+        store.close()
+
+    def test_writes_are_committed_in_batches_of_commits(self):
+        store = IssueSnapshotStore(self.db_path, batch_size=2, batch_interval_ms=60000)
+
+        store.write_issue_snapshot_rows(self._rows('a'))
+        self.assertEqual(0, self._committed_row_count())
+
+        store.write_issue_snapshot_rows(self._rows('b'))
+        self.assertEqual(4, self._committed_row_count())
+        store.close()
+
+    def test_writes_are_committed_after_batch_interval(self):
+        store = IssueSnapshotStore(self.db_path, batch_size=1000, batch_interval_ms=50)
+
+        with patch('sciit.store.time.monotonic', side_effect=[0.0, 0.01, 0.1]):
+            store.write_issue_snapshot_rows(self._rows('a'))
+            self.assertEqual(0, self._committed_row_count())
+
+            store.write_issue_snapshot_rows(self._rows('b'))
+            self.assertEqual(4, self._committed_row_count())
+        store.close()
+
+    def test_uncommitted_writes_are_visible_to_store_queries(self):
+        store = IssueSnapshotStore(self.db_path, batch_size=1000, batch_interval_ms=60000)
+        store.write_issue_snapshot_rows(self._rows('a'))
+
+        rows = store.query('SELECT * FROM IssueSnapshot WHERE commit_sha = ?', ['a'])
+        self.assertEqual(['1', '2'], sorted(row['issue_id'] for row in rows))
+        store.close()
+
+    def test_store_can_be_read_from_another_thread(self):
+        store = IssueSnapshotStore(self.db_path, batch_size=1000, batch_interval_ms=60000)
+        store.write_issue_snapshot_rows(self._rows('a'))
+
+        results = list()
+        thread = threading.Thread(target=lambda: results.append(store.read_issue_snapshot_rows(['a'])))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(['1', '2'], [row['issue_id'] for row in results[0]])
+        store.close()
+
+    def test_identical_payloads_are_stored_once(self):
+        store = IssueSnapshotStore(self.db_path)
+        store.write_issue_snapshot_rows(self._rows('a'))
+        store.write_issue_snapshot_rows(self._rows('b'))
+
+        self.assertEqual(2, len(store.query('SELECT * FROM IssuePayload')))
+        rows = store.query('SELECT * FROM IssueSnapshot JOIN IssuePayload USING (payload_id) WHERE issue_id = ?', ['2'])
+        self.assertEqual(['{"issue_id": "2"}'] * 2, [row['json_data'] for row in rows])
+        store.close()
+
+    def test_payloads_written_before_reopening_are_reused(self):
+        store = IssueSnapshotStore(self.db_path)
+        store.write_issue_snapshot_rows(self._rows('a'))
+        store.close()
+
+        store = IssueSnapshotStore(self.db_path)
+        store.write_issue_snapshot_rows(self._rows('b'))
+        self.assertEqual(2, len(store.query('SELECT * FROM IssuePayload')))
+        store.close()
+
+    def test_rows_are_read_in_commit_date_order(self):
+        store = IssueSnapshotStore(self.db_path)
+        store.write_issue_snapshot_rows(self._rows('a'))
+        store.write_issue_snapshot_rows(self._rows('b'))
+        store.write_commit_metadata_rows([
+            ('a', '', 'Nystrome', 'nystrome@example.com', 1514851200, 0, 'a'),
+            ('b', '', 'Nystrome', 'nystrome@example.com', 1514764800, 0, 'b')])
+
+        rows = store.read_issue_snapshot_rows(in_date_order=True)
+        self.assertEqual([('b', '1'), ('b', '2'), ('a', '1'), ('a', '2')],
+                         [(row['commit_sha'], row['issue_id']) for row in rows])
+        store.close()
+
+    def test_long_commit_lists_are_read_through_a_temporary_table(self):
+        store = IssueSnapshotStore(self.db_path)
+        commit_hexshas = ['%040x' % number for number in range(1200)]
+        for commit_hexsha in commit_hexshas:
+            store.write_issue_snapshot_rows(self._rows(commit_hexsha))
+
+        rows = store.read_issue_snapshot_rows(commit_hexshas[100:1100], issue_ids=['2'])
+        self.assertEqual(commit_hexshas[100:1100], [row['commit_sha'] for row in rows])
+        self.assertEqual(1000, len(store.query('SELECT * FROM temp.RequestedCommit')))
+        store.close()
+
+    def test_flush_and_close_commit_pending_writes(self):
+        store = IssueSnapshotStore(self.db_path, batch_size=1000, batch_interval_ms=60000)
+
+        store.write_issue_snapshot_rows(self._rows('a'))
+        store.flush()
+        self.assertEqual(2, self._committed_row_count())
+
+        store.write_issue_snapshot_rows(self._rows('b'))
+        store.close()
+        self.assertEqual(4, self._committed_row_count())
+
+    def tearDown(self):
+        remove_existing_repo('store_dir')
+
+
+class TestIntervalStorage(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.db_path = 'store_dir/issues.db'
+        self.store = IssueSnapshotStore(self.db_path, storage=INTERVAL_STORAGE)
+
+    @staticmethod
+    def _row(commit_hexsha, issue_id, title='x', in_branches='master'):
+        return commit_hexsha, issue_id, '{"title": "%s"}' % title, in_branches
+
+    def _intervals(self):
+        return [(row['issue_id'], row['first_sequence'], row['last_sequence']) for row in self.store.query(
+            'SELECT * FROM IssueSnapshotInterval ORDER BY issue_id, first_sequence')]
+
+    @staticmethod
+    def _snapshots(rows):
+        return [(row['commit_sha'], row['issue_id'], row['json_data'], row['in_branches']) for row in rows]
+
+    def test_unchanged_issues_extend_their_interval(self):
+        for commit_hexsha in 'abc':
+            self.store.write_issue_snapshot_rows([self._row(commit_hexsha, '1'), self._row(commit_hexsha, '2')])
+
+        self.assertEqual([('1', 1, 3), ('2', 1, 3)], self._intervals())
+
+    def test_changed_issues_start_a_new_interval(self):
+        self.store.write_issue_snapshot_rows([self._row('a', '1'), self._row('a', '2')])
+        self.store.write_issue_snapshot_rows([self._row('b', '1', title='y'), self._row('b', '2')])
+        self.store.write_issue_snapshot_rows([self._row('c', '2', in_branches='master,feature')])
+
+        self.assertEqual([('1', 1, 1), ('1', 2, 2), ('2', 1, 2), ('2', 3, 3)], self._intervals())
+
+    def test_snapshots_are_read_per_commit_and_per_issue(self):
+        self.store.write_issue_snapshot_rows([self._row('a', '1'), self._row('a', '2')])
+        self.store.write_issue_snapshot_rows([self._row('b', '1', title='y'), self._row('b', '2')])
+        self.store.write_issue_snapshot_rows([self._row('c', '2')])
+
+        self.assertEqual(
+            [self._row('b', '1', title='y'), self._row('b', '2')],
+            sorted(self._snapshots(self.store.read_issue_snapshot_rows(commit_hexshas=['b']))))
+        self.assertEqual(
+            [self._row('a', '2'), self._row('b', '2'), self._row('c', '2')],
+            self._snapshots(self.store.read_issue_snapshot_rows(issue_ids=['2'])))
+        self.assertEqual(['1', '2'], sorted(self.store.read_issue_ids()))
+
+    def test_long_commit_lists_are_read_from_intervals(self):
+        commit_hexshas = ['%040x' % number for number in range(1200)]
+        for commit_hexsha in commit_hexshas:
+            self.store.write_issue_snapshot_rows([self._row(commit_hexsha, '1')])
+
+        rows = self.store.read_issue_snapshot_rows(commit_hexshas[100:1100])
+        self.assertEqual(commit_hexshas[100:1100], [row['commit_sha'] for row in rows])
+
+    def test_rewritten_commits_are_moved_between_intervals(self):
+        for commit_hexsha in 'abc':
+            self.store.write_issue_snapshot_rows([self._row(commit_hexsha, '1')])
+
+        self.store.write_issue_snapshot_rows([self._row('b', '1', in_branches='master,feature')])
+        self.assertEqual([('1', 1, 1), ('1', 2, 2), ('1', 3, 3)], self._intervals())
+        self.assertEqual(
+            [self._row('b', '1', in_branches='master,feature')],
+            self._snapshots(self.store.read_issue_snapshot_rows(commit_hexshas=['b'])))
+
+        self.store.write_issue_snapshot_rows([self._row('b', '1')])
+        self.assertEqual([('1', 1, 3)], self._intervals())
+
+    def test_rewritten_commits_without_snapshots_are_taken_out_of_intervals(self):
+        for commit_hexsha in 'abc':
+            self.store.write_issue_snapshot_rows([self._row(commit_hexsha, '1')])
+
+        self.store.write_issue_snapshot_rows([], 'b')
+        self.assertEqual([('1', 1, 1), ('1', 3, 3)], self._intervals())
+        self.assertEqual([], self.store.read_issue_snapshot_rows(commit_hexshas=['b']))
+
+        self.store.write_issue_snapshot_rows([], 'd')
+        self.assertEqual(3, len(self.store.query('SELECT * FROM CommitSequence')))
+
+    def test_commit_lookups_use_an_index_on_the_intervals(self):
+        statements = list()
+        with patch.object(self.store, 'query', lambda *statement: statements.append(statement) or []):
+            self.store.read_issue_snapshot_rows(commit_hexshas=['a'])
+
+        sql_statement, values = statements[0]
+        plan = self.store.query('EXPLAIN QUERY PLAN ' + sql_statement, values)
+        self.assertIn('IssueSnapshotInterval USING INDEX', ' '.join(row['detail'] for row in plan))
+
+    def test_storage_is_kept_by_the_database(self):
+        self.store.write_issue_snapshot_rows([self._row('a', '1')])
+        self.store.close()
+
+        self.store = IssueSnapshotStore(self.db_path)
+        self.assertEqual(INTERVAL_STORAGE, self.store.storage)
+        self.store.close()
+
+        self.store = IssueSnapshotStore(self.db_path, storage=ROW_STORAGE)
+        with self.assertRaises(SnapshotStorageError):
+            self.store.query('SELECT * FROM IssueSnapshotInterval')
+
+    def test_databases_holding_rows_use_row_storage(self):
+        self.store.close()
+        remove_existing_repo('store_dir')
+        safe_create_repo_dir('store_dir')
+
+        store = IssueSnapshotStore(self.db_path)
+        store.write_issue_snapshot_rows([self._row('a', '1')])
+        store.close()
+
+        self.store = IssueSnapshotStore(self.db_path)
+        self.assertEqual(ROW_STORAGE, self.store.storage)
+
+    def tearDown(self):
+        self.store.close()
+        remove_existing_repo('store_dir')
+
+
+class TestSchemaMigrations(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.db_path = 'store_dir/issues.db'
+
+    def test_new_database_is_at_latest_schema_version(self):
+        store = IssueSnapshotStore(self.db_path)
+        self.assertEqual(len(SCHEMA_MIGRATIONS), get_schema_version(store.connection.cursor()))
+        store.close()
+
+    def test_unversioned_database_is_migrated_keeping_rows(self):
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(
+                'CREATE TABLE IssueSnapshot(commit_sha TEXT, issue_id TEXT, json_data BLOB, in_branches TEXT, '
+                'UNIQUE (commit_sha, issue_id) ON CONFLICT REPLACE)')
+            connection.execute('INSERT INTO IssueSnapshot VALUES (?, ?, ?, ?)', ('a', '1', '{}', 'master'))
+
+        store = IssueSnapshotStore(self.db_path)
+        self.assertEqual(len(SCHEMA_MIGRATIONS), get_schema_version(store.connection.cursor()))
+        self.assertEqual(1, len(store.query('SELECT * FROM IssueSnapshot')))
+        store.close()
+
+    def test_snapshot_json_is_moved_into_payloads(self):
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute(
+                'CREATE TABLE IssueSnapshot(commit_sha TEXT, issue_id TEXT, json_data BLOB, in_branches TEXT, '
+                'UNIQUE (commit_sha, issue_id) ON CONFLICT REPLACE)')
+            connection.executemany(
+                'INSERT INTO IssueSnapshot VALUES (?, ?, ?, ?)',
+                [('a', '1', '{"title": "x"}', 'master'), ('b', '1', '{"title": "x"}', 'master'),
+                 ('b', '2', '{"title": "y"}', 'master')])
+
+        store = IssueSnapshotStore(self.db_path)
+        self.assertEqual(2, len(store.query('SELECT * FROM IssuePayload')))
+        rows = store.query(
+            'SELECT commit_sha, issue_id, json_data FROM IssueSnapshot JOIN IssuePayload USING (payload_id) '
+            'ORDER BY IssueSnapshot.rowid')
+        self.assertEqual(
+            [('a', '1', '{"title": "x"}'), ('b', '1', '{"title": "x"}'), ('b', '2', '{"title": "y"}')],
+            [(row['commit_sha'], row['issue_id'], row['json_data']) for row in rows])
+        store.close()
+
+    def test_migrations_are_applied_once(self):
+        for _ in range(2):
+            store = IssueSnapshotStore(self.db_path)
+            store.query('SELECT * FROM IssueSnapshot')
+            store.close()
+
+        with sqlite3.connect(self.db_path) as connection:
+            versions = [row[0] for row in connection.execute('SELECT version FROM SchemaVersion')]
+        self.assertEqual(list(range(1, len(SCHEMA_MIGRATIONS) + 1)), versions)
+
+    def test_issue_id_lookups_use_an_index(self):
+        store = IssueSnapshotStore(self.db_path)
+        plan = store.query('EXPLAIN QUERY PLAN SELECT * FROM IssueSnapshot WHERE issue_id IN (?)', ['1'])
+        self.assertIn('USING INDEX', ' '.join(row['detail'] for row in plan))
+        store.close()
+
+    def tearDown(self):
+        remove_existing_repo('store_dir')
+
+
+class TestParsedBlobStore(TestCase):
+
+    def setUp(self):
+        safe_create_repo_dir('store_dir')
+        self.db_path = 'store_dir/parsed-blobs.db'
+
+    def test_issue_data_is_read_by_blob_and_pattern(self):
+        store = ParsedBlobStore(self.db_path, 1)
+        store.write_issue_data('a', 'python', '[{"issue_id": "1"}]')
+        store.write_issue_data('a', 'c-style', '[]')
+        store.write_issue_data('b', 'python', '[]')
+        store.close()
+
+        store = ParsedBlobStore(self.db_path, 1)
+        self.assertEqual({('a', 'python'): '[{"issue_id": "1"}]', ('b', 'python'): '[]'},
+                         store.read_issue_data([('a', 'python'), ('b', 'python'), ('c', 'python')]))
+        store.close()
+
+    def test_issue_data_is_discarded_when_parser_version_changes(self):
+        store = ParsedBlobStore(self.db_path, 1)
+        store.write_issue_data('a', 'python', '[]')
+        store.close()
+
+        store = ParsedBlobStore(self.db_path, 2)
+        self.assertEqual({}, store.read_issue_data([('a', 'python')]))
+        store.close()
+
+    @patch.object(ParsedBlobStore, 'MAX_VALUES_PER_QUERY', 2)
+    def test_long_lists_of_blobs_are_read_in_chunks(self):
+        store = ParsedBlobStore(self.db_path, 1)
+        for blob_sha in 'abcde':
+            store.write_issue_data(blob_sha, 'python', '[]')
+
+        self.assertEqual(5, len(store.read_issue_data([(blob_sha, 'python') for blob_sha in 'abcde'])))
+        store.close()
+
+    def tearDown(self):
+        remove_existing_repo('store_dir')